@@ -2,7 +2,7 @@
 
 from nanobot.agent.loop import AgentLoop
 from nanobot.agent.context import ContextBuilder
-from nanobot.agent.memory import MemoryStore
+from nanobot.agent.memory import MemoryNamespaces, MemoryStore
 from nanobot.agent.skills import SkillsLoader
 
-__all__ = ["AgentLoop", "ContextBuilder", "MemoryStore", "SkillsLoader"]
+__all__ = ["AgentLoop", "ContextBuilder", "MemoryNamespaces", "MemoryStore", "SkillsLoader"]
@@ -0,0 +1,123 @@
+"""Background scheduler for memory consolidation."""
+
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.session.manager import Session
+
+ConsolidateFn = Callable[[Session, bool], Awaitable[None]]
+
+
+class ConsolidationScheduler:
+    """
+    Runs memory consolidation in the background, at most once per session at a time.
+
+    Triggers are debounced: repeated requests for a session within the
+    debounce window collapse into one job, and a request that arrives while
+    that session's job is running queues a single follow-up. The debounce
+    never holds a request longer than max_delay_s, so a busy session still
+    gets consolidated while its history grows. Jobs share a
+    small pool and wait for the agent to be idle (up to max_defer_s) so they
+    do not compete with user-facing LLM calls.
+    """
+
+    def __init__(
+        self,
+        consolidate: ConsolidateFn,
+        idle: asyncio.Event | None = None,
+        debounce_s: float = 5.0,
+        max_concurrent: int = 1,
+        max_defer_s: float = 60.0,
+        max_delay_s: float = 30.0,
+    ):
+        self._consolidate = consolidate
+        self._idle = idle
+        self.debounce_s = debounce_s
+        self.max_defer_s = max_defer_s
+        self.max_delay_s = max_delay_s
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._pending: dict[str, Session] = {}
+        self._requested_at: dict[str, float] = {}  # Loop time of the oldest pending request
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._running: dict[str, asyncio.Task] = {}
+
+    def schedule(self, session: Session) -> None:
+        """Request a (debounced) consolidation of the session."""
+        self._pending[session.key] = session
+        self._requested_at.setdefault(session.key, asyncio.get_running_loop().time())
+        if session.key not in self._running:
+            self._arm(session.key)
+
+    def archive(self, session: Session) -> None:
+        """
+        Archive all of a session's messages now (for /new).
+
+        Supersedes any pending or running consolidation of the same key,
+        since the archive covers all of its messages.
+        """
+        self.cancel(session.key)
+        self._start(session.key, session, archive_all=True)
+
+    def cancel(self, key: str) -> None:
+        """Drop pending and running consolidation for a session."""
+        if timer := self._timers.pop(key, None):
+            timer.cancel()
+        self._pending.pop(key, None)
+        self._requested_at.pop(key, None)
+        if task := self._running.pop(key, None):
+            task.cancel()
+
+    @property
+    def active(self) -> int:
+        """Number of sessions with a pending or running job."""
+        return len(self._pending.keys() | self._running.keys())
+
+    async def drain(self) -> None:
+        """Run pending jobs immediately and wait for all jobs to finish."""
+        while self._pending or self._running:
+            for key in list(self._pending):
+                if key not in self._running:
+                    self._fire(key)
+            if self._running:
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def _arm(self, key: str) -> None:
+        if timer := self._timers.pop(key, None):
+            timer.cancel()
+        loop = asyncio.get_running_loop()
+        deadline = self._requested_at.get(key, loop.time()) + self.max_delay_s
+        delay = max(0.0, min(self.debounce_s, deadline - loop.time()))
+        self._timers[key] = loop.call_later(delay, self._fire, key)
+
+    def _fire(self, key: str) -> None:
+        if timer := self._timers.pop(key, None):
+            timer.cancel()
+        self._requested_at.pop(key, None)
+        if session := self._pending.pop(key, None):
+            self._start(key, session, archive_all=False)
+
+    def _start(self, key: str, session: Session, archive_all: bool) -> None:
+        self._running[key] = asyncio.create_task(self._run(key, session, archive_all))
+
+    async def _run(self, key: str, session: Session, archive_all: bool) -> None:
+        try:
+            async with self._slots:
+                await self._wait_idle()
+                await self._consolidate(session, archive_all)
+        except Exception as e:
+            logger.error(f"Memory consolidation for {key} failed: {e}")
+        finally:
+            if self._running.get(key) is asyncio.current_task():
+                del self._running[key]
+                if key in self._pending:
+                    self._arm(key)
+
+    async def _wait_idle(self) -> None:
+        if self._idle is None or self._idle.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.max_defer_s)
+        except asyncio.TimeoutError:
+            logger.debug("Consolidation deferred too long, running alongside active turn")
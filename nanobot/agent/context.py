@@ -1,13 +1,14 @@
 """Context builder for assembling agent prompts."""
 
-import base64
 import mimetypes
 import platform
 from pathlib import Path
 from typing import Any
 
-from nanobot.agent.memory import MemoryStore
+from nanobot.agent.memory import MemoryNamespaces
 from nanobot.agent.skills import SkillsLoader
+from nanobot.media.store import MediaStore
+from nanobot.utils.helpers import get_data_path
 
 
 class ContextBuilder:
@@ -20,17 +21,28 @@ class ContextBuilder:
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, memory_scope: str = "global", media: MediaStore | None = None):
         self.workspace = workspace
-        self.memory = MemoryStore(workspace)
+        self.media = media or MediaStore(get_data_path() / "media")
+        self.memories = MemoryNamespaces(workspace, memory_scope)
+        self.memory = self.memories.shared
         self.skills = SkillsLoader(workspace)
     
-    def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
+    def build_system_prompt(
+        self,
+        skill_names: list[str] | None = None,
+        session_key: str | None = None,
+        user_key: str | None = None,
+        profile: str = "full",
+    ) -> str:
         """
         Build the system prompt from bootstrap files, memory, and skills.
         
         Args:
             skill_names: Optional list of skills to include.
+            session_key: Current session, for session-scoped memory.
+            user_key: Current user (channel:sender_id), for user-scoped memory.
+            profile: "full", or "light" for identity and memory only (scheduled turns).
         
         Returns:
             Complete system prompt.
@@ -41,15 +53,18 @@ class ContextBuilder:
         parts.append(self._get_identity())
         
         # Bootstrap files
-        bootstrap = self._load_bootstrap_files()
+        bootstrap = self._load_bootstrap_files() if profile == "full" else ""
         if bootstrap:
             parts.append(bootstrap)
         
         # Memory context
-        memory = self.memory.get_memory_context()
+        memory = self.memories.get_memory_context(session_key, user_key)
         if memory:
             parts.append(f"# Memory\n\n{memory}")
         
+        if profile == "light":
+            return "\n\n---\n\n".join(parts)
+        
         # Skills - progressive loading
         # 1. Always-loaded skills: include full content
         always_skills = self.skills.get_always_skills()
@@ -121,7 +136,7 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         
         return "\n\n".join(parts) if parts else ""
     
-    def build_messages(
+    async def build_messages(
         self,
         history: list[dict[str, Any]],
         current_message: str,
@@ -129,6 +144,9 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         media: list[str] | None = None,
         channel: str | None = None,
         chat_id: str | None = None,
+        session_key: str | None = None,
+        user_key: str | None = None,
+        profile: str = "full",
     ) -> list[dict[str, Any]]:
         """
         Build the complete message list for an LLM call.
@@ -140,6 +158,9 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
             media: Optional list of local file paths for images/media.
             channel: Current channel (telegram, feishu, etc.).
             chat_id: Current chat/user ID.
+            session_key: Current session key (for scoped memory).
+            user_key: Current user as channel:sender_id (for scoped memory).
+            profile: System prompt profile ("full" or "light").
 
         Returns:
             List of messages including system prompt.
@@ -147,22 +168,25 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         messages = []
 
         # System prompt
-        system_prompt = self.build_system_prompt(skill_names)
+        system_prompt = self.build_system_prompt(skill_names, session_key, user_key, profile)
         if channel and chat_id:
             system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
+        if namespace := self.memories.namespace_for(session_key, user_key):
+            memory_file = self.memories.store(namespace).memory_file
+            system_prompt += f"\nMemory file for facts specific to this {self.memories.scope}: {memory_file}"
         messages.append({"role": "system", "content": system_prompt})
 
         # History
         messages.extend(history)
 
         # Current message (with optional image attachments)
-        user_content = self._build_user_content(current_message, media)
+        user_content = await self._build_user_content(current_message, media)
         messages.append({"role": "user", "content": user_content})
 
         return messages
 
-    def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
-        """Build user message content with optional base64-encoded images."""
+    async def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
+        """Build user message content with optional base64-encoded images (encodings are cached)."""
         if not media:
             return text
         
@@ -170,10 +194,11 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         for path in media:
             p = Path(path)
             mime, _ = mimetypes.guess_type(path)
-            if not p.is_file() or not mime or not mime.startswith("image/"):
+            if not mime or not mime.startswith("image/"):
                 continue
-            b64 = base64.b64encode(p.read_bytes()).decode()
-            images.append({"type": "image_url", "image_url": {"url": f"data:{mime};base64,{b64}"}})
+            url = await self.media.data_url(p, mime)
+            if url:
+                images.append({"type": "image_url", "image_url": {"url": url}})
         
         if not images:
             return text
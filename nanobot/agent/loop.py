@@ -2,8 +2,10 @@
 
 import asyncio
 import json
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator
 
 from loguru import logger
 
@@ -11,16 +13,24 @@ from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
 from nanobot.agent.context import ContextBuilder
+from nanobot.agent.tools.base import current_origin, current_session_key
+from nanobot.agent.tools.jobs import JobManager, JobKillTool, JobOutputTool, JobStatusTool
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 from nanobot.agent.tools.message import MessageTool
-from nanobot.agent.tools.spawn import SpawnTool
+from nanobot.agent.tools.spawn import SpawnTool, SubagentsTool
 from nanobot.agent.tools.cron import CronTool
-from nanobot.agent.memory import MemoryStore
+from nanobot.agent.consolidation import ConsolidationScheduler
 from nanobot.agent.subagent import SubagentManager
+from nanobot.media.images import ImagePreprocessor
+from nanobot.media.store import MediaStore
 from nanobot.session.manager import Session, SessionManager
+from nanobot.utils.helpers import get_data_path
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import MediaConfig, ScheduledConfig, SubagentsConfig
 
 
 class AgentLoop:
@@ -50,8 +60,18 @@ class AgentLoop:
         cron_service: "CronService | None" = None,
         restrict_to_workspace: bool = False,
         session_manager: SessionManager | None = None,
+        memory_scope: str = "global",
+        scheduled_config: "ScheduledConfig | None" = None,
+        subagent_config: "SubagentsConfig | None" = None,
+        media_config: "MediaConfig | None" = None,
+        media: MediaStore | None = None,
     ):
-        from nanobot.config.schema import ExecToolConfig
+        from nanobot.config.schema import (
+            ExecToolConfig,
+            MediaConfig,
+            ScheduledConfig,
+            SubagentsConfig,
+        )
         from nanobot.cron.service import CronService
         self.bus = bus
         self.provider = provider
@@ -65,10 +85,34 @@ class AgentLoop:
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
-
-        self.context = ContextBuilder(workspace)
+        self.scheduled_config = scheduled_config or ScheduledConfig()
+        subagent_config = subagent_config or SubagentsConfig()
+        media_config = media_config or MediaConfig()
+
+        self.media = media or MediaStore(
+            get_data_path() / "media",
+            max_bytes=media_config.max_size_mb * 1024 * 1024,
+            cache_bytes=media_config.data_url_cache_mb * 1024 * 1024,
+        )
+        self.images = ImagePreprocessor(
+            self.media,
+            max_dimension=media_config.image_max_dimension,
+            format=media_config.image_format,
+            quality=media_config.image_quality,
+            max_workers=media_config.image_workers,
+        )
+        self.context = ContextBuilder(workspace, memory_scope=memory_scope, media=self.media)
         self.sessions = session_manager or SessionManager(workspace)
-        self.tools = ToolRegistry()
+        self.jobs = JobManager(
+            get_data_path() / "jobs",
+            bus_publish=bus.publish_inbound,
+            max_running=self.exec_config.max_background_jobs,
+            timeout=self.exec_config.job_timeout,
+        ) if self.exec_config.background_jobs else None
+        # Stateless tools, shared by the interactive, scheduled and subagent registries
+        self.base_tools = ToolRegistry()
+        self._register_base_tools(self.base_tools)
+        self.tools = self.base_tools.with_tools()
         self.subagents = SubagentManager(
             provider=provider,
             workspace=workspace,
@@ -79,31 +123,25 @@ class AgentLoop:
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
             restrict_to_workspace=restrict_to_workspace,
+            max_concurrent=subagent_config.max_concurrent,
+            max_per_origin=subagent_config.max_per_session,
+            max_iterations=subagent_config.max_iterations,
+            tools=self.base_tools,
         )
         
+        # Set while no agent turn is calling the LLM; consolidation waits for it
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._active_turns = 0
+        self.consolidation = ConsolidationScheduler(self._consolidate_memory, idle=self._idle)
+        # Cron/heartbeat turns get their own pool so they never queue behind (or block) chat traffic
+        self._scheduled_slots = asyncio.Semaphore(self.scheduled_config.max_concurrent)
+        
         self._running = False
         self._register_default_tools()
     
     def _register_default_tools(self) -> None:
-        """Register the default set of tools."""
-        # File tools (restrict to workspace if configured)
-        allowed_dir = self.workspace if self.restrict_to_workspace else None
-        self.tools.register(ReadFileTool(allowed_dir=allowed_dir))
-        self.tools.register(WriteFileTool(allowed_dir=allowed_dir))
-        self.tools.register(EditFileTool(allowed_dir=allowed_dir))
-        self.tools.register(ListDirTool(allowed_dir=allowed_dir))
-        
-        # Shell tool
-        self.tools.register(ExecTool(
-            working_dir=str(self.workspace),
-            timeout=self.exec_config.timeout,
-            restrict_to_workspace=self.restrict_to_workspace,
-        ))
-        
-        # Web tools
-        self.tools.register(WebSearchTool(api_key=self.brave_api_key))
-        self.tools.register(WebFetchTool())
-        
+        """Register the conversation-aware tools on top of the base tools."""
         # Message tool
         message_tool = MessageTool(send_callback=self.bus.publish_outbound)
         self.tools.register(message_tool)
@@ -111,35 +149,101 @@ class AgentLoop:
         # Spawn tool (for subagents)
         spawn_tool = SpawnTool(manager=self.subagents)
         self.tools.register(spawn_tool)
+        self.tools.register(SubagentsTool(manager=self.subagents))
         
         # Cron tool (for scheduling)
         if self.cron_service:
             self.tools.register(CronTool(self.cron_service))
     
+    def _register_base_tools(self, tools: ToolRegistry) -> None:
+        """Register the file, shell and web tools (no per-conversation state)."""
+        # File tools (restrict to workspace if configured)
+        allowed_dir = self.workspace if self.restrict_to_workspace else None
+        tools.register(ReadFileTool(allowed_dir=allowed_dir))
+        tools.register(WriteFileTool(allowed_dir=allowed_dir))
+        tools.register(EditFileTool(allowed_dir=allowed_dir))
+        tools.register(ListDirTool(allowed_dir=allowed_dir))
+        
+        # Shell tool
+        tools.register(ExecTool(
+            working_dir=str(self.workspace),
+            timeout=self.exec_config.timeout,
+            restrict_to_workspace=self.restrict_to_workspace,
+            persistent=self.exec_config.persistent_shell,
+            idle_timeout=self.exec_config.shell_idle_timeout,
+            max_output=self.exec_config.max_output,
+            jobs=self.jobs,
+        ))
+        if self.jobs:
+            tools.register(JobStatusTool(self.jobs))
+            tools.register(JobOutputTool(self.jobs))
+            tools.register(JobKillTool(self.jobs))
+        
+        # Web tools
+        tools.register(WebSearchTool(api_key=self.brave_api_key))
+        tools.register(WebFetchTool())
+    
+    def _scheduled_tools(self, channel: str, chat_id: str) -> ToolRegistry:
+        """
+        Tools for one scheduled turn.
+
+        A private registry, so concurrent scheduled turns cannot retarget the
+        interactive message tool; spawn and cron are left out to keep
+        scheduled work from fanning out or rescheduling itself.
+        """
+        return self.base_tools.with_tools(MessageTool(
+            send_callback=self.bus.publish_outbound,
+            default_channel=channel,
+            default_chat_id=chat_id,
+        ))
+    
     def _set_tool_context(self, channel: str, chat_id: str) -> None:
         """Update context for all tools that need routing info."""
+        current_origin.set((channel, chat_id))
         if message_tool := self.tools.get("message"):
             if isinstance(message_tool, MessageTool):
                 message_tool.set_context(channel, chat_id)
 
-        if spawn_tool := self.tools.get("spawn"):
-            if isinstance(spawn_tool, SpawnTool):
-                spawn_tool.set_context(channel, chat_id)
+        for name in ("spawn", "subagents"):
+            if isinstance(tool := self.tools.get(name), (SpawnTool, SubagentsTool)):
+                tool.set_context(channel, chat_id)
 
         if cron_tool := self.tools.get("cron"):
             if isinstance(cron_tool, CronTool):
                 cron_tool.set_context(channel, chat_id)
 
-    async def _run_agent_loop(self, initial_messages: list[dict]) -> tuple[str | None, list[str]]:
+    @contextmanager
+    def _foreground_turn(self) -> Iterator[None]:
+        """Mark a user-facing turn as active so background work yields to it."""
+        self._active_turns += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._active_turns -= 1
+            if not self._active_turns:
+                self._idle.set()
+
+    async def _run_agent_loop(
+        self,
+        initial_messages: list[dict],
+        tools: ToolRegistry | None = None,
+        model: str | None = None,
+        usage: dict[str, int] | None = None,
+    ) -> tuple[str | None, list[str]]:
         """
         Run the agent iteration loop.
 
         Args:
             initial_messages: Starting messages for the LLM conversation.
+            tools: Tool registry to use (defaults to the interactive tools).
+            model: Model override (defaults to the agent's model).
+            usage: If given, LLM calls and token counts are added to it.
 
         Returns:
             Tuple of (final_content, list_of_tools_used).
         """
+        tools = tools or self.tools
         messages = initial_messages
         iteration = 0
         final_content = None
@@ -150,11 +254,15 @@ class AgentLoop:
 
             response = await self.provider.chat(
                 messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model,
+                tools=tools.get_definitions(),
+                model=model or self.model,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
             )
+            if usage is not None:
+                usage["llm_calls"] = usage.get("llm_calls", 0) + 1
+                for k, v in response.usage.items():
+                    usage[k] = usage.get(k, 0) + v
 
             if response.has_tool_calls:
                 tool_call_dicts = [
@@ -177,7 +285,7 @@ class AgentLoop:
                     tools_used.append(tool_call.name)
                     args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
                     logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
+                    result = await tools.execute(tool_call.name, tool_call.arguments)
                     messages = self.context.add_tool_result(
                         messages, tool_call.id, tool_call.name, result
                     )
@@ -193,29 +301,30 @@ class AgentLoop:
         self._running = True
         logger.info("Agent loop started")
 
-        while self._running:
+        async for msg in self.bus.inbound_messages():
             try:
-                msg = await asyncio.wait_for(
-                    self.bus.consume_inbound(),
-                    timeout=1.0
-                )
-                try:
-                    response = await self._process_message(msg)
-                    if response:
-                        await self.bus.publish_outbound(response)
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    await self.bus.publish_outbound(OutboundMessage(
-                        channel=msg.channel,
-                        chat_id=msg.chat_id,
-                        content=f"Sorry, I encountered an error: {str(e)}"
-                    ))
-            except asyncio.TimeoutError:
-                continue
+                response = await self._process_message(msg)
+                if response:
+                    await self.bus.publish_outbound(response)
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+                await self.bus.publish_outbound(OutboundMessage(
+                    channel=msg.channel,
+                    chat_id=msg.chat_id,
+                    content=f"Sorry, I encountered an error: {str(e)}"
+                ))
+
+        # Flush debounced consolidations so nothing is lost on shutdown
+        await self.consolidation.drain()
+        if isinstance(exec_tool := self.base_tools.get("exec"), ExecTool):
+            await exec_tool.aclose()
+        self.images.close()
+        self._running = False
+        logger.info("Agent loop stopped")
     
     def stop(self) -> None:
-        """Stop the agent loop."""
-        self._running = False
+        """Stop the agent loop once queued and in-flight messages are processed."""
+        self.bus.close_inbound()
         logger.info("Agent loop stopping")
     
     async def _process_message(self, msg: InboundMessage, session_key: str | None = None) -> OutboundMessage | None:
@@ -238,40 +347,53 @@ class AgentLoop:
         
         key = session_key or msg.session_key
         session = self.sessions.get_or_create(key)
+        current_session_key.set(key)
+        # Remember who is talking so consolidation can file user-scoped facts
+        user_key = f"{msg.channel}:{msg.sender_id}"
+        session.metadata["user"] = user_key
         
         # Handle slash commands
         cmd = msg.content.strip().lower()
         if cmd == "/new":
-            # Capture messages before clearing (avoid race condition with background task)
-            messages_to_archive = session.messages.copy()
+            # Archive a snapshot; the scheduler drops any consolidation still pending for the key
+            temp_session = Session(key=session.key, metadata=dict(session.metadata))
+            temp_session.messages = session.messages.copy()
             session.clear()
             self.sessions.save(session)
             self.sessions.invalidate(session.key)
-
-            async def _consolidate_and_cleanup():
-                temp_session = Session(key=session.key)
-                temp_session.messages = messages_to_archive
-                await self._consolidate_memory(temp_session, archive_all=True)
-
-            asyncio.create_task(_consolidate_and_cleanup())
+            self.consolidation.archive(temp_session)
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="New session started. Memory consolidation in progress.")
+        if cmd == "/tasks":
+            runs = self.subagents.status(msg.channel, msg.chat_id)
+            return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
+                                  content="\n".join(r.summary() for r in runs) or "No background tasks.")
+        if cmd == "/stop":
+            count = self.subagents.cancel_origin(msg.channel, msg.chat_id)
+            return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
+                                  content=f"Stopped {count} background task(s).")
         if cmd == "/help":
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
-                                  content="🐈 nanobot commands:\n/new — Start a new conversation\n/help — Show available commands")
+                                  content="🐈 nanobot commands:\n/new — Start a new conversation\n"
+                                          "/tasks — Show background tasks\n/stop — Stop background tasks\n"
+                                          "/help — Show available commands")
         
-        if len(session.messages) > self.memory_window:
-            asyncio.create_task(self._consolidate_memory(session))
+        if len(session.messages) - session.last_consolidated >= self.memory_window:
+            self.consolidation.schedule(session)
 
         self._set_tool_context(msg.channel, msg.chat_id)
-        initial_messages = self.context.build_messages(
+        media = await self.images.prepare(msg.media) if msg.media else None
+        initial_messages = await self.context.build_messages(
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
-            media=msg.media if msg.media else None,
+            media=media,
             channel=msg.channel,
             chat_id=msg.chat_id,
+            session_key=key,
+            user_key=user_key,
         )
-        final_content, tools_used = await self._run_agent_loop(initial_messages)
+        with self._foreground_turn():
+            final_content, tools_used = await self._run_agent_loop(initial_messages)
 
         if final_content is None:
             final_content = "I've completed processing but have no response to give."
@@ -312,14 +434,18 @@ class AgentLoop:
         
         session_key = f"{origin_channel}:{origin_chat_id}"
         session = self.sessions.get_or_create(session_key)
+        current_session_key.set(session_key)
         self._set_tool_context(origin_channel, origin_chat_id)
-        initial_messages = self.context.build_messages(
+        initial_messages = await self.context.build_messages(
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
             channel=origin_channel,
             chat_id=origin_chat_id,
+            session_key=session_key,
+            user_key=session.metadata.get("user"),
         )
-        final_content, _ = await self._run_agent_loop(initial_messages)
+        with self._foreground_turn():
+            final_content, _ = await self._run_agent_loop(initial_messages)
 
         if final_content is None:
             final_content = "Background task completed."
@@ -341,7 +467,10 @@ class AgentLoop:
             archive_all: If True, clear all messages and reset session (for /new command).
                        If False, only write to files without modifying session.
         """
-        memory = MemoryStore(self.workspace)
+        memories = self.context.memories
+        memory = memories.shared
+        namespace = memories.namespace_for(session.key, session.metadata.get("user"))
+        private = memories.store(namespace) if namespace else None
 
         if archive_all:
             old_messages = session.messages
@@ -358,7 +487,9 @@ class AgentLoop:
                 logger.debug(f"Session {session.key}: No new messages to consolidate (last_consolidated={session.last_consolidated}, total={len(session.messages)})")
                 return
 
-            old_messages = session.messages[session.last_consolidated:-keep_count]
+            # Fix the range now: messages may be appended while the LLM call runs
+            end = len(session.messages) - keep_count
+            old_messages = session.messages[session.last_consolidated:end]
             if not old_messages:
                 return
             logger.info(f"Memory consolidation started: {len(session.messages)} total, {len(old_messages)} new to consolidate, {keep_count} keep")
@@ -370,13 +501,30 @@ class AgentLoop:
             tools = f" [tools: {', '.join(m['tools_used'])}]" if m.get("tools_used") else ""
             lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
         conversation = "\n".join(lines)
-        current_memory = memory.read_long_term()
+        base_memory = memory.read_long_term()
+        # Show facts with their keys so the model can target updates and deletes
+        current_memory = memory.load_doc().render()
+        scope_note = ""
+        if private:
+            label = "this user" if memories.scope == "user" else "this conversation"
+            current_memory = (
+                f"### Shared (scope \"shared\")\n{current_memory or '(empty)'}\n\n"
+                f"### About {label} (default scope)\n{private.load_doc().render() or '(empty)'}"
+            )
+            scope_note = (
+                f"\n   Ops apply to the memory about {label} unless they include \"scope\": \"shared\";"
+                " use shared only for facts useful in every conversation."
+            )
 
         prompt = f"""You are a memory consolidation agent. Process this conversation and return a JSON object with exactly two keys:
 
 1. "history_entry": A paragraph (2-5 sentences) summarizing the key events/decisions/topics. Start with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by grep search later.
 
-2. "memory_update": The updated long-term memory content. Add any new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. If nothing new, return the existing content unchanged.
+2. "memory_ops": A list of changes to long-term memory facts (lines of the form "- [key] fact"). Record new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. Each op is one of:
+   {{"op": "add", "key": "short.dotted.key", "text": "one-line fact"}}
+   {{"op": "update", "key": "existing key", "text": "corrected one-line fact"}}
+   {{"op": "delete", "key": "existing key"}}
+   Return [] if nothing changed. Do not repeat unchanged facts.{scope_note}
 
 ## Current Long-term Memory
 {current_memory or "(empty)"}
@@ -400,15 +548,29 @@ Respond with ONLY valid JSON, no markdown fences."""
             result = json.loads(text)
 
             if entry := result.get("history_entry"):
-                memory.append_history(entry)
-            if update := result.get("memory_update"):
-                if update != current_memory:
-                    memory.write_long_term(update)
+                await asyncio.to_thread(memory.append_history, entry)
+            if ops := result.get("memory_ops"):
+                ops = [op for op in ops if isinstance(op, dict)] if isinstance(ops, list) else []
+                if private:
+                    shared_ops = [op for op in ops if op.get("scope") == "shared"]
+                    private_ops = [op for op in ops if op.get("scope") != "shared"]
+                    if private_ops:
+                        counts = await asyncio.to_thread(private.apply_ops, private_ops)
+                        logger.info(f"Memory ops applied to {namespace}: {counts}")
+                    ops = shared_ops
+                if ops:
+                    counts = await asyncio.to_thread(memory.apply_ops, ops)
+                    logger.info(f"Memory ops applied: {counts}")
+            elif not private and (update := result.get("memory_update")):
+                # Models that ignore the ops format and return the whole file
+                if update != base_memory:
+                    await asyncio.to_thread(memory.update_long_term, base_memory, update)
 
             if archive_all:
                 session.last_consolidated = 0
             else:
-                session.last_consolidated = len(session.messages) - keep_count
+                session.last_consolidated = end
+                self.sessions.save(session)
             logger.info(f"Memory consolidation done: {len(session.messages)} messages, last_consolidated={session.last_consolidated}")
         except Exception as e:
             logger.error(f"Memory consolidation failed: {e}")
@@ -441,3 +603,62 @@ Respond with ONLY valid JSON, no markdown fences."""
         
         response = await self._process_message(msg, session_key=session_key)
         return response.content if response else ""
+    
+    async def process_scheduled(
+        self,
+        content: str,
+        session_key: str,
+        channel: str = "cli",
+        chat_id: str = "direct",
+        model: str | None = None,
+    ) -> tuple[str, dict[str, int]]:
+        """
+        Run a cron or heartbeat turn on the scheduled lane.
+        
+        Scheduled turns run concurrently with chat traffic in their own pool,
+        with a trimmed prompt (no bootstrap files or skills), a short history
+        and their own tool instances.
+        
+        Args:
+            content: The scheduled prompt.
+            session_key: Session for the job's own history (e.g. "cron:<id>").
+            channel: Channel for message tool routing.
+            chat_id: Chat ID for message tool routing.
+            model: Model override (defaults to the scheduled lane's model).
+        
+        Returns:
+            The response and usage (llm_calls, token counts, latency_ms).
+        """
+        cfg = self.scheduled_config
+        async with self._scheduled_slots:
+            start = time.monotonic()
+            session = self.sessions.get_or_create(session_key)
+            current_session_key.set(session_key)
+            current_origin.set((channel, chat_id))
+            messages = await self.context.build_messages(
+                history=session.get_history(max_messages=cfg.history_window),
+                current_message=content,
+                channel=channel,
+                chat_id=chat_id,
+                session_key=session_key,
+                profile="light",
+            )
+            usage: dict[str, int] = {}
+            final_content, _ = await self._run_agent_loop(
+                messages,
+                tools=self._scheduled_tools(channel, chat_id),
+                model=model or cfg.model or self.model,
+                usage=usage,
+            )
+            final_content = final_content or ""
+            
+            session.add_message("user", content)
+            session.add_message("assistant", final_content)
+            self.sessions.save(session)
+            
+            usage["latency_ms"] = int((time.monotonic() - start) * 1000)
+            logger.info(
+                f"Scheduled turn {session_key}: {usage['latency_ms']}ms, "
+                f"{usage.get('llm_calls', 0)} calls, {usage.get('total_tokens', 0)} tokens"
+            )
+            return final_content, usage
@@ -1,17 +1,139 @@
 """Memory system for persistent agent memory."""
 
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, Iterator
 
-from nanobot.utils.helpers import ensure_dir
+from loguru import logger
+
+from nanobot.utils.helpers import ensure_dir, safe_filename
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process callers are still serialized by the scheduler
+    fcntl = None
+
+
+_FACT_LINE = re.compile(r"^[-*] \[(?P<key>[\w.:-]+)\] (?P<text>.+)$")
+_BULLET_LINE = re.compile(r"^[-*] (?P<text>.+)$")
+
+
+class MemoryDoc:
+    """
+    Parsed MEMORY.md: keyed facts ("- [key] text") interleaved with free text.
+
+    Plain bullets are given a stable key derived from their text, so facts
+    written before keys existed can be updated and deleted too; headings and
+    other lines are kept verbatim.
+    """
+
+    def __init__(self, content: str = ""):
+        self._items: list[list[str | None]] = []  # [key, text]; key None = verbatim line
+        self._facts: dict[str, list[str | None]] = {}
+        for line in content.splitlines():
+            if m := _FACT_LINE.match(line):
+                self._put(m["key"], m["text"])
+            elif m := _BULLET_LINE.match(line):
+                self._put(self._auto_key(m["text"]), m["text"])
+            else:
+                self._items.append([None, line])
+
+    def _auto_key(self, text: str) -> str:
+        key = "m" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:6]
+        while key in self._facts:
+            key += "x"
+        return key
+
+    def _put(self, key: str, text: str) -> None:
+        if item := self._facts.get(key):
+            item[1] = text
+        else:
+            item = [key, text]
+            self._items.append(item)
+            self._facts[key] = item
+
+    @property
+    def facts(self) -> dict[str, str]:
+        return {key: item[1] for key, item in self._facts.items()}
+
+    def apply(self, op: dict[str, Any]) -> str:
+        """Apply one add/update/delete op; returns what happened."""
+        kind, key, text = op.get("op"), op.get("key"), op.get("text")
+        if kind == "delete":
+            if not isinstance(key, str) or key not in self._facts:
+                return "skipped"
+            self._items.remove(self._facts.pop(key))
+            return "delete"
+        if kind not in ("add", "update") or not isinstance(text, str) or not text.strip():
+            return "skipped"
+        text = " ".join(text.split())  # Facts are single lines
+        if not isinstance(key, str) or not _FACT_LINE.match(f"- [{key}] x"):
+            key = self._auto_key(text)
+        kind = "update" if key in self._facts else "add"
+        self._put(key, text)
+        return kind
+
+    def render(self) -> str:
+        lines = [f"- [{key}] {text}" if key else text for key, text in self._items]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+def merge_memory(base: str, ours: str, theirs: str) -> str:
+    """
+    Three-way line merge of MEMORY.md.
+
+    `ours` was derived from `base`, while `theirs` is what another writer saved
+    in the meantime. Lines we removed are dropped from theirs and lines we
+    added are appended, so neither side's new facts are lost.
+    """
+    base_lines, our_lines = set(base.splitlines()), set(ours.splitlines())
+    removed = {line for line in base_lines - our_lines if line.strip()}
+    merged = [line for line in theirs.splitlines() if line not in removed]
+    present = set(merged)
+    for line in ours.splitlines():
+        if line not in base_lines and line not in present:
+            merged.append(line)
+            present.add(line)
+    return "\n".join(merged) + ("\n" if merged else "")
 
 
 class MemoryStore:
     """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log)."""
 
-    def __init__(self, workspace: Path):
-        self.memory_dir = ensure_dir(workspace / "memory")
+    def __init__(self, workspace: Path, namespace: str | None = None):
+        # Namespaced stores live under memory/<namespace>/ (e.g. memory/users/telegram_42/)
+        self.memory_dir = ensure_dir(workspace / "memory" / namespace if namespace else workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
         self.history_file = self.memory_dir / "HISTORY.md"
+        self.lock_file = self.memory_dir / ".lock"
+        self.index_file = self.memory_dir / "index.json"
+        self._doc: MemoryDoc | None = None
+        self._doc_stamp: tuple[int, int] | None = None
+        self._text: str = ""
+        self._text_stamp: tuple[int, int] | None = None
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        Hold an exclusive cross-process lock on the memory files.
+
+        flock blocks the calling thread, so coroutines must run the methods
+        that take it via asyncio.to_thread rather than on the event loop.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
 
     def read_long_term(self) -> str:
         if self.memory_file.exists():
@@ -19,12 +141,148 @@ class MemoryStore:
         return ""
 
     def write_long_term(self, content: str) -> None:
-        self.memory_file.write_text(content, encoding="utf-8")
+        tmp = self.memory_file.with_suffix(".tmp")
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, self.memory_file)
+
+    def update_long_term(self, base: str, content: str) -> None:
+        """
+        Replace MEMORY.md with content derived from base, under the lock.
+
+        If another session changed the file since base was read, the two
+        updates are merged instead of the later one clobbering the earlier.
+        """
+        with self.locked():
+            current = self.read_long_term()
+            if current != base:
+                content = merge_memory(base, content, current)
+            if content != current:
+                self.write_long_term(content)
+
+    def _stamp(self) -> tuple[int, int] | None:
+        try:
+            st = self.memory_file.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load_doc(self) -> MemoryDoc:
+        """Parsed MEMORY.md, reparsed only when the file changed (e.g. edited by a tool)."""
+        stamp = self._stamp()
+        if self._doc is None or stamp != self._doc_stamp:
+            self._doc = MemoryDoc(self.read_long_term())
+            self._doc_stamp = stamp
+        return self._doc
+
+    def facts(self) -> dict[str, str]:
+        """Keyed facts, served from index.json while it matches MEMORY.md."""
+        try:
+            index = json.loads(self.index_file.read_text(encoding="utf-8"))
+            if tuple(index.get("stamp") or ()) == self._stamp():
+                return index["facts"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return self.load_doc().facts
+
+    def apply_ops(self, ops: list[dict[str, Any]]) -> dict[str, int]:
+        """
+        Apply add/update/delete ops on keyed facts atomically.
+
+        Ops are applied to the latest MEMORY.md under the lock, so concurrent
+        sessions never overwrite each other's facts. MEMORY.md and index.json
+        are rewritten together. The ops are applied to a fresh parse that
+        replaces the cached doc only once saved, so readers on other threads
+        never see a half-applied doc.
+
+        Returns:
+            Counts of added, updated, deleted and skipped ops.
+        """
+        counts = {"add": 0, "update": 0, "delete": 0, "skipped": 0}
+        with self.locked():
+            doc = MemoryDoc(self.read_long_term())
+            for op in ops:
+                counts[doc.apply(op) if isinstance(op, dict) else "skipped"] += 1
+            if counts["add"] or counts["update"] or counts["delete"]:
+                self.write_long_term(doc.render())
+                self._doc, self._doc_stamp = doc, self._stamp()
+                self._write_index(doc)
+        if counts["skipped"]:
+            logger.debug(f"Memory ops skipped: {counts['skipped']} of {len(ops)}")
+        return counts
+
+    def _write_index(self, doc: MemoryDoc) -> None:
+        tmp = self.index_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"stamp": self._doc_stamp, "facts": doc.facts}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.index_file)
 
     def append_history(self, entry: str) -> None:
-        with open(self.history_file, "a", encoding="utf-8") as f:
+        with self.locked(), open(self.history_file, "a", encoding="utf-8") as f:
             f.write(entry.rstrip() + "\n\n")
 
+    def read_cached(self) -> str:
+        """MEMORY.md content, re-read only when the file changed."""
+        stamp = self._stamp()
+        if stamp != self._text_stamp:
+            self._text = self.read_long_term() if stamp else ""
+            self._text_stamp = stamp
+        return self._text
+
     def get_memory_context(self) -> str:
-        long_term = self.read_long_term()
+        long_term = self.read_cached()
         return f"## Long-term Memory\n{long_term}" if long_term else ""
+
+
+class MemoryNamespaces:
+    """
+    Resolves the memory stores relevant to a turn.
+
+    With scope "global" every chat shares memory/MEMORY.md. With "user" or
+    "session", each user (channel:sender_id) or session key also gets its own
+    store under memory/users/ or memory/sessions/, and a turn loads only the
+    shared store plus its own namespace. Stores are kept in a bounded LRU so
+    repeat turns cost a stat() per namespace rather than a parse.
+    """
+
+    SCOPES = ("global", "user", "session")
+
+    def __init__(self, workspace: Path, scope: str = "global", max_cached: int = 256):
+        if scope not in self.SCOPES:
+            raise ValueError(f"Unknown memory scope: {scope}")
+        self.workspace = workspace
+        self.scope = scope
+        self.max_cached = max_cached
+        self.shared = MemoryStore(workspace)
+        self._stores: OrderedDict[str, MemoryStore] = OrderedDict()
+
+    def namespace_for(self, session_key: str | None, user_key: str | None) -> str | None:
+        """The private namespace for a turn, or None when only shared memory applies."""
+        if self.scope == "user" and user_key:
+            return f"users/{safe_filename(user_key.replace(':', '_'))}"
+        if self.scope == "session" and session_key:
+            return f"sessions/{safe_filename(session_key.replace(':', '_'))}"
+        return None
+
+    def store(self, namespace: str | None) -> MemoryStore:
+        """Get the (cached) store for a namespace; None means shared memory."""
+        if namespace is None:
+            return self.shared
+        if store := self._stores.get(namespace):
+            self._stores.move_to_end(namespace)
+            return store
+        store = self._stores[namespace] = MemoryStore(self.workspace, namespace)
+        if len(self._stores) > self.max_cached:
+            self._stores.popitem(last=False)
+        return store
+
+    def get_memory_context(self, session_key: str | None = None, user_key: str | None = None) -> str:
+        shared = self.shared.read_cached()
+        namespace = self.namespace_for(session_key, user_key)
+        if namespace is None:
+            return f"## Long-term Memory\n{shared}" if shared else ""
+        parts = []
+        if shared:
+            parts.append(f"## Shared Memory\n{shared}")
+        if private := self.store(namespace).read_cached():
+            label = "this user" if self.scope == "user" else "this conversation"
+            parts.append(f"## Memory about {label}\n{private}")
+        return "\n\n".join(parts)
@@ -2,7 +2,11 @@
 
 import asyncio
 import json
+import time
 import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 
@@ -11,11 +15,81 @@ from loguru import logger
 from nanobot.bus.events import InboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
+from nanobot.agent.tools.base import current_session_key
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 
+_SUBAGENT_PROMPT_BODY = """You are a subagent spawned by the main agent to complete a specific task.
+
+## Rules
+1. Stay focused - complete only the assigned task, nothing else
+2. Your final response will be reported back to the main agent
+3. Do not initiate conversations or take on side tasks
+4. Be concise but informative in your findings
+
+## What You Can Do
+- Read and write files in the workspace
+- Execute shell commands
+- Search the web and fetch web pages
+- Complete the task thoroughly
+
+## What You Cannot Do
+- Send messages directly to users (no message tool available)
+- Spawn other subagents
+- Access the main agent's conversation history
+
+## Workspace
+Your workspace is at: {workspace}
+Skills are available at: {workspace}/skills/ (read SKILL.md files as needed)
+
+When you have completed the task, provide a clear summary of your findings or actions."""
+
+
+@dataclass
+class SubagentRun:
+    """A spawned subagent: its origin, progress and accounting."""
+    id: str
+    label: str
+    task: str
+    origin: dict[str, str]
+    status: str = "queued"  # queued, running, ok, error, cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    iterations: int = 0
+    tool_calls: int = 0
+    current_tool: str | None = None
+    usage: dict[str, int] = field(default_factory=dict)
+    handle: asyncio.Task | None = field(default=None, repr=False)
+    
+    @property
+    def origin_key(self) -> str:
+        return f"{self.origin['channel']}:{self.origin['chat_id']}"
+    
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+    
+    @property
+    def elapsed_s(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+    
+    def summary(self) -> str:
+        """One line of status and accounting."""
+        line = f"[{self.id}] {self.label}: {self.status}"
+        if self.started_at is not None:
+            line += (
+                f", {self.elapsed_s:.0f}s, {self.iterations} iterations, {self.tool_calls} tool calls, "
+                f"{self.usage.get('total_tokens', 0)} tokens"
+            )
+        if self.status == "running" and self.current_tool:
+            line += f" (running {self.current_tool})"
+        return line
+
 
 class SubagentManager:
     """
@@ -24,6 +98,11 @@ class SubagentManager:
     Subagents are lightweight agent instances that run in the background
     to handle specific tasks. They share the same LLM provider but have
     isolated context and a focused system prompt.
+    
+    At most max_concurrent subagents run at once; further spawns wait in a
+    FIFO queue. Each origin chat may have at most max_per_origin subagents
+    queued or running, and spawns beyond that are refused so the model
+    can wait or cancel instead.
     """
     
     def __init__(
@@ -37,6 +116,10 @@ class SubagentManager:
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
         restrict_to_workspace: bool = False,
+        max_concurrent: int = 4,
+        max_per_origin: int = 3,
+        max_iterations: int = 15,
+        tools: ToolRegistry | None = None,
     ):
         from nanobot.config.schema import ExecToolConfig
         self.provider = provider
@@ -48,7 +131,34 @@ class SubagentManager:
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.restrict_to_workspace = restrict_to_workspace
-        self._running_tasks: dict[str, asyncio.Task[None]] = {}
+        self.max_per_origin = max_per_origin
+        self.max_iterations = max_iterations
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._runs: dict[str, SubagentRun] = {}
+        self._finished: deque[SubagentRun] = deque(maxlen=50)
+        # Built once and shared by every subagent: the tools are stateless
+        # (no message or spawn tool) and the prompt only varies by time
+        self.tools = tools or self._build_tools()
+        self._prompt_body = _SUBAGENT_PROMPT_BODY.replace("{workspace}", str(workspace))
+    
+    def _build_tools(self) -> ToolRegistry:
+        allowed_dir = self.workspace if self.restrict_to_workspace else None
+        return ToolRegistry([
+            ReadFileTool(allowed_dir=allowed_dir),
+            WriteFileTool(allowed_dir=allowed_dir),
+            EditFileTool(allowed_dir=allowed_dir),
+            ListDirTool(allowed_dir=allowed_dir),
+            ExecTool(
+                working_dir=str(self.workspace),
+                timeout=self.exec_config.timeout,
+                restrict_to_workspace=self.restrict_to_workspace,
+                persistent=self.exec_config.persistent_shell,
+                idle_timeout=self.exec_config.shell_idle_timeout,
+                max_output=self.exec_config.max_output,
+            ),
+            WebSearchTool(api_key=self.brave_api_key),
+            WebFetchTool(),
+        ])
     
     async def spawn(
         self,
@@ -69,135 +179,154 @@ class SubagentManager:
         Returns:
             Status message indicating the subagent was started.
         """
-        task_id = str(uuid.uuid4())[:8]
-        display_label = label or task[:30] + ("..." if len(task) > 30 else "")
-        
         origin = {
             "channel": origin_channel,
             "chat_id": origin_chat_id,
         }
+        origin_key = f"{origin_channel}:{origin_chat_id}"
+        active = [r for r in self._runs.values() if r.origin_key == origin_key]
+        if len(active) >= self.max_per_origin:
+            logger.info(f"Subagent quota reached for {origin_key} ({len(active)} active)")
+            return (
+                f"Error: {len(active)} subagents are already queued or running for this chat "
+                f"(limit {self.max_per_origin}). Wait for one to finish or cancel one first:\n"
+                + "\n".join(r.summary() for r in active)
+            )
         
-        # Create background task
-        bg_task = asyncio.create_task(
-            self._run_subagent(task_id, task, display_label, origin)
-        )
-        self._running_tasks[task_id] = bg_task
+        task_id = str(uuid.uuid4())[:8]
+        display_label = label or task[:30] + ("..." if len(task) > 30 else "")
+        run = SubagentRun(id=task_id, label=display_label, task=task, origin=origin)
+        self._runs[task_id] = run
         
-        # Cleanup when done
-        bg_task.add_done_callback(lambda _: self._running_tasks.pop(task_id, None))
+        # Create background task; it waits for a pool slot before starting
+        run.handle = asyncio.create_task(self._run_subagent(run))
+        run.handle.add_done_callback(lambda _: self._finish(run, "cancelled"))  # Cancelled before it ran
         
+        queued = " It is queued until a slot frees up." if self._slots.locked() else ""
         logger.info(f"Spawned subagent [{task_id}]: {display_label}")
-        return f"Subagent [{display_label}] started (id: {task_id}). I'll notify you when it completes."
+        return f"Subagent [{display_label}] started (id: {task_id}).{queued} I'll notify you when it completes."
     
-    async def _run_subagent(
-        self,
-        task_id: str,
-        task: str,
-        label: str,
-        origin: dict[str, str],
-    ) -> None:
-        """Execute the subagent task and announce the result."""
-        logger.info(f"Subagent [{task_id}] starting task: {label}")
-        
+    def cancel(self, task_id: str) -> bool:
+        """Cancel a queued or running subagent. Returns False if it is not active."""
+        run = self._runs.get(task_id)
+        if run is None or run.handle is None:
+            return False
+        run.handle.cancel()
+        return True
+    
+    def cancel_origin(self, channel: str, chat_id: str) -> int:
+        """Cancel all subagents spawned from a chat. Returns how many were cancelled."""
+        origin_key = f"{channel}:{chat_id}"
+        ids = [r.id for r in self._runs.values() if r.origin_key == origin_key]
+        return sum(self.cancel(task_id) for task_id in ids)
+    
+    def status(self, channel: str | None = None, chat_id: str | None = None) -> list[SubagentRun]:
+        """Active subagents followed by recently finished ones, optionally for one chat."""
+        runs = list(self._runs.values()) + list(reversed(self._finished))
+        if channel is not None:
+            runs = [r for r in runs if r.origin_key == f"{channel}:{chat_id}"]
+        return runs
+    
+    async def _run_subagent(self, run: SubagentRun) -> None:
+        """Wait for a pool slot, execute the subagent task and announce the result."""
+        current_session_key.set(f"subagent:{run.id}")  # Own shell session, if persistent
         try:
-            # Build subagent tools (no message tool, no spawn tool)
-            tools = ToolRegistry()
-            allowed_dir = self.workspace if self.restrict_to_workspace else None
-            tools.register(ReadFileTool(allowed_dir=allowed_dir))
-            tools.register(WriteFileTool(allowed_dir=allowed_dir))
-            tools.register(EditFileTool(allowed_dir=allowed_dir))
-            tools.register(ListDirTool(allowed_dir=allowed_dir))
-            tools.register(ExecTool(
-                working_dir=str(self.workspace),
-                timeout=self.exec_config.timeout,
-                restrict_to_workspace=self.restrict_to_workspace,
-            ))
-            tools.register(WebSearchTool(api_key=self.brave_api_key))
-            tools.register(WebFetchTool())
-            
-            # Build messages with subagent-specific prompt
-            system_prompt = self._build_subagent_prompt(task)
-            messages: list[dict[str, Any]] = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": task},
-            ]
-            
-            # Run agent loop (limited iterations)
-            max_iterations = 15
-            iteration = 0
-            final_result: str | None = None
+            async with self._slots:
+                run.status = "running"
+                run.started_at = time.time()
+                logger.info(f"Subagent [{run.id}] starting task: {run.label}")
+                result = await self._execute(run)
+            run.status = "ok"
+            logger.info(f"Subagent [{run.id}] completed successfully")
+        except asyncio.CancelledError:
+            run.status = "cancelled"
+            result = ""
+            logger.info(f"Subagent [{run.id}] cancelled")
+        except Exception as e:
+            run.status = "error"
+            result = f"Error: {str(e)}"
+            logger.error(f"Subagent [{run.id}] failed: {e}")
+        finally:
+            self._finish(run, run.status)
+        logger.info(f"Subagent {run.summary()}")
+        if run.status != "cancelled":  # Whoever cancelled it already knows
+            await self._announce_result(run, result)
+    
+    def _finish(self, run: SubagentRun, status: str) -> None:
+        if self._runs.pop(run.id, None) is None:
+            return
+        run.status = status
+        run.finished_at = time.time()
+        run.current_tool = None
+        run.handle = None
+        self._finished.append(run)
+    
+    async def _execute(self, run: SubagentRun) -> str:
+        """Run the subagent's tool loop and return its final response."""
+        messages: list[dict[str, Any]] = [
+            {"role": "system", "content": self._build_subagent_prompt()},
+            {"role": "user", "content": run.task},
+        ]
+        
+        # Run agent loop (limited iterations)
+        while run.iterations < self.max_iterations:
+            run.iterations += 1
             
-            while iteration < max_iterations:
-                iteration += 1
-                
-                response = await self.provider.chat(
-                    messages=messages,
-                    tools=tools.get_definitions(),
-                    model=self.model,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                )
-                
-                if response.has_tool_calls:
-                    # Add assistant message with tool calls
-                    tool_call_dicts = [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.name,
-                                "arguments": json.dumps(tc.arguments),
-                            },
-                        }
-                        for tc in response.tool_calls
-                    ]
-                    messages.append({
-                        "role": "assistant",
-                        "content": response.content or "",
-                        "tool_calls": tool_call_dicts,
-                    })
-                    
-                    # Execute tools
-                    for tool_call in response.tool_calls:
-                        args_str = json.dumps(tool_call.arguments)
-                        logger.debug(f"Subagent [{task_id}] executing: {tool_call.name} with arguments: {args_str}")
-                        result = await tools.execute(tool_call.name, tool_call.arguments)
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": tool_call.name,
-                            "content": result,
-                        })
-                else:
-                    final_result = response.content
-                    break
+            response = await self.provider.chat(
+                messages=messages,
+                tools=self.tools.get_definitions(),
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+            )
+            for k, v in response.usage.items():
+                run.usage[k] = run.usage.get(k, 0) + v
             
-            if final_result is None:
-                final_result = "Task completed but no final response was generated."
+            if not response.has_tool_calls:
+                return response.content or "Task completed but no final response was generated."
             
-            logger.info(f"Subagent [{task_id}] completed successfully")
-            await self._announce_result(task_id, label, task, final_result, origin, "ok")
+            # Add assistant message with tool calls
+            tool_call_dicts = [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {
+                        "name": tc.name,
+                        "arguments": json.dumps(tc.arguments),
+                    },
+                }
+                for tc in response.tool_calls
+            ]
+            messages.append({
+                "role": "assistant",
+                "content": response.content or "",
+                "tool_calls": tool_call_dicts,
+            })
             
-        except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            logger.error(f"Subagent [{task_id}] failed: {e}")
-            await self._announce_result(task_id, label, task, error_msg, origin, "error")
+            # Execute tools
+            for tool_call in response.tool_calls:
+                args_str = json.dumps(tool_call.arguments)
+                logger.debug(f"Subagent [{run.id}] executing: {tool_call.name} with arguments: {args_str}")
+                run.current_tool = tool_call.name
+                run.tool_calls += 1
+                result = await self.tools.execute(tool_call.name, tool_call.arguments)
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "name": tool_call.name,
+                    "content": result,
+                })
+            run.current_tool = None
+        
+        return "Task completed but no final response was generated."
     
-    async def _announce_result(
-        self,
-        task_id: str,
-        label: str,
-        task: str,
-        result: str,
-        origin: dict[str, str],
-        status: str,
-    ) -> None:
+    async def _announce_result(self, run: SubagentRun, result: str) -> None:
         """Announce the subagent result to the main agent via the message bus."""
-        status_text = "completed successfully" if status == "ok" else "failed"
+        status_text = {"ok": "completed successfully", "cancelled": "was cancelled"}.get(run.status, "failed")
         
-        announce_content = f"""[Subagent '{label}' {status_text}]
+        announce_content = f"""[Subagent '{run.label}' {status_text}]
 
-Task: {task}
+Task: {run.task}
 
 Result:
 {result}
@@ -208,50 +337,19 @@ Summarize this naturally for the user. Keep it brief (1-2 sentences). Do not men
         msg = InboundMessage(
             channel="system",
             sender_id="subagent",
-            chat_id=f"{origin['channel']}:{origin['chat_id']}",
+            chat_id=run.origin_key,
             content=announce_content,
         )
         
         await self.bus.publish_inbound(msg)
-        logger.debug(f"Subagent [{task_id}] announced result to {origin['channel']}:{origin['chat_id']}")
+        logger.debug(f"Subagent [{run.id}] announced result to {run.origin_key}")
     
-    def _build_subagent_prompt(self, task: str) -> str:
+    def _build_subagent_prompt(self) -> str:
         """Build a focused system prompt for the subagent."""
-        from datetime import datetime
-        import time as _time
         now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
-        tz = _time.strftime("%Z") or "UTC"
-
-        return f"""# Subagent
-
-## Current Time
-{now} ({tz})
-
-You are a subagent spawned by the main agent to complete a specific task.
-
-## Rules
-1. Stay focused - complete only the assigned task, nothing else
-2. Your final response will be reported back to the main agent
-3. Do not initiate conversations or take on side tasks
-4. Be concise but informative in your findings
-
-## What You Can Do
-- Read and write files in the workspace
-- Execute shell commands
-- Search the web and fetch web pages
-- Complete the task thoroughly
-
-## What You Cannot Do
-- Send messages directly to users (no message tool available)
-- Spawn other subagents
-- Access the main agent's conversation history
-
-## Workspace
-Your workspace is at: {self.workspace}
-Skills are available at: {self.workspace}/skills/ (read SKILL.md files as needed)
-
-When you have completed the task, provide a clear summary of your findings or actions."""
+        tz = time.strftime("%Z") or "UTC"
+        return f"# Subagent\n\n## Current Time\n{now} ({tz})\n\n{self._prompt_body}"
     
     def get_running_count(self) -> int:
-        """Return the number of currently running subagents."""
-        return len(self._running_tasks)
+        """Return the number of currently queued or running subagents."""
+        return len(self._runs)
@@ -1,8 +1,17 @@
 """Base class for agent tools."""
 
 from abc import ABC, abstractmethod
+from contextvars import ContextVar
 from typing import Any
 
+from nanobot.agent.tools.validation import compile_schema
+
+# Session key of the turn a tool call belongs to; set by the agent loop so
+# shared tool instances can keep per-session state (e.g. persistent shells)
+current_session_key: ContextVar[str | None] = ContextVar("current_session_key", default=None)
+# (channel, chat_id) that replies and notifications for the current turn go to
+current_origin: ContextVar[tuple[str, str] | None] = ContextVar("current_origin", default=None)
+
 
 class Tool(ABC):
     """
@@ -12,14 +21,8 @@ class Tool(ABC):
     the environment, such as reading files, executing commands, etc.
     """
     
-    _TYPE_MAP = {
-        "string": str,
-        "integer": int,
-        "number": (int, float),
-        "boolean": bool,
-        "array": list,
-        "object": dict,
-    }
+    # Convert numeric/boolean strings (e.g. "5" -> 5) before validating; opt-in per tool
+    coerce_params: bool = False
     
     @property
     @abstractmethod
@@ -54,41 +57,22 @@ class Tool(ABC):
 
     def validate_params(self, params: dict[str, Any]) -> list[str]:
         """Validate tool parameters against JSON schema. Returns error list (empty if valid)."""
-        schema = self.parameters or {}
-        if schema.get("type", "object") != "object":
-            raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
-        return self._validate(params, {**schema, "type": "object"}, "")
-
-    def _validate(self, val: Any, schema: dict[str, Any], path: str) -> list[str]:
-        t, label = schema.get("type"), path or "parameter"
-        if t in self._TYPE_MAP and not isinstance(val, self._TYPE_MAP[t]):
-            return [f"{label} should be {t}"]
+        return self.prepare_params(params)[1]
+    
+    def prepare_params(self, params: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+        """
+        Coerce (if enabled) and validate parameters.
+        
+        The schema is compiled on first use and cached on the instance, so
+        `parameters` is assumed not to change afterwards.
         
-        errors = []
-        if "enum" in schema and val not in schema["enum"]:
-            errors.append(f"{label} must be one of {schema['enum']}")
-        if t in ("integer", "number"):
-            if "minimum" in schema and val < schema["minimum"]:
-                errors.append(f"{label} must be >= {schema['minimum']}")
-            if "maximum" in schema and val > schema["maximum"]:
-                errors.append(f"{label} must be <= {schema['maximum']}")
-        if t == "string":
-            if "minLength" in schema and len(val) < schema["minLength"]:
-                errors.append(f"{label} must be at least {schema['minLength']} chars")
-            if "maxLength" in schema and len(val) > schema["maxLength"]:
-                errors.append(f"{label} must be at most {schema['maxLength']} chars")
-        if t == "object":
-            props = schema.get("properties", {})
-            for k in schema.get("required", []):
-                if k not in val:
-                    errors.append(f"missing required {path + '.' + k if path else k}")
-            for k, v in val.items():
-                if k in props:
-                    errors.extend(self._validate(v, props[k], path + '.' + k if path else k))
-        if t == "array" and "items" in schema:
-            for i, item in enumerate(val):
-                errors.extend(self._validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
-        return errors
+        Returns:
+            The parameters to execute with, and the validation errors.
+        """
+        validator = self.__dict__.get("_validator")
+        if validator is None:
+            validator = self.__dict__["_validator"] = compile_schema(self.parameters or {}, self.coerce_params)
+        return validator(params)
     
     def to_schema(self) -> dict[str, Any]:
         """Convert tool to OpenAI function schema format."""
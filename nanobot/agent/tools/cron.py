@@ -1,6 +1,6 @@
 """Cron tool for scheduling reminders and tasks."""
 
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from nanobot.agent.tools.base import Tool
 from nanobot.cron.service import CronService
@@ -10,7 +10,9 @@ from nanobot.cron.types import CronSchedule
 class CronTool(Tool):
     """Tool to schedule reminders and recurring tasks."""
     
-    def __init__(self, cron_service: CronService):
+    coerce_params = True
+    
+    def __init__(self, cron_service: CronService | None):
         self._cron = cron_service
         self._channel = ""
         self._chat_id = ""
@@ -50,6 +52,10 @@ class CronTool(Tool):
                     "type": "string",
                     "description": "Cron expression like '0 9 * * *' (for scheduled tasks)"
                 },
+                "tz": {
+                    "type": "string",
+                    "description": "IANA timezone for cron_expr, e.g. 'America/New_York' (default: server local time)"
+                },
                 "at": {
                     "type": "string",
                     "description": "ISO datetime for one-time execution (e.g. '2026-02-12T10:30:00')"
@@ -70,17 +76,25 @@ class CronTool(Tool):
         cron_expr: str | None = None,
         at: str | None = None,
         job_id: str | None = None,
+        tz: str | None = None,
         **kwargs: Any
     ) -> str:
         if action == "add":
-            return self._add_job(message, every_seconds, cron_expr, at)
+            return self._add_job(message, every_seconds, cron_expr, at, tz)
         elif action == "list":
             return self._list_jobs()
         elif action == "remove":
             return self._remove_job(job_id)
         return f"Unknown action: {action}"
     
-    def _add_job(self, message: str, every_seconds: int | None, cron_expr: str | None, at: str | None) -> str:
+    def _add_job(
+        self,
+        message: str,
+        every_seconds: int | None,
+        cron_expr: str | None,
+        at: str | None,
+        tz: str | None = None,
+    ) -> str:
         if not message:
             return "Error: message is required for add"
         if not self._channel or not self._chat_id:
@@ -91,7 +105,7 @@ class CronTool(Tool):
         if every_seconds:
             schedule = CronSchedule(kind="every", every_ms=every_seconds * 1000)
         elif cron_expr:
-            schedule = CronSchedule(kind="cron", expr=cron_expr)
+            schedule = CronSchedule(kind="cron", expr=cron_expr, tz=tz)
         elif at:
             from datetime import datetime
             dt = datetime.fromisoformat(at)
@@ -101,15 +115,18 @@ class CronTool(Tool):
         else:
             return "Error: either every_seconds, cron_expr, or at is required"
         
-        job = self._cron.add_job(
-            name=message[:30],
-            schedule=schedule,
-            message=message,
-            deliver=True,
-            channel=self._channel,
-            to=self._chat_id,
-            delete_after_run=delete_after,
-        )
+        try:
+            job = self._cron.add_job(
+                name=message[:30],
+                schedule=schedule,
+                message=message,
+                deliver=True,
+                channel=self._channel,
+                to=self._chat_id,
+                delete_after_run=delete_after,
+            )
+        except ValueError as e:
+            return f"Error: {e}"
         return f"Created job '{job.name}' (id: {job.id})"
     
     def _list_jobs(self) -> str:
@@ -125,3 +142,29 @@ class CronTool(Tool):
         if self._cron.remove_job(job_id):
             return f"Removed job {job_id}"
         return f"Job {job_id} not found"
+
+
+class RemoteCronTool(CronTool):
+    """
+    Cron tool for a process that doesn't own the cron service.
+
+    Calls are forwarded, with the session context, to the process that
+    does (in a multi-worker gateway, worker 0 over the IPC bus).
+    """
+
+    def __init__(self, forward: Callable[[str, dict[str, Any], str, str], Awaitable[str]]):
+        super().__init__(None)
+        self._forward = forward
+
+    async def execute(self, action: str, **kwargs: Any) -> str:
+        return await self._forward(self.name, {"action": action, **kwargs}, self._channel, self._chat_id)
+
+
+async def serve_cron_call(cron_service: CronService, params: dict[str, Any], channel: str, chat_id: str) -> str:
+    """Run a forwarded cron call against the local service in the caller's session context."""
+    tool = CronTool(cron_service)
+    tool.set_context(channel, chat_id)
+    params, errors = tool.prepare_params(params)
+    if errors:
+        return "Error: Invalid parameters for tool 'cron': " + "; ".join(errors)
+    return await tool.execute(**params)
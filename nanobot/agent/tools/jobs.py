@@ -0,0 +1,261 @@
+"""Background shell jobs: detached commands with spooled output."""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.agent.tools.base import Tool, current_origin, current_session_key
+from nanobot.agent.tools.shell_session import kill_process_group
+from nanobot.bus.events import InboundMessage
+
+
+@dataclass
+class Job:
+    """A background command and where its output goes."""
+    id: str
+    command: str
+    cwd: str
+    log_path: Path
+    session_key: str
+    origin: tuple[str, str] | None = None
+    status: str = "running"  # running, done, failed, killed, timeout
+    exit_code: int | None = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    process: asyncio.subprocess.Process | None = field(default=None, repr=False)
+
+    def summary(self) -> str:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        line = f"[{self.id}] {self.status}, {elapsed:.0f}s"
+        if self.exit_code is not None:
+            line += f", exit code {self.exit_code}"
+        size = self.log_path.stat().st_size if self.log_path.exists() else 0
+        return f"{line}, {size} bytes of output: {self.command[:80]}"
+
+
+class JobManager:
+    """
+    Runs shell commands detached from the agent turn.
+
+    Output (stdout and stderr combined) is spooled to a file per job, so a
+    job can run for hours and print any amount without holding memory or
+    pinning a turn. When a job ends, the chat that started it is notified
+    with a system message on the bus, like a finished subagent.
+    """
+
+    def __init__(
+        self,
+        spool_dir: Path,
+        bus_publish: Callable[[InboundMessage], Awaitable[Any]] | None = None,
+        max_running: int = 4,
+        timeout: int = 3600,
+        keep_finished: int = 50,
+    ):
+        self.spool_dir = spool_dir
+        self.bus_publish = bus_publish
+        self.max_running = max_running
+        self.timeout = timeout
+        self.keep_finished = keep_finished
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    @property
+    def running(self) -> list[Job]:
+        return [j for j in self._jobs.values() if j.status == "running"]
+
+    def get(
+        self, job_id: str, session_key: str | None = None, origin: tuple[str, str] | None = None
+    ) -> Job | None:
+        """Look up a job, optionally only among those visible to a session; see `visible`."""
+        job = self._jobs.get(job_id)
+        if job is None or (session_key is not None and not self.visible(job, session_key, origin)):
+            return None
+        return job
+
+    def list(self, session_key: str | None = None, origin: tuple[str, str] | None = None) -> list[Job]:
+        return [j for j in self._jobs.values() if session_key is None or self.visible(j, session_key, origin)]
+
+    @staticmethod
+    def visible(job: Job, session_key: str, origin: tuple[str, str] | None = None) -> bool:
+        """
+        Whether a session may see a job: it started it, or the job reports to its chat.
+
+        The second case covers jobs started by a subagent, which run under the
+        subagent's own session key but are announced to the chat that spawned it.
+        """
+        return job.session_key == session_key or (origin is not None and job.origin == origin)
+
+    async def start(self, command: str, cwd: str, session_key: str, origin: tuple[str, str] | None = None) -> Job:
+        """Start a detached job. Raises RuntimeError when too many are running."""
+        if len(self.running) >= self.max_running:
+            raise RuntimeError(f"{self.max_running} background jobs are already running")
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        job_id = uuid.uuid4().hex[:8]
+        job = Job(id=job_id, command=command, cwd=cwd, log_path=self.spool_dir / f"{job_id}.log",
+                  session_key=session_key, origin=origin)
+        with open(job.log_path, "wb") as log:
+            job.process = await asyncio.create_subprocess_shell(
+                command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=log,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=cwd,
+                start_new_session=True,
+            )
+        self._jobs[job_id] = job
+        self._prune()
+        asyncio.create_task(self._watch(job))
+        logger.info(f"Background job [{job_id}] started: {command[:80]}")
+        return job
+
+    async def kill(self, job: Job) -> bool:
+        if job.status != "running" or job.process is None:
+            return False
+        job.status = "killed"
+        await kill_process_group(job.process)
+        return True
+
+    def read(self, job: Job, offset: int | None = None, max_bytes: int = 10000) -> tuple[str, int]:
+        """
+        Read spooled output: from `offset` if given, else the last max_bytes.
+
+        Returns the text and the offset to continue from.
+        """
+        try:
+            with open(job.log_path, "rb") as f:
+                size = f.seek(0, 2)
+                start = max(0, size - max_bytes) if offset is None else min(offset, size)
+                f.seek(start)
+                data = f.read(max_bytes)
+        except FileNotFoundError:
+            return "", 0
+        return data.decode("utf-8", errors="replace"), start + len(data)
+
+    async def _watch(self, job: Job) -> None:
+        try:
+            await asyncio.wait_for(job.process.wait(), timeout=self.timeout or None)
+        except asyncio.TimeoutError:
+            job.status = "timeout"
+            await kill_process_group(job.process)
+        job.exit_code = job.process.returncode
+        job.finished_at = time.time()
+        if job.status == "running":
+            job.status = "done" if job.exit_code == 0 else "failed"
+        job.process = None
+        logger.info(f"Background job {job.summary()}")
+        if job.status != "killed":
+            await self._notify(job)
+
+    async def _notify(self, job: Job) -> None:
+        if self.bus_publish is None or job.origin is None:
+            return
+        tail, _ = self.read(job, max_bytes=2000)
+        content = (
+            f"[Background job {job.id} {job.status}]\n\n"
+            f"Command: {job.command}\n"
+            f"{job.summary()}\n\n"
+            f"Last output:\n{tail or '(no output)'}\n\n"
+            "Tell the user the outcome briefly. Use job_output for more of the log if needed."
+        )
+        channel, chat_id = job.origin
+        try:
+            await self.bus_publish(InboundMessage(
+                channel="system", sender_id="exec", chat_id=f"{channel}:{chat_id}", content=content,
+            ))
+        except Exception as e:
+            logger.warning(f"Could not announce background job {job.id}: {e}")
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.status != "running"]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+            job.log_path.unlink(missing_ok=True)
+
+    async def close(self) -> None:
+        """Kill all running jobs."""
+        for job in self.running:
+            await self.kill(job)
+
+
+class _JobTool(Tool):
+    """Base for the job tools: a session sees the jobs it started and those announced to its chat."""
+
+    def __init__(self, jobs: JobManager):
+        self._jobs = jobs
+
+    def _lookup(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id, current_session_key.get() or "default", current_origin.get())
+
+
+class JobStatusTool(_JobTool):
+    """Tool to check background jobs."""
+
+    name = "job_status"
+    description = "Show the status of a background exec job, or list this conversation's jobs."
+    parameters = {
+        "type": "object",
+        "properties": {
+            "job_id": {"type": "string", "description": "Job id (omit to list all jobs)"},
+        },
+    }
+
+    async def execute(self, job_id: str | None = None, **kwargs: Any) -> str:
+        if job_id:
+            job = self._lookup(job_id)
+            return job.summary() if job else f"Error: no job {job_id} in this conversation"
+        jobs = self._jobs.list(current_session_key.get() or "default", current_origin.get())
+        return "\n".join(j.summary() for j in jobs) or "No background jobs."
+
+
+class JobOutputTool(_JobTool):
+    """Tool to read a background job's spooled output."""
+
+    name = "job_output"
+    description = (
+        "Read a background exec job's output (stdout and stderr combined). "
+        "Without offset returns the latest output; pass the returned offset to continue reading."
+    )
+    parameters = {
+        "type": "object",
+        "properties": {
+            "job_id": {"type": "string", "description": "Job id"},
+            "offset": {"type": "integer", "minimum": 0, "description": "Byte offset to read from"},
+            "max_bytes": {"type": "integer", "minimum": 100, "maximum": 50000, "description": "Bytes to read (default 10000)"},
+        },
+        "required": ["job_id"],
+    }
+    coerce_params = True
+
+    async def execute(self, job_id: str, offset: int | None = None, max_bytes: int = 10000, **kwargs: Any) -> str:
+        job = self._lookup(job_id)
+        if job is None:
+            return f"Error: no job {job_id} in this conversation"
+        text, next_offset = self._jobs.read(job, offset, max_bytes)
+        return f"{job.summary()}\n[next offset: {next_offset}]\n{text or '(no output yet)'}"
+
+
+class JobKillTool(_JobTool):
+    """Tool to stop a background job."""
+
+    name = "job_kill"
+    description = "Kill a running background exec job and everything it started."
+    parameters = {
+        "type": "object",
+        "properties": {
+            "job_id": {"type": "string", "description": "Job id"},
+        },
+        "required": ["job_id"],
+    }
+
+    async def execute(self, job_id: str, **kwargs: Any) -> str:
+        job = self._lookup(job_id)
+        if job is None:
+            return f"Error: no job {job_id} in this conversation"
+        if not await self._jobs.kill(job):
+            return f"Job {job_id} is not running ({job.status})"
+        return f"Killed job {job_id}"
@@ -1,10 +1,32 @@
 """Tool registry for dynamic tool management."""
 
-from typing import Any
+import json
+from typing import Any, Iterable
 
 from nanobot.agent.tools.base import Tool
 
 
+class ToolDefinitions(tuple):
+    """
+    Tool definitions in OpenAI format, with their JSON encoding precomputed.
+    
+    Shared by every LLM call until the registry changes, so it is a tuple.
+    Providers that build request bodies themselves can splice `encoded` in
+    instead of re-serializing the schemas. `schemas` is a separate list copy,
+    also built once, for clients that want a list and may edit it in place
+    (LiteLLM); their edits never reach the tuple or `encoded`.
+    """
+    
+    encoded: str
+    schemas: list[dict[str, Any]]
+    
+    def __new__(cls, definitions: Iterable[dict[str, Any]] = ()) -> "ToolDefinitions":
+        self = super().__new__(cls, definitions)
+        self.encoded = json.dumps(self, ensure_ascii=False, separators=(",", ":"))
+        self.schemas = json.loads(self.encoded)
+        return self
+
+
 class ToolRegistry:
     """
     Registry for agent tools.
@@ -12,16 +34,30 @@ class ToolRegistry:
     Allows dynamic registration and execution of tools.
     """
     
-    def __init__(self):
+    def __init__(self, tools: Iterable[Tool] = ()):
         self._tools: dict[str, Tool] = {}
+        self._definitions: ToolDefinitions | None = None
+        for tool in tools:
+            self.register(tool)
+    
+    def with_tools(self, *tools: Tool) -> "ToolRegistry":
+        """
+        A new registry with this registry's tools plus `tools`.
+        
+        Tool instances are shared, not copied, so a base set of stateless
+        tools can be built once and reused by many registries.
+        """
+        return ToolRegistry([*self._tools.values(), *tools])
     
     def register(self, tool: Tool) -> None:
         """Register a tool."""
         self._tools[tool.name] = tool
+        self._definitions = None
     
     def unregister(self, name: str) -> None:
         """Unregister a tool by name."""
-        self._tools.pop(name, None)
+        if self._tools.pop(name, None) is not None:
+            self._definitions = None
     
     def get(self, name: str) -> Tool | None:
         """Get a tool by name."""
@@ -31,9 +67,17 @@ class ToolRegistry:
         """Check if a tool is registered."""
         return name in self._tools
     
-    def get_definitions(self) -> list[dict[str, Any]]:
-        """Get all tool definitions in OpenAI format."""
-        return [tool.to_schema() for tool in self._tools.values()]
+    def get_definitions(self) -> ToolDefinitions:
+        """
+        Get all tool definitions in OpenAI format.
+        
+        Built once and cached until a tool is registered or unregistered, in
+        registration order, so repeated requests carry byte-identical tool
+        blocks (which also keeps provider-side prompt caches warm).
+        """
+        if self._definitions is None:
+            self._definitions = ToolDefinitions(tool.to_schema() for tool in self._tools.values())
+        return self._definitions
     
     async def execute(self, name: str, params: dict[str, Any]) -> str:
         """
@@ -54,7 +98,7 @@ class ToolRegistry:
             return f"Error: Tool '{name}' not found"
 
         try:
-            errors = tool.validate_params(params)
+            params, errors = tool.prepare_params(params)
             if errors:
                 return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
             return await tool.execute(**params)
@@ -3,15 +3,61 @@
 import asyncio
 import os
 import re
+import shlex
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.base import Tool, current_origin, current_session_key
+from nanobot.agent.tools.shell_session import (
+    OutputBuffer,
+    ShellSessionPool,
+    kill_process_group,
+    pump,
+)
+
+if TYPE_CHECKING:
+    from nanobot.agent.tools.jobs import JobManager
+
+_WIN_PATH = re.compile(r"[A-Za-z]:\\[^\\\"']+")
+# Only match absolute paths — avoid false positives on relative
+# paths like ".venv/bin/python" where "/bin/python" would be
+# incorrectly extracted by the old pattern.
+_POSIX_PATH = re.compile(r"(?:^|[\s|>])(/[^\s\"'>]+)")
+
+
+def _combine(patterns: list[str]) -> "re.Pattern[str] | list[re.Pattern[str]]":
+    """One alternation for a pattern list, or the compiled list if they cannot be combined."""
+    try:
+        return re.compile("|".join(f"(?:{p})" for p in patterns))
+    except re.error:  # e.g. numbered backreferences or inline flags
+        return [re.compile(p) for p in patterns]
+
+
+def _matches(compiled: "re.Pattern[str] | list[re.Pattern[str]]", text: str) -> bool:
+    if isinstance(compiled, list):
+        return any(p.search(text) for p in compiled)
+    return compiled.search(text) is not None
+
+
+def _outside_dir(raw: str, cwd_path: Path) -> bool:
+    """
+    Whether a path found in a command resolves outside cwd_path (already resolved).
+
+    Not cached: resolution follows symlinks, which can be created or
+    retargeted between calls.
+    """
+    try:
+        p = Path(raw.strip()).resolve()
+    except Exception:
+        return False
+    return p.is_absolute() and cwd_path not in p.parents and p != cwd_path
 
 
 class ExecTool(Tool):
     """Tool to execute shell commands."""
     
+    coerce_params = True
+    
     def __init__(
         self,
         timeout: int = 60,
@@ -19,8 +65,14 @@ class ExecTool(Tool):
         deny_patterns: list[str] | None = None,
         allow_patterns: list[str] | None = None,
         restrict_to_workspace: bool = False,
+        persistent: bool = False,
+        idle_timeout: int = 300,
+        max_output: int = 10000,
+        jobs: "JobManager | None" = None,
     ):
         self.timeout = timeout
+        self.jobs = jobs
+        self.max_output = max_output
         self.working_dir = working_dir
         self.deny_patterns = deny_patterns or [
             r"\brm\s+-[rf]{1,2}\b",          # rm -r, rm -rf, rm -fr
@@ -33,7 +85,20 @@ class ExecTool(Tool):
             r":\(\)\s*\{.*\};\s*:",          # fork bomb
         ]
         self.allow_patterns = allow_patterns or []
+        # Compiled once into single alternations; the guard runs on every exec call
+        self._deny = _combine(self.deny_patterns)
+        self._allow = _combine(self.allow_patterns) if self.allow_patterns else None
         self.restrict_to_workspace = restrict_to_workspace
+        # One long-lived shell per conversation session, so cd/env/venv persist
+        self.shells = (
+            ShellSessionPool(
+                working_dir or os.getcwd(),
+                idle_timeout=idle_timeout,
+                max_output=max_output,
+                jail=restrict_to_workspace,
+            )
+            if persistent else None
+        )
     
     @property
     def name(self) -> str:
@@ -55,12 +120,26 @@ class ExecTool(Tool):
                 "working_dir": {
                     "type": "string",
                     "description": "Optional working directory for the command"
-                }
+                },
+                **({"background": {
+                    "type": "boolean",
+                    "description": (
+                        "Run detached for long commands (builds, downloads, servers); returns a job id "
+                        "at once. Check with job_status/job_output; you are notified when it finishes."
+                    ),
+                }} if self.jobs else {}),
             },
             "required": ["command"]
         }
     
-    async def execute(self, command: str, working_dir: str | None = None, **kwargs: Any) -> str:
+    async def execute(
+        self, command: str, working_dir: str | None = None, background: bool = False, **kwargs: Any
+    ) -> str:
+        if background and self.jobs is not None:
+            return await self._execute_background(command, working_dir)
+        if self.shells is not None:
+            return await self._execute_persistent(command, working_dir)
+        
         cwd = working_dir or self.working_dir or os.getcwd()
         guard_error = self._guard_command(command, cwd)
         if guard_error:
@@ -72,73 +151,118 @@ class ExecTool(Tool):
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=cwd,
+                start_new_session=True,  # Own process group, so a timeout kills its children too
             )
             
+            # Stream into bounded head+tail buffers instead of communicate()
+            stdout = OutputBuffer(self.max_output // 2, self.max_output // 2)
+            stderr = OutputBuffer(self.max_output // 2, self.max_output // 2)
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
+                await asyncio.wait_for(
+                    asyncio.gather(pump(process.stdout, stdout), pump(process.stderr, stderr), process.wait()),
                     timeout=self.timeout
                 )
             except asyncio.TimeoutError:
-                process.kill()
-                return f"Error: Command timed out after {self.timeout} seconds"
-            
-            output_parts = []
-            
-            if stdout:
-                output_parts.append(stdout.decode("utf-8", errors="replace"))
-            
-            if stderr:
-                stderr_text = stderr.decode("utf-8", errors="replace")
-                if stderr_text.strip():
-                    output_parts.append(f"STDERR:\n{stderr_text}")
-            
-            if process.returncode != 0:
-                output_parts.append(f"\nExit code: {process.returncode}")
-            
-            result = "\n".join(output_parts) if output_parts else "(no output)"
-            
-            # Truncate very long output
-            max_len = 10000
-            if len(result) > max_len:
-                result = result[:max_len] + f"\n... (truncated, {len(result) - max_len} more chars)"
+                await kill_process_group(process)
+                partial = self._format_output(stdout, stderr, None)
+                return f"Error: Command timed out after {self.timeout} seconds\n{partial}"
             
-            return result
+            return self._format_output(stdout, stderr, process.returncode)
             
         except Exception as e:
             return f"Error executing command: {str(e)}"
 
+    async def _execute_background(self, command: str, working_dir: str | None) -> str:
+        """Start the command as a background job and return its id."""
+        session_key = current_session_key.get() or "default"
+        cwd = working_dir
+        if cwd is None:
+            session = self.shells.get(session_key) if self.shells is not None else None
+            cwd = session.cwd if session else (self.working_dir or os.getcwd())
+        guard_error = self._guard_command(command, cwd)
+        if guard_error:
+            return guard_error
+        try:
+            job = await self.jobs.start(command, cwd, session_key, current_origin.get())
+        except Exception as e:
+            return f"Error: could not start background job: {e}"
+        return f"Started background job {job.id}. Output is spooled; use job_status/job_output (job_id={job.id})."
+    
+    async def _execute_persistent(self, command: str, working_dir: str | None) -> str:
+        """Run the command in the calling session's persistent shell."""
+        session = self.shells.get(current_session_key.get() or "default")
+        async with session.lock:
+            guard_error = self._guard_command(command, working_dir or session.cwd)
+            if guard_error:
+                return guard_error
+            if working_dir:
+                # Per call, as in one-shot mode: a subshell leaves the session's cwd alone
+                command = f"(cd {shlex.quote(working_dir)} && eval {shlex.quote(command)})"
+            
+            try:
+                result = await session.run(command, self.timeout)
+            except Exception as e:
+                await session.close()
+                return f"Error executing command: {str(e)}"
+            
+            note = ""
+            if self.restrict_to_workspace and not result.timed_out and not self._inside_workdir(result.cwd):
+                await session.run(f"cd {shlex.quote(self.shells.cwd)}", self.timeout)
+                note = f"\nNote: working directory reset to {self.shells.cwd} (outside the workspace)"
+        
+        if result.timed_out:
+            partial = self._format_output(result.stdout, result.stderr, None)
+            return f"Error: Command timed out after {self.timeout} seconds (shell session restarted)\n{partial}"
+        return self._format_output(result.stdout, result.stderr, result.exit_code) + note
+    
+    def _inside_workdir(self, path: str) -> bool:
+        root = Path(self.shells.cwd).resolve()
+        p = Path(path).resolve()
+        return p == root or root in p.parents
+    
+    @staticmethod
+    def _format_output(stdout: OutputBuffer, stderr: OutputBuffer, exit_code: int | None) -> str:
+        # Each buffer keeps its stream's head and tail, noting how many bytes were omitted
+        output_parts = []
+        
+        if stdout.total:
+            output_parts.append(stdout.text())
+        
+        stderr_text = stderr.text()
+        if stderr_text.strip():
+            output_parts.append(f"STDERR:\n{stderr_text}")
+        
+        if exit_code:
+            output_parts.append(f"\nExit code: {exit_code}")
+        
+        return "\n".join(output_parts) if output_parts else "(no output)"
+    
+    async def aclose(self) -> None:
+        """Close any persistent shells and kill background jobs."""
+        if self.shells is not None:
+            await self.shells.close()
+        if self.jobs is not None:
+            await self.jobs.close()
+
     def _guard_command(self, command: str, cwd: str) -> str | None:
         """Best-effort safety guard for potentially destructive commands."""
         cmd = command.strip()
         lower = cmd.lower()
 
-        for pattern in self.deny_patterns:
-            if re.search(pattern, lower):
-                return "Error: Command blocked by safety guard (dangerous pattern detected)"
+        if _matches(self._deny, lower):
+            return "Error: Command blocked by safety guard (dangerous pattern detected)"
 
-        if self.allow_patterns:
-            if not any(re.search(p, lower) for p in self.allow_patterns):
-                return "Error: Command blocked by safety guard (not in allowlist)"
+        if self._allow is not None and not _matches(self._allow, lower):
+            return "Error: Command blocked by safety guard (not in allowlist)"
 
         if self.restrict_to_workspace:
             if "..\\" in cmd or "../" in cmd:
                 return "Error: Command blocked by safety guard (path traversal detected)"
 
-            cwd_path = Path(cwd).resolve()
-
-            win_paths = re.findall(r"[A-Za-z]:\\[^\\\"']+", cmd)
-            # Only match absolute paths — avoid false positives on relative
-            # paths like ".venv/bin/python" where "/bin/python" would be
-            # incorrectly extracted by the old pattern.
-            posix_paths = re.findall(r"(?:^|[\s|>])(/[^\s\"'>]+)", cmd)
-
-            for raw in win_paths + posix_paths:
-                try:
-                    p = Path(raw.strip()).resolve()
-                except Exception:
-                    continue
-                if p.is_absolute() and cwd_path not in p.parents and p != cwd_path:
-                    return "Error: Command blocked by safety guard (path outside working dir)"
+            if "/" in cmd or ":\\" in cmd:
+                cwd_path = Path(cwd).resolve()
+                for raw in _WIN_PATH.findall(cmd) + _POSIX_PATH.findall(cmd):
+                    if _outside_dir(raw, cwd_path):
+                        return "Error: Command blocked by safety guard (path outside working dir)"
 
         return None
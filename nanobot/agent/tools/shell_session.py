@@ -0,0 +1,313 @@
+"""Process output capture and persistent shell sessions for the exec tool."""
+
+import asyncio
+import os
+import secrets
+import shlex
+import shutil
+import signal
+import time
+from dataclasses import dataclass
+
+from loguru import logger
+
+
+class OutputBuffer:
+    """
+    Bounded capture of a process stream: the first `head` and last `tail` bytes.
+
+    Everything in between is counted but dropped, so a command printing
+    gigabytes costs at most head + tail bytes of memory.
+    """
+
+    def __init__(self, head: int = 5000, tail: int = 5000):
+        self.head_limit = head
+        self.tail_limit = tail
+        self.total = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_limit - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if data and self.tail_limit:
+            self._tail += data[-self.tail_limit:]
+            if len(self._tail) > self.tail_limit:
+                del self._tail[:len(self._tail) - self.tail_limit]
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self._head) - len(self._tail)
+
+    def text(self) -> str:
+        head = bytes(self._head).decode("utf-8", errors="replace")
+        tail = bytes(self._tail).decode("utf-8", errors="replace")
+        if self.dropped:
+            return f"{head}\n... ({self.dropped} bytes omitted, {self.total} total) ...\n{tail}"
+        return head + tail
+
+
+async def pump(stream: asyncio.StreamReader, buf: OutputBuffer) -> None:
+    """Copy a stream into a buffer until EOF."""
+    while chunk := await stream.read(65536):
+        buf.write(chunk)
+
+
+async def kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """Kill a process started with start_new_session=True and everything it spawned."""
+    if process.returncode is None:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            process.kill()
+    await process.wait()
+
+
+@dataclass
+class ShellResult:
+    """Outcome of one command in a shell session."""
+    stdout: OutputBuffer
+    stderr: OutputBuffer
+    exit_code: int | None  # None if the command timed out
+    cwd: str
+    timed_out: bool = False
+
+
+_bwrap_ok: bool | None = None
+
+
+async def bwrap_available() -> bool:
+    """Whether bubblewrap is installed and can create sandboxes here (checked once)."""
+    global _bwrap_ok
+    if _bwrap_ok is None:
+        _bwrap_ok = False
+        if shutil.which("bwrap"):
+            try:
+                probe = await asyncio.create_subprocess_exec(
+                    *bwrap_argv(os.getcwd(), os.getcwd()), "true",
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+                _bwrap_ok = await probe.wait() == 0
+            except OSError:
+                pass
+        if not _bwrap_ok:
+            logger.warning(
+                "bubblewrap unavailable: workspace-restricted shells only get HOME set to the "
+                "workspace and the command guard, which a determined command can get around"
+            )
+    return _bwrap_ok
+
+
+def bwrap_argv(root: str, cwd: str) -> list[str]:
+    """
+    Command prefix that runs a program under bubblewrap, confined to root.
+
+    The filesystem is mounted read-only, the user's real home directory
+    (SSH keys, ~/.nanobot with API keys) and /tmp are replaced by empty
+    tmpfs mounts, and only root is bound back writable.
+    """
+    home = os.path.expanduser("~")
+    argv = ["bwrap", "--ro-bind", "/", "/", "--dev", "/dev", "--tmpfs", "/tmp"]
+    if home not in ("/", "") and os.path.isdir(home):
+        argv += ["--tmpfs", home]
+    return argv + ["--bind", root, root, "--chdir", cwd, "--die-with-parent", "--"]
+
+
+class ShellSession:
+    """
+    A long-lived shell that runs one command at a time.
+
+    Each command is sent as `eval '<command>' </dev/null`, followed by a
+    printf of a per-session sentinel carrying the exit code and working
+    directory, on both stdout and stderr. Output is read incrementally
+    until both sentinels arrive, so `cd`, exported variables and activated
+    virtualenvs carry over between commands. The shell runs in its own
+    process group; a timed-out command kills the whole group.
+
+    A jailed shell gets HOME set to the jail directory, so `cd` and `~`
+    stay inside it, and runs under bubblewrap when that is available.
+    """
+
+    def __init__(self, cwd: str, shell: str | None = None, max_output: int = 10000, jail: str | None = None):
+        self.cwd = cwd
+        self.max_output = max_output
+        self.jail = jail
+        self.shell = shell or shutil.which("bash") or "/bin/sh"
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self._sentinel = f"__NANOBOT_{secrets.token_hex(8)}__"
+        self._process: asyncio.subprocess.Process | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self) -> None:
+        argv, env = [self.shell], None
+        if self.jail:
+            env = {**os.environ, "HOME": self.jail}
+            if await bwrap_available():
+                argv = bwrap_argv(self.jail, self.cwd) + argv
+        self._process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            env=env,
+            start_new_session=True,
+        )
+        logger.debug(f"Shell session started: {' '.join(argv)} (pid {self._process.pid})")
+
+    async def run(self, command: str, timeout: float) -> ShellResult:
+        """Run a command; callers serialize through `lock`."""
+        if not self.alive:
+            await self.start()
+        process = self._process
+        self.last_used = time.monotonic()
+
+        marker = self._sentinel
+        script = (
+            f"eval {shlex.quote(command)} </dev/null\n"
+            f"__nb_rc=$?; printf '\\n{marker} %d %s\\n' \"$__nb_rc\" \"$PWD\"; printf '\\n{marker}\\n' >&2\n"
+        )
+        process.stdin.write(script.encode("utf-8"))
+
+        out = OutputBuffer(self.max_output // 2, self.max_output // 2)
+        err = OutputBuffer(self.max_output // 2, self.max_output // 2)
+        tag = b"\n" + marker.encode()
+        try:
+            await process.stdin.drain()
+            _, status = await asyncio.wait_for(
+                asyncio.gather(self._read_until(process.stderr, err, tag), self._read_until(process.stdout, out, tag)),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            await self.close()
+            return ShellResult(out, err, None, self.cwd, timed_out=True)
+        except (BrokenPipeError, ConnectionResetError):
+            status = None
+        finally:
+            self.last_used = time.monotonic()
+
+        if status is None:
+            # The shell exited (e.g. the command ran `exit`); the next call starts a fresh one
+            code = await process.wait()
+            self._process = None
+            return ShellResult(out, err, code, self.cwd)
+
+        code, _, cwd = status.partition(" ")
+        self.cwd = cwd or self.cwd
+        return ShellResult(out, err, int(code), self.cwd)
+
+    @staticmethod
+    async def _read_until(stream: asyncio.StreamReader, buf: OutputBuffer, tag: bytes) -> str | None:
+        """
+        Copy chunks into buf until the sentinel line; return its payload.
+
+        Only a sentinel-sized window is held back from buf, in case the
+        sentinel straddles two chunks. Returns None if the stream hit EOF first.
+        """
+        pending = bytearray()
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                buf.write(bytes(pending))
+                return None
+            pending += chunk
+            pos = pending.find(tag)
+            if pos == -1:
+                keep = len(tag) - 1
+                buf.write(bytes(pending[:-keep]))
+                del pending[:-keep]
+                continue
+            end = pending.find(b"\n", pos + len(tag))
+            if end != -1:
+                buf.write(bytes(pending[:pos]))
+                return bytes(pending[pos + len(tag):end]).decode("utf-8", errors="replace").strip()
+            buf.write(bytes(pending[:pos]))  # Sentinel seen, its line not complete yet
+            del pending[:pos]
+
+    async def close(self) -> None:
+        """Kill the shell and everything it started."""
+        process, self._process = self._process, None
+        if process is not None:
+            await kill_process_group(process)
+
+
+class ShellSessionPool:
+    """
+    Persistent shells keyed by conversation session.
+
+    Shells idle for idle_timeout seconds are closed by a background reaper,
+    and at most max_sessions are kept (least recently used closed first).
+    With jail set, each shell is confined to cwd; see `bwrap_argv`.
+    """
+
+    def __init__(
+        self,
+        cwd: str,
+        idle_timeout: float = 300.0,
+        max_sessions: int = 32,
+        max_output: int = 10000,
+        jail: bool = False,
+    ):
+        self.cwd = cwd
+        self.jail = jail
+        self.max_output = max_output
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions: dict[str, ShellSession] = {}
+        self._reaper: asyncio.Task | None = None
+
+    def get(self, key: str) -> ShellSession:
+        """Get the session's shell, creating it (not yet started) if needed."""
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = ShellSession(
+                self.cwd, max_output=self.max_output, jail=self.cwd if self.jail else None,
+            )
+            self._evict()
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+        return session
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self) -> None:
+        while len(self._sessions) > self.max_sessions:
+            key = min(
+                (k for k, s in self._sessions.items() if not s.lock.locked()),
+                key=lambda k: self._sessions[k].last_used,
+                default=None,
+            )
+            if key is None:
+                return
+            asyncio.create_task(self._sessions.pop(key).close())
+
+    async def _reap(self) -> None:
+        while self._sessions:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            now = time.monotonic()
+            for key, session in list(self._sessions.items()):
+                if not session.lock.locked() and now - session.last_used >= self.idle_timeout:
+                    del self._sessions[key]
+                    await session.close()
+                    logger.debug(f"Closed idle shell session {key}")
+
+    async def close(self) -> None:
+        """Close all shells and stop the reaper."""
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            await session.close()
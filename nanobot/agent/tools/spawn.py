@@ -63,3 +63,60 @@ class SpawnTool(Tool):
             origin_channel=self._origin_channel,
             origin_chat_id=self._origin_chat_id,
         )
+
+
+class SubagentsTool(Tool):
+    """Tool to list and cancel the subagents spawned from the current chat."""
+    
+    def __init__(self, manager: "SubagentManager"):
+        self._manager = manager
+        self._origin_channel = "cli"
+        self._origin_chat_id = "direct"
+    
+    def set_context(self, channel: str, chat_id: str) -> None:
+        """Set the chat whose subagents this tool manages."""
+        self._origin_channel = channel
+        self._origin_chat_id = chat_id
+    
+    @property
+    def name(self) -> str:
+        return "subagents"
+    
+    @property
+    def description(self) -> str:
+        return (
+            "List the background subagents of this conversation with their progress, "
+            "or cancel one (or all) of them."
+        )
+    
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["list", "cancel"],
+                    "description": "list: show subagents; cancel: stop a queued or running one",
+                },
+                "task_id": {
+                    "type": "string",
+                    "description": "Subagent id to cancel (omit to cancel all of this conversation's subagents)",
+                },
+            },
+            "required": ["action"],
+        }
+    
+    async def execute(self, action: str, task_id: str | None = None, **kwargs: Any) -> str:
+        if action == "cancel":
+            if task_id:
+                mine = {r.id for r in self._manager.status(self._origin_channel, self._origin_chat_id) if r.active}
+                if task_id not in mine or not self._manager.cancel(task_id):
+                    return f"Error: no active subagent {task_id} in this conversation"
+                return f"Cancelled subagent {task_id}"
+            count = self._manager.cancel_origin(self._origin_channel, self._origin_chat_id)
+            return f"Cancelled {count} subagent(s)"
+        runs = self._manager.status(self._origin_channel, self._origin_chat_id)
+        if not runs:
+            return "No subagents in this conversation."
+        return "\n".join(r.summary() for r in runs)
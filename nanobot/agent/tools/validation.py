@@ -0,0 +1,182 @@
+"""Compiled JSON-schema validators for tool parameters."""
+
+import re
+from typing import Any, Callable
+
+# A compiled node: (value, runtime path prefix, error sink) -> value (coerced if enabled)
+Validator = Callable[[Any, str, list[str]], Any]
+
+_TYPE_MAP: dict[str, type | tuple[type, ...]] = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+_INT = re.compile(r"^[+-]?\d+$")
+_NUMBER = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+_BOOLEANS = {"true": True, "false": False}
+
+
+def _coercer(t: str) -> Callable[[Any], Any] | None:
+    """Lenient conversion of what models commonly send for a type, or None."""
+    if t == "integer":
+        def to_int(val: Any) -> Any:
+            if isinstance(val, str) and _INT.match(val.strip()):
+                return int(val)
+            if isinstance(val, float) and val.is_integer():
+                return int(val)
+            return val
+        return to_int
+    if t == "number":
+        def to_number(val: Any) -> Any:
+            if isinstance(val, str) and _NUMBER.match(val.strip()):
+                num = float(val)
+                return int(num) if _INT.match(val.strip()) else num
+            return val
+        return to_number
+    if t == "boolean":
+        return lambda val: _BOOLEANS.get(val.strip().lower(), val) if isinstance(val, str) else val
+    return None
+
+
+def compile_schema(schema: dict[str, Any], coerce: bool = False) -> Callable[[dict[str, Any]], tuple[dict[str, Any], list[str]]]:
+    """
+    Compile a tool's parameter schema into a validator.
+
+    Supports the subset tools use: type, enum, minimum/maximum,
+    minLength/maxLength, properties/required and items. The schema is
+    walked once here; each call only runs the checks that apply, and
+    error paths are built only when a check fails.
+
+    Args:
+        schema: JSON schema of the parameters (must be an object schema).
+        coerce: Convert numeric and boolean strings (e.g. "5" -> 5) for
+            integer, number and boolean fields before checking them.
+
+    Returns:
+        A function mapping params to (possibly coerced params, errors).
+    """
+    if schema.get("type", "object") != "object":
+        raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
+    root = _compile({**schema, "type": "object"}, "", False, coerce)
+
+    def validate(params: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+        errors: list[str] = []
+        params = root(params, "", errors)
+        return params, errors
+
+    return validate
+
+
+def _compile(schema: dict[str, Any], rel: str, dynamic: bool, coerce: bool) -> Validator:
+    """
+    Compile one schema node.
+
+    `rel` is the node's path relative to the runtime prefix, which is only
+    non-empty inside arrays (`dynamic`), where item indices are known late.
+    """
+    t = schema.get("type")
+    checks: list[Callable[[Any, str, list[str]], None]] = []
+
+    def label(prefix: str) -> str:
+        return (prefix + rel) or "parameter"
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+        def check_enum(val: Any, prefix: str, errors: list[str]) -> None:
+            if val not in allowed:
+                errors.append(f"{label(prefix)} must be one of {allowed}")
+        checks.append(check_enum)
+
+    if t in ("integer", "number"):
+        lo, hi = schema.get("minimum"), schema.get("maximum")
+        if lo is not None:
+            def check_min(val: Any, prefix: str, errors: list[str]) -> None:
+                if val < lo:
+                    errors.append(f"{label(prefix)} must be >= {lo}")
+            checks.append(check_min)
+        if hi is not None:
+            def check_max(val: Any, prefix: str, errors: list[str]) -> None:
+                if val > hi:
+                    errors.append(f"{label(prefix)} must be <= {hi}")
+            checks.append(check_max)
+
+    if t == "string":
+        min_len, max_len = schema.get("minLength"), schema.get("maxLength")
+        if min_len is not None:
+            def check_min_len(val: Any, prefix: str, errors: list[str]) -> None:
+                if len(val) < min_len:
+                    errors.append(f"{label(prefix)} must be at least {min_len} chars")
+            checks.append(check_min_len)
+        if max_len is not None:
+            def check_max_len(val: Any, prefix: str, errors: list[str]) -> None:
+                if len(val) > max_len:
+                    errors.append(f"{label(prefix)} must be at most {max_len} chars")
+            checks.append(check_max_len)
+
+    children: Validator | None = None
+    if t == "object":
+        children = _compile_object(schema, rel, dynamic, coerce)
+    elif t == "array" and "items" in schema:
+        children = _compile_array(schema["items"], rel, coerce)
+
+    expected = _TYPE_MAP.get(t)
+    convert = _coercer(t) if coerce else None
+
+    def node(val: Any, prefix: str, errors: list[str]) -> Any:
+        if convert is not None:
+            val = convert(val)
+        if expected is not None and not isinstance(val, expected):
+            errors.append(f"{label(prefix)} should be {t}")
+            return val
+        for check in checks:
+            check(val, prefix, errors)
+        if children is not None:
+            val = children(val, prefix, errors)
+        return val
+
+    return node
+
+
+def _compile_object(schema: dict[str, Any], rel: str, dynamic: bool, coerce: bool) -> Validator:
+    def child_rel(key: str) -> str:
+        return f"{rel}.{key}" if rel or dynamic else key
+
+    required = [(key, child_rel(key)) for key in schema.get("required", [])]
+    props = {key: _compile(sub, child_rel(key), dynamic, coerce) for key, sub in schema.get("properties", {}).items()}
+
+    def check_object(val: dict[str, Any], prefix: str, errors: list[str]) -> dict[str, Any]:
+        for key, path in required:
+            if key not in val:
+                errors.append(f"missing required {prefix + path}")
+        out = val
+        for key, item in val.items():
+            if (validate := props.get(key)) is not None:
+                new = validate(item, prefix, errors)
+                if new is not item:
+                    if out is val:
+                        out = dict(val)  # Copy on first coercion; never mutate the caller's dict
+                    out[key] = new
+        return out
+
+    return check_object
+
+
+def _compile_array(items: dict[str, Any], rel: str, coerce: bool) -> Validator:
+    validate = _compile(items, "", True, coerce)
+
+    def check_array(val: list[Any], prefix: str, errors: list[str]) -> list[Any]:
+        base = prefix + rel
+        out = val
+        for i, item in enumerate(val):
+            new = validate(item, f"{base}[{i}]", errors)
+            if new is not item:
+                if out is val:
+                    out = list(val)
+                out[i] = new
+        return out
+
+    return check_array
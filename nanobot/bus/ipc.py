@@ -0,0 +1,327 @@
+"""Local IPC transport that shards the message bus across agent worker processes.
+
+The front process hosts the channels and an IPCBusServer; each worker process
+runs its own AgentLoop on a local MessageBus connected through an IPCWorkerLink.
+Inbound messages are routed to a worker by a stable hash of the session key, so
+a session (and its subagents' announcements) always lands on the same worker.
+
+Frames are length-prefixed JSON over a Unix domain socket:
+    worker → front: hello, out (OutboundMessage), call, result, bye
+    front → worker: in (InboundMessage), call, result, close
+
+"call"/"result" forward a tool call to the worker that owns the resource
+(cron runs only on worker 0); the front process relays both directions.
+"""
+
+import asyncio
+import json
+import struct
+import zlib
+from collections import deque
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.queue import MessageBus
+
+_HEADER = struct.Struct(">I")
+
+# Serves a forwarded tool call: (params, channel, chat_id) -> result text
+CallHandler = Callable[[dict[str, Any], str, str], Awaitable[str]]
+
+
+def shard_for(msg: InboundMessage, workers: int) -> int:
+    """Pick the worker that owns a message's session."""
+    # System messages carry the origin session in chat_id ("channel:chat_id")
+    key = msg.chat_id if msg.channel == "system" else msg.session_key
+    return zlib.crc32(key.encode("utf-8")) % workers
+
+
+async def _send_frame(writer: asyncio.StreamWriter, frame: dict[str, Any]) -> None:
+    data = json.dumps(frame, ensure_ascii=False).encode("utf-8")
+    writer.write(_HEADER.pack(len(data)) + data)
+    await writer.drain()
+
+
+async def _recv_frame(reader: asyncio.StreamReader) -> dict[str, Any] | None:
+    """Read one frame, or None when the peer has gone away."""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+        (length,) = _HEADER.unpack(header)
+        return json.loads(await reader.readexactly(length))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+
+
+def _encode_inbound(msg: InboundMessage) -> dict[str, Any]:
+    data = asdict(msg)
+    data["timestamp"] = msg.timestamp.isoformat()
+    return data
+
+
+def _decode_inbound(data: dict[str, Any]) -> InboundMessage:
+    return InboundMessage(**{**data, "timestamp": datetime.fromisoformat(data["timestamp"])})
+
+
+class IPCBusServer:
+    """
+    Front-process side of the IPC bus.
+
+    Consumes the local inbound queue, forwards each message to the worker that
+    owns its session, and republishes worker replies on the local outbound
+    queue for the channels. Messages for a disconnected worker are held until
+    it (re)connects.
+    """
+
+    def __init__(self, bus: MessageBus, socket_path: Path, workers: int):
+        self.bus = bus
+        self.socket_path = socket_path
+        self.workers = workers
+        self._queues: list[asyncio.Queue[InboundMessage | None]] = [asyncio.Queue() for _ in range(workers)]
+        # Messages taken from a queue whose send failed; resent first on the next connection
+        self._held: list[deque[InboundMessage | None]] = [deque() for _ in range(workers)]
+        self._done = [asyncio.Event() for _ in range(workers)]
+        self._connected: set[int] = set()
+        self._writers: dict[int, asyncio.StreamWriter] = {}
+        self._calls: dict[int, tuple[int, int]] = {}  # relay id -> (caller index, caller's id)
+        self._next_call = 0
+        self._server: asyncio.AbstractServer | None = None
+        self._pump_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Listen for workers and start routing inbound messages."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._on_connect, path=str(self.socket_path))
+        self._pump_task = asyncio.create_task(self._pump())
+        logger.info(f"IPC bus listening on {self.socket_path} for {self.workers} workers")
+
+    async def _pump(self) -> None:
+        async for msg in self.bus.inbound_messages():
+            await self._queues[shard_for(msg, self.workers)].put(msg)
+        # Inbound closed and drained: tell every worker to finish up
+        for queue in self._queues:
+            await queue.put(None)
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        hello = await _recv_frame(reader)
+        if not hello or hello.get("t") != "hello" or not 0 <= hello.get("index", -1) < self.workers:
+            writer.close()
+            return
+        index = hello["index"]
+        if index in self._connected:
+            logger.warning(f"IPC worker {index} already connected, refusing duplicate")
+            writer.close()
+            return
+        self._connected.add(index)
+        self._writers[index] = writer
+        self._done[index].clear()
+        logger.info(f"IPC worker {index} connected")
+
+        sender = asyncio.create_task(self._feed_worker(index, writer))
+        try:
+            while (frame := await _recv_frame(reader)) is not None:
+                kind = frame.get("t")
+                if kind == "out":
+                    await self.bus.publish_outbound(OutboundMessage(**frame["msg"]))
+                elif kind == "call":
+                    await self._relay_call(index, frame)
+                elif kind == "result":
+                    caller, call_id = self._calls.pop(frame["id"], (None, None))
+                    if caller is not None:
+                        await self._reply(caller, call_id, frame["result"])
+                elif kind == "bye":
+                    self._done[index].set()
+                    break
+        finally:
+            sender.cancel()
+            self._connected.discard(index)
+            self._writers.pop(index, None)
+            writer.close()
+            if index == 0:
+                for relay_id, (caller, call_id) in list(self._calls.items()):
+                    del self._calls[relay_id]
+                    await self._reply(caller, call_id, "Error: the scheduler worker restarted, please retry")
+            if not self._done[index].is_set():
+                logger.warning(f"IPC worker {index} disconnected")
+
+    async def _relay_call(self, caller: int, frame: dict[str, Any]) -> None:
+        """Pass a tool call to worker 0, remembering who to answer."""
+        owner = self._writers.get(0)
+        if owner is None:
+            await self._reply(caller, frame["id"], "Error: the scheduler worker is not available, please retry")
+            return
+        self._next_call += 1
+        self._calls[self._next_call] = (caller, frame["id"])
+        try:
+            await _send_frame(owner, {**frame, "id": self._next_call})
+        except ConnectionError:
+            del self._calls[self._next_call]
+            await self._reply(caller, frame["id"], "Error: the scheduler worker is not available, please retry")
+
+    async def _reply(self, index: int, call_id: int, result: str) -> None:
+        if (writer := self._writers.get(index)) is None:
+            return
+        try:
+            await _send_frame(writer, {"t": "result", "id": call_id, "result": result})
+        except ConnectionError as e:
+            logger.warning(f"IPC result for worker {index} lost: {e}")
+
+    async def _feed_worker(self, index: int, writer: asyncio.StreamWriter) -> None:
+        queue, held = self._queues[index], self._held[index]
+        while True:
+            msg = held.popleft() if held else await queue.get()
+            try:
+                if msg is None:
+                    await _send_frame(writer, {"t": "close"})
+                    return
+                await _send_frame(writer, {"t": "in", "msg": _encode_inbound(msg)})
+            except ConnectionError as e:
+                held.appendleft(msg)
+                logger.warning(f"IPC send to worker {index} failed, holding message until it reconnects: {e}")
+                return
+            except BaseException:
+                held.appendleft(msg)  # Cancelled because the worker disconnected mid-send
+                raise
+
+    async def wait_closed(self, timeout: float) -> None:
+        """Wait for all workers to drain and say goodbye, then stop listening."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(e.wait() for e in self._done)), timeout=timeout)
+        except asyncio.TimeoutError:
+            pending = [i for i, e in enumerate(self._done) if not e.is_set()]
+            logger.warning(f"IPC workers {pending} did not finish in time")
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        self.socket_path.unlink(missing_ok=True)
+
+
+class IPCWorkerLink:
+    """
+    Worker-process side of the IPC bus.
+
+    Feeds messages from the front process into the worker's local MessageBus
+    and ships the local outbound queue back. On "close" it closes local
+    inbound so the AgentLoop drains and exits; once the caller closes local
+    outbound, remaining replies are flushed and the link says goodbye.
+
+    `call` forwards a tool call to worker 0 through the front process; on
+    worker 0, `serve` registers the handler that answers it.
+    """
+
+    def __init__(
+        self,
+        bus: MessageBus,
+        socket_path: Path,
+        index: int,
+        connect_timeout: float = 30.0,
+        call_timeout: float = 60.0,
+    ):
+        self.bus = bus
+        self.socket_path = socket_path
+        self.index = index
+        self.connect_timeout = connect_timeout
+        self.call_timeout = call_timeout
+        self._writer: asyncio.StreamWriter | None = None
+        self._handlers: dict[str, CallHandler] = {}
+        self._pending: dict[int, asyncio.Future[str]] = {}
+        self._next_call = 0
+        self._serving: set[asyncio.Task] = set()
+
+    def serve(self, tool: str, handler: CallHandler) -> None:
+        """Answer calls for a tool forwarded by other workers."""
+        self._handlers[tool] = handler
+
+    async def call(self, tool: str, params: dict[str, Any], channel: str, chat_id: str) -> str:
+        """Run a tool call on worker 0 and return its result text."""
+        if self._writer is None:
+            return "Error: not connected to the gateway, please retry"
+        self._next_call += 1
+        call_id = self._next_call
+        future = self._pending[call_id] = asyncio.get_running_loop().create_future()
+        try:
+            await _send_frame(self._writer, {
+                "t": "call", "id": call_id, "tool": tool, "params": params, "channel": channel, "chat_id": chat_id,
+            })
+            return await asyncio.wait_for(future, timeout=self.call_timeout)
+        except asyncio.TimeoutError:
+            return f"Error: {tool} did not answer within {self.call_timeout:.0f}s"
+        except ConnectionError as e:
+            return f"Error: lost connection to the gateway: {e}"
+        finally:
+            self._pending.pop(call_id, None)
+
+    async def _answer(self, frame: dict[str, Any]) -> None:
+        handler = self._handlers.get(frame.get("tool", ""))
+        try:
+            if handler is None:
+                result = f"Error: {frame.get('tool')} is not served by worker {self.index}"
+            else:
+                result = await handler(frame.get("params") or {}, frame.get("channel", ""), frame.get("chat_id", ""))
+        except Exception as e:
+            result = f"Error: {e}"
+        try:
+            await _send_frame(self._writer, {"t": "result", "id": frame["id"], "result": result})
+        except (ConnectionError, AttributeError) as e:
+            logger.warning(f"IPC result for call {frame['id']} lost: {e}")
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.connect_timeout
+        while True:
+            try:
+                return await asyncio.open_unix_connection(str(self.socket_path))
+            except (FileNotFoundError, ConnectionRefusedError):
+                if loop.time() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+    async def run(self) -> None:
+        try:
+            reader, writer = await self._connect()
+        except OSError as e:
+            logger.error(f"IPC worker {self.index} could not reach {self.socket_path}: {e}")
+            self.bus.close_inbound()
+            return
+        await _send_frame(writer, {"t": "hello", "index": self.index})
+        self._writer = writer
+        logger.info(f"IPC worker {self.index} linked to {self.socket_path}")
+
+        async def forward_outbound() -> None:
+            async for msg in self.bus.outbound_messages():
+                await _send_frame(writer, {"t": "out", "msg": asdict(msg)})
+
+        forwarder = asyncio.create_task(forward_outbound())
+        try:
+            while (frame := await _recv_frame(reader)) is not None:
+                kind = frame.get("t")
+                if kind == "in":
+                    await self.bus.publish_inbound(_decode_inbound(frame["msg"]))
+                elif kind == "call":
+                    task = asyncio.create_task(self._answer(frame))
+                    self._serving.add(task)
+                    task.add_done_callback(self._serving.discard)
+                elif kind == "result":
+                    future = self._pending.get(frame["id"])
+                    if future is not None and not future.done():
+                        future.set_result(frame["result"])
+                elif kind == "close":
+                    break
+            self.bus.close_inbound()
+            await forwarder
+            await _send_frame(writer, {"t": "bye"})
+        except ConnectionError as e:
+            logger.error(f"IPC link to front process lost: {e}")
+            self.bus.close_inbound()
+        finally:
+            forwarder.cancel()
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_result("Error: lost connection to the gateway, please retry")
+            writer.close()
@@ -1,80 +1,421 @@
 """Async message queue for decoupled channel-agent communication."""
 
 import asyncio
-from typing import Callable, Awaitable
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Awaitable, Literal
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 
+OverflowPolicy = Literal["drop_oldest", "reject", "coalesce"]
+
+# Lower value = served first
+PRIORITY_SYSTEM = 0   # subagent announcements and other internal messages
+PRIORITY_NORMAL = 1   # direct messages
+PRIORITY_LOW = 2      # group chats, panels, guild channels
+
+
+class BusClosedError(Exception):
+    """Raised by consumers once a queue is closed and fully drained."""
+
+
+def message_priority(msg: InboundMessage) -> int:
+    """Classify an inbound message. Channels may override via metadata["priority"]."""
+    if msg.channel == "system":
+        return PRIORITY_SYSTEM
+    meta = msg.metadata or {}
+    if isinstance(meta.get("priority"), int):
+        return meta["priority"]
+    if meta.get("is_group") or meta.get("chat_type") == "group" or meta.get("guild_id"):
+        return PRIORITY_LOW
+    return PRIORITY_NORMAL
+
+
+@dataclass(slots=True, eq=False)
+class _Entry:
+    msg: InboundMessage
+    priority: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class InboundQueue:
+    """
+    Bounded, priority-aware queue for inbound messages.
+
+    Messages are served lowest priority value first, FIFO within a priority.
+    Capacity is enforced globally, per channel and per session (0 = unlimited);
+    when a limit is hit the overflow policy decides what happens:
+
+    - drop_oldest: evict the oldest queued message in the full scope
+    - reject: refuse the new message. When only the global capacity is
+      exhausted, `put_wait` first waits for room, which back-pressures the
+      publishing channel instead of losing messages; a chat or channel over
+      its own limit is refused at once, so it cannot stall its neighbours
+    - coalesce: merge the new message into the pending one from the same
+      sender in that session, falling back to drop_oldest otherwise
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        per_channel: int = 0,
+        per_session: int = 0,
+        policy: OverflowPolicy = "drop_oldest",
+    ):
+        self.maxsize = maxsize
+        self.per_channel = per_channel
+        self.per_session = per_session
+        self.policy = policy
+        self._lanes: dict[int, deque[_Entry]] = {}
+        self._by_channel: Counter[str] = Counter()
+        self._by_session: Counter[str] = Counter()
+        self._size = 0
+        self._closed = False
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self.stats: dict[str, Any] = {
+            "enqueued": 0, "dropped": 0, "rejected": 0, "coalesced": 0,
+            "wait_ms_avg": 0.0, "wait_ms_max": 0.0,
+        }
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop accepting messages; consumers drain what is queued, then get BusClosedError."""
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+    async def put_wait(self, msg: InboundMessage, timeout: float = 0) -> bool:
+        """
+        Like put, but under the reject policy wait up to timeout seconds for global room first.
+
+        Only the global limit waits: one channel task serves many chats, so
+        blocking it on a single chat's (or the channel's own) quota would hold
+        up every other chat behind it.
+        """
+        if self.policy == "reject" and timeout > 0:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while not self._closed and self._full_scope(msg.session_key, msg.channel) == "global":
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._not_full.clear()
+                try:
+                    await asyncio.wait_for(self._not_full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        return self.put(msg)
+
+    def put(self, msg: InboundMessage) -> bool:
+        """Queue a message. Returns False if rejected by the overflow policy or closed."""
+        if self._closed:
+            self.stats["rejected"] += 1
+            return False
+        priority = message_priority(msg)
+        key, channel = msg.session_key, msg.channel
+
+        scope = self._full_scope(key, channel)
+        while scope:
+            if self.policy == "coalesce" and self._coalesce(msg):
+                self.stats["coalesced"] += 1
+                return True
+            victim = None if self.policy == "reject" else self._oldest(scope, key, channel)
+            if victim is None or victim.priority < priority:
+                # Never evict more important work to make room for less important
+                self.stats["rejected"] += 1
+                return False
+            self._remove(victim)
+            self.stats["dropped"] += 1
+            logger.warning(f"Bus overflow ({scope}): dropped message for {victim.msg.session_key}")
+            scope = self._full_scope(key, channel)
+
+        self._lanes.setdefault(priority, deque()).append(_Entry(msg, priority))
+        self._by_channel[channel] += 1
+        self._by_session[key] += 1
+        self._size += 1
+        self.stats["enqueued"] += 1
+        self._not_empty.set()
+        return True
+
+    async def get(self) -> InboundMessage:
+        """Remove and return the most urgent message (blocks until available).
+
+        Raises:
+            BusClosedError: If the queue is closed and empty.
+        """
+        while not self._size:
+            if self._closed:
+                raise BusClosedError()
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        for priority in sorted(self._lanes):
+            lane = self._lanes[priority]
+            if lane:
+                entry = lane.popleft()
+                break
+        self._forget(entry)
+        self._record_wait(entry)
+        return entry.msg
+
+    def pressure(self, channel: str | None = None) -> float:
+        """Fill ratio (0..1) of the tightest limit for a channel, for backpressure."""
+        ratios = [self._size / self.maxsize] if self.maxsize else [0.0]
+        if channel and self.per_channel:
+            ratios.append(self._by_channel[channel] / self.per_channel)
+        return min(1.0, max(ratios))
+
+    def depth(self) -> dict[str, Any]:
+        return {
+            "total": self._size,
+            "by_priority": {p: len(lane) for p, lane in sorted(self._lanes.items()) if lane},
+            "by_channel": {c: n for c, n in self._by_channel.items() if n},
+        }
+
+    def _full_scope(self, key: str, channel: str) -> str | None:
+        if self.per_session and self._by_session[key] >= self.per_session:
+            return "session"
+        if self.per_channel and self._by_channel[channel] >= self.per_channel:
+            return "channel"
+        if self.maxsize and self._size >= self.maxsize:
+            return "global"
+        return None
+
+    def _oldest(self, scope: str, key: str, channel: str) -> _Entry | None:
+        """Oldest entry in the full scope; for global, prefer the least urgent lane."""
+        if scope == "global":
+            for priority in sorted(self._lanes, reverse=True):
+                if self._lanes[priority]:
+                    return self._lanes[priority][0]
+            return None
+        match = (lambda e: e.msg.session_key == key) if scope == "session" else (lambda e: e.msg.channel == channel)
+        candidates = [e for lane in self._lanes.values() for e in lane if match(e)]
+        return min(candidates, key=lambda e: e.enqueued_at, default=None)
+
+    def _coalesce(self, msg: InboundMessage) -> bool:
+        """Merge msg into the newest pending message from the same sender in the same session."""
+        key, sender = msg.session_key, msg.sender_id
+        pending = [
+            e for lane in self._lanes.values() for e in lane
+            if e.msg.session_key == key and e.msg.sender_id == sender
+        ]
+        if not pending:
+            return False
+        target = max(pending, key=lambda e: e.enqueued_at).msg
+        target.content = f"{target.content}\n{msg.content}"
+        target.media.extend(msg.media)
+        return True
+
+    def _remove(self, entry: _Entry) -> None:
+        self._lanes[entry.priority].remove(entry)
+        self._forget(entry)
+
+    def _forget(self, entry: _Entry) -> None:
+        self._size -= 1
+        self._by_channel[entry.msg.channel] -= 1
+        self._by_session[entry.msg.session_key] -= 1
+        if not self._by_session[entry.msg.session_key]:
+            del self._by_session[entry.msg.session_key]
+        self._not_full.set()
+
+    def _record_wait(self, entry: _Entry) -> None:
+        wait_ms = (time.monotonic() - entry.enqueued_at) * 1000
+        self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+        # Exponentially weighted moving average
+        self.stats["wait_ms_avg"] = 0.9 * self.stats["wait_ms_avg"] + 0.1 * wait_ms
+
+
+class OutboundQueue:
+    """Bounded FIFO for outbound messages; publishers wait while it is full."""
+
+    def __init__(self, maxsize: int = 0):
+        self.maxsize = maxsize
+        self._items: deque[tuple[float, OutboundMessage]] = deque()
+        self._closed = False
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self.wait_ms_avg = 0.0
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop accepting messages; consumers drain what is queued, then get BusClosedError."""
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+    async def put(self, msg: OutboundMessage) -> None:
+        while self.maxsize and len(self._items) >= self.maxsize and not self._closed:
+            self._not_full.clear()
+            await self._not_full.wait()
+        if self._closed:
+            logger.warning(f"Outbound queue closed, dropping message to {msg.channel}:{msg.chat_id}")
+            return
+        self._items.append((time.monotonic(), msg))
+        self._not_empty.set()
+
+    async def get(self) -> OutboundMessage:
+        """Remove and return the oldest message (blocks until available).
+
+        Raises:
+            BusClosedError: If the queue is closed and empty.
+        """
+        while not self._items:
+            if self._closed:
+                raise BusClosedError()
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        enqueued_at, msg = self._items.popleft()
+        self._not_full.set()
+        wait_ms = (time.monotonic() - enqueued_at) * 1000
+        self.wait_ms_avg = 0.9 * self.wait_ms_avg + 0.1 * wait_ms
+        return msg
+
 
 class MessageBus:
     """
     Async message bus that decouples chat channels from the agent core.
-    
+
     Channels push messages to the inbound queue, and the agent processes
     them and pushes responses to the outbound queue.
+
+    The inbound side is bounded and priority-aware (see InboundQueue); the
+    outbound side is bounded and blocks the publisher when full.
+
+    Consumers block until work arrives — no polling. Shutdown is driven by
+    close_inbound()/close_outbound(): queued messages are still delivered,
+    then consumers see BusClosedError (or their async iterator ends).
     """
-    
-    def __init__(self):
-        self.inbound: asyncio.Queue[InboundMessage] = asyncio.Queue()
-        self.outbound: asyncio.Queue[OutboundMessage] = asyncio.Queue()
+
+    def __init__(
+        self,
+        max_inbound: int = 0,
+        max_outbound: int = 0,
+        per_channel_limit: int = 0,
+        per_session_limit: int = 0,
+        overflow_policy: OverflowPolicy = "drop_oldest",
+        publish_timeout: float = 0,
+    ):
+        self.publish_timeout = publish_timeout
+        self.inbound = InboundQueue(
+            maxsize=max_inbound,
+            per_channel=per_channel_limit,
+            per_session=per_session_limit,
+            policy=overflow_policy,
+        )
+        self.outbound = OutboundQueue(maxsize=max_outbound)
         self._outbound_subscribers: dict[str, list[Callable[[OutboundMessage], Awaitable[None]]]] = {}
         self._running = False
-    
-    async def publish_inbound(self, msg: InboundMessage) -> None:
-        """Publish a message from a channel to the agent."""
-        await self.inbound.put(msg)
-    
+
+    async def publish_inbound(self, msg: InboundMessage) -> bool:
+        """
+        Publish a message from a channel to the agent. Returns False if rejected.
+
+        Under the reject policy a globally full queue makes the publisher wait
+        up to publish_timeout seconds for room before the message is refused;
+        session and channel limits refuse immediately.
+        """
+        return await self.inbound.put_wait(msg, self.publish_timeout)
+
     async def consume_inbound(self) -> InboundMessage:
-        """Consume the next inbound message (blocks until available)."""
+        """Consume the next inbound message (blocks until available, BusClosedError once drained)."""
         return await self.inbound.get()
-    
+
+    async def inbound_messages(self) -> AsyncIterator[InboundMessage]:
+        """Iterate inbound messages until the inbound side is closed and drained."""
+        while True:
+            try:
+                yield await self.inbound.get()
+            except BusClosedError:
+                return
+
     async def publish_outbound(self, msg: OutboundMessage) -> None:
-        """Publish a response from the agent to channels."""
+        """Publish a response from the agent to channels (waits while the queue is full)."""
         await self.outbound.put(msg)
-    
+
     async def consume_outbound(self) -> OutboundMessage:
-        """Consume the next outbound message (blocks until available)."""
+        """Consume the next outbound message (blocks until available, BusClosedError once drained)."""
         return await self.outbound.get()
-    
+
+    async def outbound_messages(self) -> AsyncIterator[OutboundMessage]:
+        """Iterate outbound messages until the outbound side is closed and drained."""
+        while True:
+            try:
+                yield await self.outbound.get()
+            except BusClosedError:
+                return
+
+    def close_inbound(self) -> None:
+        """Reject new inbound messages; the agent finishes what is queued."""
+        self.inbound.close()
+
+    def close_outbound(self) -> None:
+        """Reject new outbound messages; dispatchers deliver what is queued."""
+        self.outbound.close()
+
     def subscribe_outbound(
-        self, 
-        channel: str, 
+        self,
+        channel: str,
         callback: Callable[[OutboundMessage], Awaitable[None]]
     ) -> None:
         """Subscribe to outbound messages for a specific channel."""
         if channel not in self._outbound_subscribers:
             self._outbound_subscribers[channel] = []
         self._outbound_subscribers[channel].append(callback)
-    
+
     async def dispatch_outbound(self) -> None:
         """
         Dispatch outbound messages to subscribed channels.
         Run this as a background task.
         """
         self._running = True
-        while self._running:
-            try:
-                msg = await asyncio.wait_for(self.outbound.get(), timeout=1.0)
-                subscribers = self._outbound_subscribers.get(msg.channel, [])
-                for callback in subscribers:
-                    try:
-                        await callback(msg)
-                    except Exception as e:
-                        logger.error(f"Error dispatching to {msg.channel}: {e}")
-            except asyncio.TimeoutError:
-                continue
-    
-    def stop(self) -> None:
-        """Stop the dispatcher loop."""
+        async for msg in self.outbound_messages():
+            subscribers = self._outbound_subscribers.get(msg.channel, [])
+            for callback in subscribers:
+                try:
+                    await callback(msg)
+                except Exception as e:
+                    logger.error(f"Error dispatching to {msg.channel}: {e}")
         self._running = False
-    
+
+    def stop(self) -> None:
+        """Stop the dispatcher loop after delivering queued messages."""
+        self.close_outbound()
+
+    def pressure(self, channel: str | None = None) -> float:
+        """Inbound fill ratio (0..1) for a channel; channels may throttle when high."""
+        return self.inbound.pressure(channel)
+
+    def metrics(self) -> dict[str, Any]:
+        """Queue depth, overflow counters and queueing latency."""
+        return {
+            "inbound": {**self.inbound.depth(), **self.inbound.stats},
+            "outbound": {"total": self.outbound.qsize(), "wait_ms_avg": self.outbound.wait_ms_avg},
+        }
+
     @property
     def inbound_size(self) -> int:
         """Number of pending inbound messages."""
         return self.inbound.qsize()
-    
+
     @property
     def outbound_size(self) -> int:
         """Number of pending outbound messages."""
@@ -119,7 +119,10 @@ class BaseChannel(ABC):
             metadata=metadata or {}
         )
         
-        await self.bus.publish_inbound(msg)
+        if not await self.bus.publish_inbound(msg):
+            logger.warning(
+                f"Inbound queue full, message from {sender_id} on channel {self.name} rejected"
+            )
     
     @property
     def is_running(self) -> bool:
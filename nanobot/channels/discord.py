@@ -13,6 +13,8 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import DiscordConfig
+from nanobot.media.store import MediaStore
+from nanobot.utils.helpers import get_data_path
 
 
 DISCORD_API_BASE = "https://discord.com/api/v10"
@@ -24,9 +26,10 @@ class DiscordChannel(BaseChannel):
 
     name = "discord"
 
-    def __init__(self, config: DiscordConfig, bus: MessageBus):
+    def __init__(self, config: DiscordConfig, bus: MessageBus, media: MediaStore | None = None):
         super().__init__(config, bus)
         self.config: DiscordConfig = config
+        self.media = media or MediaStore(get_data_path() / "media")
         self._ws: websockets.WebSocketClientProtocol | None = None
         self._seq: int | None = None
         self._heartbeat_task: asyncio.Task | None = None
@@ -199,7 +202,6 @@ class DiscordChannel(BaseChannel):
 
         content_parts = [content] if content else []
         media_paths: list[str] = []
-        media_dir = Path.home() / ".nanobot" / "media"
 
         for attachment in payload.get("attachments") or []:
             url = attachment.get("url")
@@ -211,11 +213,9 @@ class DiscordChannel(BaseChannel):
                 content_parts.append(f"[attachment: {filename} - too large]")
                 continue
             try:
-                media_dir.mkdir(parents=True, exist_ok=True)
-                file_path = media_dir / f"{attachment.get('id', 'file')}_{filename.replace('/', '_')}"
-                resp = await self._http.get(url)
-                resp.raise_for_status()
-                file_path.write_bytes(resp.content)
+                async with self._http.stream("GET", url) as resp:
+                    resp.raise_for_status()
+                    file_path = await self.media.save_stream(resp.aiter_bytes(), Path(filename).suffix.lower())
                 media_paths.append(str(file_path))
                 content_parts.append(f"[attachment: {file_path}]")
             except Exception as e:
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 from typing import Any
 
 from loguru import logger
@@ -11,6 +12,9 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import Config
+from nanobot.media.store import MediaStore
+from nanobot.providers.transcription import create_transcriber
+from nanobot.utils.helpers import get_data_path
 
 
 class ChannelManager:
@@ -21,13 +25,28 @@ class ChannelManager:
     - Initialize enabled channels (Telegram, WhatsApp, etc.)
     - Start/stop channels
     - Route outbound messages
+
+    Outbound sends run concurrently: each chat gets its own ordered lane, and
+    each channel caps how many sends it has in flight, so a slow SMTP send or
+    a Discord rate-limit retry doesn't hold up replies elsewhere.
     """
     
-    def __init__(self, config: Config, bus: MessageBus):
+    def __init__(self, config: Config, bus: MessageBus, media: MediaStore | None = None):
         self.config = config
         self.bus = bus
         self.channels: dict[str, BaseChannel] = {}
         self._dispatch_task: asyncio.Task | None = None
+        self._max_inflight = max(1, config.gateway.bus.max_inflight_per_channel)
+        self._lanes: dict[tuple[str, str], deque[OutboundMessage]] = {}
+        self._lane_tasks: set[asyncio.Task] = set()
+        self._send_limits: dict[str, asyncio.Semaphore] = {}
+        # Shared with the agent when both run in this process, so one index governs the directory
+        self.media = media or MediaStore(
+            get_data_path() / "media",
+            max_bytes=config.media.max_size_mb * 1024 * 1024,
+            cache_bytes=0,  # Channels only write; the agent encodes
+        )
+        self.transcriber = create_transcriber(config.media.transcription, config.providers.groq.api_key)
         
         self._init_channels()
     
@@ -41,7 +60,8 @@ class ChannelManager:
                 self.channels["telegram"] = TelegramChannel(
                     self.config.channels.telegram,
                     self.bus,
-                    groq_api_key=self.config.providers.groq.api_key,
+                    media=self.media,
+                    transcriber=self.transcriber,
                 )
                 logger.info("Telegram channel enabled")
             except ImportError as e:
@@ -63,7 +83,7 @@ class ChannelManager:
             try:
                 from nanobot.channels.discord import DiscordChannel
                 self.channels["discord"] = DiscordChannel(
-                    self.config.channels.discord, self.bus
+                    self.config.channels.discord, self.bus, media=self.media
                 )
                 logger.info("Discord channel enabled")
             except ImportError as e:
@@ -162,15 +182,17 @@ class ChannelManager:
         # Wait for all to complete (they should run forever)
         await asyncio.gather(*tasks, return_exceptions=True)
     
-    async def stop_all(self) -> None:
-        """Stop all channels and the dispatcher."""
+    async def stop_all(self, drain_timeout: float = 10.0) -> None:
+        """Stop the dispatcher (after delivering queued replies) and all channels."""
         logger.info("Stopping all channels...")
         
-        # Stop dispatcher
+        # Drain outbound queue, then stop dispatcher
         if self._dispatch_task:
-            self._dispatch_task.cancel()
+            self.bus.close_outbound()
             try:
-                await self._dispatch_task
+                await asyncio.wait_for(self._dispatch_task, timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Outbound drain timed out, {self.bus.outbound_size} messages undelivered")
             except asyncio.CancelledError:
                 pass
         
@@ -181,31 +203,48 @@ class ChannelManager:
                 logger.info(f"Stopped {name} channel")
             except Exception as e:
                 logger.error(f"Error stopping {name}: {e}")
+        if self.transcriber:
+            await self.transcriber.close()
     
     async def _dispatch_outbound(self) -> None:
         """Dispatch outbound messages to the appropriate channel."""
         logger.info("Outbound dispatcher started")
         
-        while True:
-            try:
-                msg = await asyncio.wait_for(
-                    self.bus.consume_outbound(),
-                    timeout=1.0
-                )
-                
-                channel = self.channels.get(msg.channel)
-                if channel:
+        async for msg in self.bus.outbound_messages():
+            channel = self.channels.get(msg.channel)
+            if not channel:
+                logger.warning(f"Unknown channel: {msg.channel}")
+                continue
+            
+            key = (msg.channel, msg.chat_id)
+            if key in self._lanes:
+                # A sender for this chat is already running; keep ordering
+                self._lanes[key].append(msg)
+                continue
+            self._lanes[key] = deque([msg])
+            task = asyncio.create_task(self._send_lane(key, channel))
+            self._lane_tasks.add(task)
+            task.add_done_callback(self._lane_tasks.discard)
+        
+        # Bus closed: finish sends that are still queued per chat
+        if self._lane_tasks:
+            await asyncio.gather(*self._lane_tasks, return_exceptions=True)
+        logger.info("Outbound dispatcher stopped")
+    
+    async def _send_lane(self, key: tuple[str, str], channel: BaseChannel) -> None:
+        """Send one chat's messages in order, within the channel's in-flight limit."""
+        lane = self._lanes[key]
+        limit = self._send_limits.setdefault(key[0], asyncio.Semaphore(self._max_inflight))
+        try:
+            while lane:
+                msg = lane.popleft()
+                async with limit:
                     try:
                         await channel.send(msg)
                     except Exception as e:
                         logger.error(f"Error sending to {msg.channel}: {e}")
-                else:
-                    logger.warning(f"Unknown channel: {msg.channel}")
-                    
-            except asyncio.TimeoutError:
-                continue
-            except asyncio.CancelledError:
-                break
+        finally:
+            del self._lanes[key]
     
     def get_channel(self, name: str) -> BaseChannel | None:
         """Get a channel by name."""
@@ -13,6 +13,9 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import TelegramConfig
+from nanobot.media.store import MediaStore
+from nanobot.providers.transcription import GroqTranscriptionProvider, TranscriptionProvider
+from nanobot.utils.helpers import get_data_path
 
 
 def _markdown_to_telegram_html(text: str) -> str:
@@ -91,6 +94,8 @@ class TelegramChannel(BaseChannel):
     BOT_COMMANDS = [
         BotCommand("start", "Start the bot"),
         BotCommand("new", "Start a new conversation"),
+        BotCommand("tasks", "Show background tasks"),
+        BotCommand("stop", "Stop background tasks"),
         BotCommand("help", "Show available commands"),
     ]
     
@@ -99,10 +104,16 @@ class TelegramChannel(BaseChannel):
         config: TelegramConfig,
         bus: MessageBus,
         groq_api_key: str = "",
+        media: MediaStore | None = None,
+        transcriber: TranscriptionProvider | None = None,
     ):
         super().__init__(config, bus)
         self.config: TelegramConfig = config
         self.groq_api_key = groq_api_key
+        self.media = media or MediaStore(get_data_path() / "media")
+        if transcriber is None and groq_api_key:
+            transcriber = GroqTranscriptionProvider(api_key=groq_api_key)
+        self.transcriber = transcriber
         self._app: Application | None = None
         self._chat_ids: dict[str, int] = {}  # Map sender_id to chat_id for replies
         self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> typing loop task
@@ -126,6 +137,8 @@ class TelegramChannel(BaseChannel):
         # Add command handlers
         self._app.add_handler(CommandHandler("start", self._on_start))
         self._app.add_handler(CommandHandler("new", self._forward_command))
+        self._app.add_handler(CommandHandler("tasks", self._forward_command))
+        self._app.add_handler(CommandHandler("stop", self._forward_command))
         self._app.add_handler(CommandHandler("help", self._forward_command))
         
         # Add message handler for text, photos, voice, documents
@@ -282,21 +295,20 @@ class TelegramChannel(BaseChannel):
                 file = await self._app.bot.get_file(media_file.file_id)
                 ext = self._get_extension(media_type, getattr(media_file, 'mime_type', None))
                 
-                # Save to workspace/media/
-                from pathlib import Path
-                media_dir = Path.home() / ".nanobot" / "media"
-                media_dir.mkdir(parents=True, exist_ok=True)
-                
-                file_path = media_dir / f"{media_file.file_id[:16]}{ext}"
-                await file.download_to_drive(str(file_path))
+                # Stream to disk, then file under its content hash in the media store
+                tmp_path = self.media.temp_path(ext)
+                try:
+                    await file.download_to_drive(str(tmp_path))
+                except BaseException:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+                file_path = await self.media.adopt(tmp_path)
                 
                 media_paths.append(str(file_path))
                 
                 # Handle voice transcription
-                if media_type == "voice" or media_type == "audio":
-                    from nanobot.providers.transcription import GroqTranscriptionProvider
-                    transcriber = GroqTranscriptionProvider(api_key=self.groq_api_key)
-                    transcription = await transcriber.transcribe(file_path)
+                if (media_type == "voice" or media_type == "audio") and self.transcriber:
+                    transcription = await self.transcriber.transcribe(file_path)
                     if transcription:
                         logger.info(f"Transcribed {media_type}: {transcription[:50]}...")
                         content_parts.append(f"[transcription: {transcription}]")
@@ -279,20 +279,60 @@ This file stores important information that should persist across sessions.
 
 
 def _make_provider(config):
-    """Create LiteLLMProvider from config. Exits if no API key found."""
+    """Create the LLM provider from config. Exits if no API key found.
+
+    OpenAI-compatible endpoints (vLLM, custom) use the native HTTP provider;
+    everything else goes through LiteLLM.
+    """
     from nanobot.providers.litellm_provider import LiteLLMProvider
+    from nanobot.providers.registry import find_by_name
     p = config.get_provider()
     model = config.agents.defaults.model
     if not (p and p.api_key) and not model.startswith("bedrock/"):
         console.print("[red]Error: No API key configured.[/red]")
         console.print("Set one in ~/.nanobot/config.json under providers section")
         raise typer.Exit(1)
+    provider_name = config.get_provider_name()
+    api_base = config.get_api_base()
+    spec = find_by_name(provider_name) if provider_name else None
+    if spec and spec.native_openai and api_base:
+        from nanobot.providers.openai_compat_provider import OpenAICompatProvider
+        return OpenAICompatProvider(
+            api_key=p.api_key,
+            api_base=api_base,
+            default_model=model,
+            extra_headers=p.extra_headers,
+            provider_name=provider_name,
+        )
     return LiteLLMProvider(
         api_key=p.api_key if p else None,
-        api_base=config.get_api_base(),
+        api_base=api_base,
         default_model=model,
         extra_headers=p.extra_headers if p else None,
-        provider_name=config.get_provider_name(),
+        provider_name=provider_name,
+    )
+
+
+def _make_session_manager(config):
+    """Create the session manager for the configured storage backend."""
+    from nanobot.session.manager import SessionManager
+    from nanobot.session.sqlite import SQLiteSessionManager
+
+    if config.sessions.backend == "sqlite":
+        db_path = Path(config.sessions.db_path).expanduser() if config.sessions.db_path else None
+        return SQLiteSessionManager(config.workspace_path, db_path=db_path)
+    return SessionManager(config.workspace_path)
+
+
+def _make_media_store(config):
+    """Create the media store; one per process, shared by the channels and the agent."""
+    from nanobot.media.store import MediaStore
+    from nanobot.utils.helpers import get_data_path
+
+    return MediaStore(
+        get_data_path() / "media",
+        max_bytes=config.media.max_size_mb * 1024 * 1024,
+        cache_bytes=config.media.data_url_cache_mb * 1024 * 1024,
     )
 
 
@@ -301,35 +341,30 @@ def _make_provider(config):
 # ============================================================================
 
 
-@app.command()
-def gateway(
-    port: int = typer.Option(18790, "--port", "-p", help="Gateway port"),
-    verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
-):
-    """Start the nanobot gateway."""
-    from nanobot.config.loader import load_config, get_data_dir
-    from nanobot.bus.queue import MessageBus
+def _make_agent_runtime(config, bus, with_scheduler: bool = True, media=None):
+    """Create the agent loop, plus cron and heartbeat services if requested.
+
+    Returns (agent, cron, heartbeat); cron and heartbeat are None without scheduler.
+    """
     from nanobot.agent.loop import AgentLoop
-    from nanobot.channels.manager import ChannelManager
-    from nanobot.session.manager import SessionManager
+    from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
     from nanobot.heartbeat.service import HeartbeatService
     
-    if verbose:
-        import logging
-        logging.basicConfig(level=logging.DEBUG)
-    
-    console.print(f"{__logo__} Starting nanobot gateway on port {port}...")
-    
-    config = load_config()
-    bus = MessageBus()
     provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    session_manager = _make_session_manager(config)
     
     # Create cron service first (callback set after agent creation)
-    cron_store_path = get_data_dir() / "cron" / "jobs.json"
-    cron = CronService(cron_store_path)
+    cron = None
+    if with_scheduler:
+        cron_store_path = get_data_dir() / "cron" / "jobs.json"
+        cron = CronService(
+            cron_store_path,
+            max_concurrent=config.gateway.cron.max_concurrent_jobs,
+            misfire_policy=config.gateway.cron.misfire_policy,
+            misfire_grace_ms=config.gateway.cron.misfire_grace_s * 1000,
+        )
     
     # Create agent with cron service
     agent = AgentLoop(
@@ -341,22 +376,32 @@ def gateway(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        memory_scope=config.agents.defaults.memory_scope,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
+        subagent_config=config.agents.subagents,
+        media_config=config.media,
+        media=media or _make_media_store(config),
+        scheduled_config=config.agents.scheduled,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         session_manager=session_manager,
     )
+    if not with_scheduler:
+        return agent, None, None
     
     # Set cron callback (needs agent)
     async def on_cron_job(job: CronJob) -> str | None:
-        """Execute a cron job through the agent."""
-        response = await agent.process_direct(
+        """Execute a cron job on the agent's scheduled lane."""
+        response, usage = await agent.process_scheduled(
             job.payload.message,
             session_key=f"cron:{job.id}",
             channel=job.payload.channel or "cli",
             chat_id=job.payload.to or "direct",
+            model=job.payload.model,
         )
+        job.state.last_tokens = usage.get("total_tokens", 0)
+        job.state.total_tokens += job.state.last_tokens
         if job.payload.deliver and job.payload.to:
             from nanobot.bus.events import OutboundMessage
             await bus.publish_outbound(OutboundMessage(
@@ -369,44 +414,235 @@ def gateway(
     
     # Create heartbeat service
     async def on_heartbeat(prompt: str) -> str:
-        """Execute heartbeat through the agent."""
-        return await agent.process_direct(prompt, session_key="heartbeat")
+        """Execute heartbeat on the agent's scheduled lane."""
+        response, _ = await agent.process_scheduled(prompt, session_key="heartbeat")
+        return response
     
     heartbeat = HeartbeatService(
         workspace=config.workspace_path,
         on_heartbeat=on_heartbeat,
-        interval_s=30 * 60,  # 30 minutes
-        enabled=True
+        interval_s=config.gateway.heartbeat.interval_s,
+        enabled=config.gateway.heartbeat.enabled,
+        max_interval_s=config.gateway.heartbeat.max_interval_s,
+        watch_interval_s=config.gateway.heartbeat.watch_interval_s,
+    )
+    return agent, cron, heartbeat
+
+
+def _install_shutdown_handler(shutdown: asyncio.Event) -> None:
+    """Set the event on SIGINT/SIGTERM instead of raising KeyboardInterrupt."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, shutdown.set)
+        except NotImplementedError:
+            pass  # Windows: falls back to KeyboardInterrupt
+
+
+async def _wait_for_shutdown(shutdown: asyncio.Event, tasks: dict[asyncio.Task, str]) -> str | None:
+    """
+    Wait for a shutdown signal or for a background task to die.
+
+    Returns None on a normal shutdown, else a description of what failed.
+    A task that returns normally is only a failure if it is the agent
+    (channels return at once when none are enabled).
+    """
+    waiter = asyncio.create_task(shutdown.wait())
+    pending = {waiter, *tasks}
+    try:
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if waiter in done:
+                return None
+            for task in done:
+                name = tasks[task]
+                if task.cancelled():
+                    return f"{name} was cancelled"
+                if (exc := task.exception()) is not None:
+                    return f"{name} failed: {exc!r}"
+                if name == "agent":
+                    return "agent loop exited unexpectedly"
+    finally:
+        waiter.cancel()
+
+
+@app.command()
+def gateway(
+    port: int = typer.Option(18790, "--port", "-p", help="Gateway port"),
+    workers: int = typer.Option(1, "--workers", "-w", help="Agent worker processes (>1 shards sessions across cores)"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
+):
+    """Start the nanobot gateway."""
+    from nanobot.bus.ipc import IPCBusServer
+    from nanobot.bus.queue import MessageBus
+    from nanobot.channels.manager import ChannelManager
+    from nanobot.config.loader import get_data_dir, load_config
+    
+    if verbose:
+        import logging
+        logging.basicConfig(level=logging.DEBUG)
+    
+    console.print(f"{__logo__} Starting nanobot gateway on port {port}...")
+    
+    config = load_config()
+    bus_cfg = config.gateway.bus
+    bus = MessageBus(
+        max_inbound=bus_cfg.max_inbound,
+        max_outbound=bus_cfg.max_outbound,
+        per_channel_limit=bus_cfg.per_channel_limit,
+        per_session_limit=bus_cfg.per_session_limit,
+        overflow_policy=bus_cfg.overflow_policy,
+        publish_timeout=bus_cfg.publish_timeout_s,
     )
     
+    # Single process: agent, cron and heartbeat live here.
+    # Multi-worker: agents run in worker processes (cron/heartbeat on worker 0)
+    # and this process only hosts the channels and the IPC bus.
+    agent = cron = heartbeat = ipc = None
+    media = _make_media_store(config)
+    if workers > 1:
+        _make_provider(config)  # fail fast on missing API key
+        socket_path = get_data_dir() / "run" / "bus.sock"
+        ipc = IPCBusServer(bus, socket_path, workers)
+    else:
+        agent, cron, heartbeat = _make_agent_runtime(config, bus, media=media)
+    
     # Create channel manager
-    channels = ChannelManager(config, bus)
+    channels = ChannelManager(config, bus, media=media)
     
     if channels.enabled_channels:
         console.print(f"[green]✓[/green] Channels enabled: {', '.join(channels.enabled_channels)}")
     else:
         console.print("[yellow]Warning: No channels enabled[/yellow]")
     
-    cron_status = cron.status()
-    if cron_status["jobs"] > 0:
-        console.print(f"[green]✓[/green] Cron: {cron_status['jobs']} scheduled jobs")
-    
-    console.print(f"[green]✓[/green] Heartbeat: every 30m")
+    if ipc:
+        console.print(f"[green]✓[/green] Workers: {workers} agent processes (cron/heartbeat on worker 0)")
+    else:
+        cron_status = cron.status()
+        if cron_status["jobs"] > 0:
+            console.print(f"[green]✓[/green] Cron: {cron_status['jobs']} scheduled jobs")
+        
+        if heartbeat.enabled:
+            console.print(f"[green]✓[/green] Heartbeat: every {heartbeat.interval_s // 60}m")
     
     async def run():
-        try:
+        # Signal-driven shutdown: stop intake, let in-flight turns finish,
+        # deliver queued replies, then stop channels.
+        shutdown = asyncio.Event()
+        _install_shutdown_handler(shutdown)
+        
+        procs: dict[int, asyncio.subprocess.Process] = {}
+        stopping = asyncio.Event()
+        supervisors: dict[asyncio.Task, str] = {}
+        agent_task = None
+        
+        async def supervise(i: int) -> None:
+            """Run worker i, restarting it if it dies; give up if it keeps crashing."""
+            crashes: list[float] = []
+            loop = asyncio.get_running_loop()
+            while not stopping.is_set():
+                procs[i] = await asyncio.create_subprocess_exec(
+                    sys.executable, "-m", "nanobot", "worker",
+                    "--index", str(i), "--workers", str(workers), "--socket", str(ipc.socket_path),
+                )
+                code = await procs[i].wait()
+                if stopping.is_set():
+                    return
+                now = loop.time()
+                crashes = [t for t in crashes if now - t < 60] + [now]
+                if len(crashes) > 5:
+                    raise RuntimeError(f"exited with code {code} {len(crashes)} times in a minute")
+                console.print(f"[yellow]Worker {i} exited with code {code}, restarting[/yellow]")
+                await asyncio.sleep(1)
+        
+        if ipc:
+            await ipc.start()
+            for i in range(workers):
+                supervisors[asyncio.create_task(supervise(i))] = f"worker {i}"
+        else:
             await cron.start()
             await heartbeat.start()
-            await asyncio.gather(
-                agent.run(),
-                channels.start_all(),
-            )
-        except KeyboardInterrupt:
+            agent_task = asyncio.create_task(agent.run())
+        channels_task = asyncio.create_task(channels.start_all())
+        watched = {channels_task: "channels", **supervisors}
+        if agent_task:
+            watched[agent_task] = "agent"
+        failure = None
+        try:
+            failure = await _wait_for_shutdown(shutdown, watched)
+            if failure:
+                console.print(f"[red]Gateway stopping: {failure}[/red]")
+        finally:
             console.print("\nShutting down...")
+            if ipc:
+                stopping.set()
+                bus.close_inbound()
+                await ipc.wait_closed(timeout=30)
+                for proc in procs.values():
+                    if proc.returncode is None:
+                        proc.terminate()
+                await asyncio.gather(*supervisors, return_exceptions=True)
+                await asyncio.gather(*(proc.wait() for proc in procs.values()))
+            else:
+                heartbeat.stop()
+                cron.stop()
+                agent.stop()
+                try:
+                    await asyncio.wait_for(agent_task, timeout=30)
+                except asyncio.TimeoutError:
+                    console.print("[yellow]Agent did not finish in time, abandoning in-flight work[/yellow]")
+                except Exception:
+                    pass  # Already reported as the failure
+            await channels.stop_all()
+            channels_task.cancel()
+        return failure
+    
+    try:
+        failure = asyncio.run(run())
+    except KeyboardInterrupt:
+        failure = None
+    if failure:
+        raise typer.Exit(1)
+
+
+@app.command(hidden=True)
+def worker(
+    index: int = typer.Option(..., "--index", help="Worker index (0-based)"),
+    workers: int = typer.Option(..., "--workers", help="Total number of workers"),
+    socket: str = typer.Option(..., "--socket", help="IPC bus socket path"),
+):
+    """Run one agent worker process for a multi-worker gateway."""
+    from nanobot.agent.tools.cron import RemoteCronTool, serve_cron_call
+    from nanobot.bus.ipc import IPCWorkerLink
+    from nanobot.bus.queue import MessageBus
+    from nanobot.config.loader import load_config
+    
+    config = load_config()
+    bus = MessageBus()
+    agent, cron, heartbeat = _make_agent_runtime(config, bus, with_scheduler=(index == 0))
+    link = IPCWorkerLink(bus, Path(socket), index)
+    if cron:
+        link.serve("cron", lambda params, channel, chat_id: serve_cron_call(cron, params, channel, chat_id))
+    else:
+        # Only worker 0 runs the scheduler; other workers' cron calls go to it
+        agent.tools.register(RemoteCronTool(link.call))
+    
+    async def run():
+        # The front process coordinates shutdown; Ctrl+C reaches the whole
+        # process group, so ignore SIGINT and drain on the front's "close".
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, bus.close_inbound)
+        
+        if cron:
+            await cron.start()
+            await heartbeat.start()
+        link_task = asyncio.create_task(link.run())
+        await agent.run()
+        if cron:
             heartbeat.stop()
             cron.stop()
-            agent.stop()
-            await channels.stop_all()
+        bus.close_outbound()
+        await link_task
     
     asyncio.run(run())
 
@@ -450,9 +686,14 @@ def agent(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        memory_scope=config.agents.defaults.memory_scope,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
+        subagent_config=config.agents.subagents,
+        media_config=config.media,
+        media=_make_media_store(config),
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        session_manager=_make_session_manager(config),
     )
     
     # Show spinner when logs are off (no output to miss); skip when logs are on
@@ -469,6 +710,8 @@ def agent(
             with _thinking_ctx():
                 response = await agent_loop.process_direct(message, session_id)
             _print_agent_response(response, render_markdown=markdown)
+            # Finish memory consolidation that was still debouncing
+            await agent_loop.consolidation.drain()
         
         asyncio.run(run_once())
     else:
@@ -508,6 +751,8 @@ def agent(
                     _restore_terminal()
                     console.print("\nGoodbye!")
                     break
+            # Finish memory consolidation that was still debouncing
+            await agent_loop.consolidation.drain()
         
         asyncio.run(run_interactive())
 
@@ -708,6 +953,8 @@ def cron_list(
             sched = f"every {(job.schedule.every_ms or 0) // 1000}s"
         elif job.schedule.kind == "cron":
             sched = job.schedule.expr or ""
+            if job.schedule.tz:
+                sched += f" ({job.schedule.tz})"
         else:
             sched = "one-time"
         
@@ -730,10 +977,12 @@ def cron_add(
     message: str = typer.Option(..., "--message", "-m", help="Message for agent"),
     every: int = typer.Option(None, "--every", "-e", help="Run every N seconds"),
     cron_expr: str = typer.Option(None, "--cron", "-c", help="Cron expression (e.g. '0 9 * * *')"),
+    tz: str = typer.Option(None, "--tz", help="IANA timezone for --cron (default: local time)"),
     at: str = typer.Option(None, "--at", help="Run once at time (ISO format)"),
     deliver: bool = typer.Option(False, "--deliver", "-d", help="Deliver response to channel"),
     to: str = typer.Option(None, "--to", help="Recipient for delivery"),
     channel: str = typer.Option(None, "--channel", help="Channel for delivery (e.g. 'telegram', 'whatsapp')"),
+    model: str = typer.Option(None, "--model", help="Model for this job's turns (default: agents.scheduled.model)"),
 ):
     """Add a scheduled job."""
     from nanobot.config.loader import get_data_dir
@@ -744,7 +993,7 @@ def cron_add(
     if every:
         schedule = CronSchedule(kind="every", every_ms=every * 1000)
     elif cron_expr:
-        schedule = CronSchedule(kind="cron", expr=cron_expr)
+        schedule = CronSchedule(kind="cron", expr=cron_expr, tz=tz)
     elif at:
         import datetime
         dt = datetime.datetime.fromisoformat(at)
@@ -756,14 +1005,19 @@ def cron_add(
     store_path = get_data_dir() / "cron" / "jobs.json"
     service = CronService(store_path)
     
-    job = service.add_job(
-        name=name,
-        schedule=schedule,
-        message=message,
-        deliver=deliver,
-        to=to,
-        channel=channel,
-    )
+    try:
+        job = service.add_job(
+            name=name,
+            schedule=schedule,
+            message=message,
+            deliver=deliver,
+            to=to,
+            channel=channel,
+            model=model,
+        )
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
     
     console.print(f"[green]✓[/green] Added job '{job.name}' ({job.id})")
 
@@ -826,6 +1080,71 @@ def cron_run(
         console.print(f"[red]Failed to run job {job_id}[/red]")
 
 
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("list")
+def sessions_list(
+    channel: str = typer.Option(None, "--channel", "-c", help="Only sessions from this channel"),
+    limit: int = typer.Option(20, "--limit", "-n", help="Sessions per page"),
+    page: int = typer.Option(1, "--page", "-p", help="Page number"),
+):
+    """List conversation sessions, most recent first."""
+    from nanobot.config.loader import load_config
+    
+    config = load_config()
+    sessions = _make_session_manager(config).list_sessions(
+        channel=channel, offset=(max(page, 1) - 1) * limit, limit=limit,
+    )
+    
+    if not sessions:
+        console.print("No sessions.")
+        return
+    
+    table = Table(title="Sessions")
+    table.add_column("Key", style="cyan")
+    table.add_column("Messages", justify="right")
+    table.add_column("Updated")
+    
+    for s in sessions:
+        updated = (s.get("updated_at") or "")[:16].replace("T", " ")
+        table.add_row(s["key"], str(s.get("messages", "")), updated)
+    
+    console.print(table)
+
+
+@sessions_app.command("migrate")
+def sessions_migrate(
+    db: str = typer.Option(None, "--db", help="Target SQLite file (default: sessions.dbPath or ~/.nanobot/sessions/sessions.db)"),
+):
+    """Copy JSONL sessions into the SQLite backend."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.manager import SessionManager
+    from nanobot.session.sqlite import SQLiteSessionManager, migrate_jsonl
+    
+    config = load_config()
+    target_path = db or config.sessions.db_path
+    source = SessionManager(config.workspace_path)
+    target = SQLiteSessionManager(
+        config.workspace_path,
+        db_path=Path(target_path).expanduser() if target_path else None,
+    )
+    try:
+        count = migrate_jsonl(source, target)
+    finally:
+        target.close()
+    
+    console.print(f"[green]✓[/green] Migrated {count} sessions to {target.db_path}")
+    if config.sessions.backend != "sqlite":
+        console.print('Set "sessions": {"backend": "sqlite"} in your config to use it.')
+
+
 # ============================================================================
 # Status Commands
 # ============================================================================
@@ -1,6 +1,7 @@
 """Configuration schema using Pydantic."""
 
 from pathlib import Path
+from typing import Literal
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -163,11 +164,34 @@ class AgentDefaults(BaseModel):
     temperature: float = 0.7
     max_tool_iterations: int = 20
     memory_window: int = 50
+    memory_scope: Literal["global", "user", "session"] = "global"  # user and session scopes add private memory to the shared one
+
+
+class ScheduledConfig(BaseModel):
+    """Execution lane for cron and heartbeat turns."""
+    model: str = ""  # Model for scheduled turns (default: agent model; a cron job's own model wins)
+    max_concurrent: int = 2  # Scheduled turns running at once, independent of chat traffic
+    history_window: int = 10  # Prior messages of the job's session included in the prompt
+
+
+class SubagentsConfig(BaseModel):
+    """Background subagent pool."""
+    max_concurrent: int = 4  # Subagents running at once; further spawns queue
+    max_per_session: int = 3  # Queued or running subagents per originating chat
+    max_iterations: int = 15
 
 
 class AgentsConfig(BaseModel):
     """Agent configuration."""
     defaults: AgentDefaults = Field(default_factory=AgentDefaults)
+    scheduled: ScheduledConfig = Field(default_factory=ScheduledConfig)
+    subagents: SubagentsConfig = Field(default_factory=SubagentsConfig)
+
+
+class SessionsConfig(BaseModel):
+    """Conversation session storage."""
+    backend: Literal["jsonl", "sqlite"] = "jsonl"  # jsonl: one file per session; sqlite: one database
+    db_path: str = ""  # SQLite database file (default: ~/.nanobot/sessions/sessions.db)
 
 
 class ProviderConfig(BaseModel):
@@ -194,10 +218,42 @@ class ProvidersConfig(BaseModel):
     aihubmix: ProviderConfig = Field(default_factory=ProviderConfig)  # AiHubMix API gateway
 
 
+class BusConfig(BaseModel):
+    """Message bus limits (0 = unlimited)."""
+    max_inbound: int = 1000
+    max_outbound: int = 1000
+    per_channel_limit: int = 500  # Caps a flood in one channel (e.g. a busy Mochat panel)
+    per_session_limit: int = 20  # Caps a single chat's backlog
+    # What happens at a limit: "reject" refuses the new message (at the global limit the
+    # channel first waits for room), "drop_oldest" evicts queued messages, "coalesce"
+    # merges into the sender's pending message in that chat
+    overflow_policy: Literal["drop_oldest", "reject", "coalesce"] = "reject"
+    publish_timeout_s: float = 60.0  # Under "reject", how long a channel waits for global room before giving up
+    max_inflight_per_channel: int = 4  # Concurrent outbound sends per channel (ordered per chat)
+
+
+class CronConfig(BaseModel):
+    """Scheduled job execution."""
+    max_concurrent_jobs: int = 4
+    misfire_policy: Literal["run_once", "skip"] = "run_once"  # Runs missed while down: catch up once, or skip
+    misfire_grace_s: int = 3600  # Missed runs older than this are skipped
+
+
+class HeartbeatConfig(BaseModel):
+    """Periodic HEARTBEAT.md check."""
+    enabled: bool = True
+    interval_s: int = 30 * 60
+    max_interval_s: int = 4 * 60 * 60  # Backoff cap while HEARTBEAT.md is unchanged and checks return OK
+    watch_interval_s: float = 5.0  # How often HEARTBEAT.md is polled for edits
+
+
 class GatewayConfig(BaseModel):
     """Gateway/server configuration."""
     host: str = "0.0.0.0"
     port: int = 18790
+    bus: BusConfig = Field(default_factory=BusConfig)
+    cron: CronConfig = Field(default_factory=CronConfig)
+    heartbeat: HeartbeatConfig = Field(default_factory=HeartbeatConfig)
 
 
 class WebSearchConfig(BaseModel):
@@ -214,6 +270,12 @@ class WebToolsConfig(BaseModel):
 class ExecToolConfig(BaseModel):
     """Shell exec tool configuration."""
     timeout: int = 60
+    persistent_shell: bool = False  # Keep one shell per session so cd/env/venv persist between commands
+    shell_idle_timeout: int = 300  # Close a session's shell after this many idle seconds
+    max_output: int = 10000  # Bytes kept per stream (first and last half); the middle is dropped
+    background_jobs: bool = True  # Allow exec(background=true) with job_status/job_output/job_kill
+    max_background_jobs: int = 4
+    job_timeout: int = 3600  # Background jobs are killed after this many seconds (0 = never)
 
 
 class ToolsConfig(BaseModel):
@@ -223,13 +285,39 @@ class ToolsConfig(BaseModel):
     restrict_to_workspace: bool = False  # If true, restrict all tool access to workspace directory
 
 
+class TranscriptionConfig(BaseModel):
+    """Voice message transcription."""
+    backend: Literal["groq", "local", "none"] = "groq"  # groq needs providers.groq.apiKey; local is faster-whisper, offline
+    model: str = "base"  # Local: faster-whisper model size or path
+    device: str = "cpu"
+    compute_type: str = "int8"
+    language: str = ""  # Local: language code, empty = detect
+    workers: int = 1  # Local: worker processes, each holding a copy of the model
+    batch_size: int = 8  # Local: short clips grouped and split across the workers
+    batch_window_ms: int = 50  # Local: how long to wait for more clips to batch
+    short_clip_kb: int = 256  # Local: larger files are transcribed alone
+
+
+class MediaConfig(BaseModel):
+    """Downloaded attachments (~/.nanobot/media)."""
+    max_size_mb: int = 1024  # Least recently used files are evicted beyond this
+    data_url_cache_mb: int = 64  # Base64 encodings of images kept in memory between turns
+    image_max_dimension: int = 1568  # Long edge images are downscaled to before sending (0 = send as is)
+    image_format: Literal["jpeg", "webp"] = "jpeg"  # Re-encode format (EXIF and other metadata are stripped)
+    image_quality: int = 85
+    image_workers: int = 2  # Threads decoding and resizing images
+    transcription: TranscriptionConfig = Field(default_factory=TranscriptionConfig)
+
+
 class Config(BaseSettings):
     """Root configuration for nanobot."""
     agents: AgentsConfig = Field(default_factory=AgentsConfig)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
     channels: ChannelsConfig = Field(default_factory=ChannelsConfig)
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
+    media: MediaConfig = Field(default_factory=MediaConfig)
     
     @property
     def workspace_path(self) -> Path:
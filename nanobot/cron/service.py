@@ -1,21 +1,65 @@
 """Cron service for scheduling agent tasks."""
 
 import asyncio
+import heapq
 import json
+import os
 import time
 import uuid
+from datetime import datetime, tzinfo
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Coroutine
+from typing import TYPE_CHECKING, Any, Callable, Coroutine
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from loguru import logger
 
 from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule, CronStore
 
+if TYPE_CHECKING:
+    from croniter import croniter
+
 
 def _now_ms() -> int:
     return int(time.time() * 1000)
 
 
+@lru_cache(maxsize=1)
+def _local_zone() -> tzinfo:
+    """The system time zone, DST rules included where the platform exposes them."""
+    try:
+        with open("/etc/localtime", "rb") as f:
+            return ZoneInfo.from_file(f)
+    except (OSError, ValueError):
+        return datetime.now().astimezone().tzinfo
+
+
+@lru_cache(maxsize=4096)
+def _compile_cron(expr: str, tz: str | None) -> tuple["croniter", tzinfo]:
+    """
+    Parse a cron expression once per (expr, tz).
+
+    Parsing dominates croniter's cost, so the instance is reused and simply
+    re-pointed at a new start time for each computation.
+    """
+    from croniter import croniter
+    zone = ZoneInfo(tz) if tz else _local_zone()
+    return croniter(expr, datetime.now(zone)), zone
+
+
+def validate_schedule(schedule: CronSchedule) -> None:
+    """Raise ValueError for a cron expression or time zone that can never run."""
+    if schedule.tz:
+        try:
+            ZoneInfo(schedule.tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone: {schedule.tz}")
+    if schedule.kind == "cron":
+        from croniter import croniter
+        if not schedule.expr or not croniter.is_valid(schedule.expr):
+            raise ValueError(f"Invalid cron expression: {schedule.expr}")
+
+
 def _compute_next_run(schedule: CronSchedule, now_ms: int) -> int | None:
     """Compute next run time in ms."""
     if schedule.kind == "at":
@@ -29,120 +73,259 @@ def _compute_next_run(schedule: CronSchedule, now_ms: int) -> int | None:
     
     if schedule.kind == "cron" and schedule.expr:
         try:
-            from croniter import croniter
-            cron = croniter(schedule.expr, time.time())
-            next_time = cron.get_next()
-            return int(next_time * 1000)
+            # Evaluated as wall-clock time in the job's zone (local if unset), so DST shifts are honored
+            cron, zone = _compile_cron(schedule.expr, schedule.tz)
+            cron.set_current(datetime.fromtimestamp(now_ms / 1000, zone))
+            return int(cron.get_next(float) * 1000)
         except Exception:
             return None
     
     return None
 
 
+def _job_from_dict(j: dict[str, Any]) -> CronJob:
+    return CronJob(
+        id=j["id"],
+        name=j["name"],
+        enabled=j.get("enabled", True),
+        schedule=CronSchedule(
+            kind=j["schedule"]["kind"],
+            at_ms=j["schedule"].get("atMs"),
+            every_ms=j["schedule"].get("everyMs"),
+            expr=j["schedule"].get("expr"),
+            tz=j["schedule"].get("tz"),
+        ),
+        payload=CronPayload(
+            kind=j["payload"].get("kind", "agent_turn"),
+            message=j["payload"].get("message", ""),
+            deliver=j["payload"].get("deliver", False),
+            channel=j["payload"].get("channel"),
+            to=j["payload"].get("to"),
+            model=j["payload"].get("model"),
+        ),
+        state=CronJobState(
+            next_run_at_ms=j.get("state", {}).get("nextRunAtMs"),
+            last_run_at_ms=j.get("state", {}).get("lastRunAtMs"),
+            last_status=j.get("state", {}).get("lastStatus"),
+            last_error=j.get("state", {}).get("lastError"),
+            last_duration_ms=j.get("state", {}).get("lastDurationMs"),
+            last_tokens=j.get("state", {}).get("lastTokens"),
+            total_tokens=j.get("state", {}).get("totalTokens", 0),
+            runs=j.get("state", {}).get("runs", 0),
+        ),
+        created_at_ms=j.get("createdAtMs", 0),
+        updated_at_ms=j.get("updatedAtMs", 0),
+        delete_after_run=j.get("deleteAfterRun", False),
+    )
+
+
+def _job_to_dict(j: CronJob) -> dict[str, Any]:
+    return {
+        "id": j.id,
+        "name": j.name,
+        "enabled": j.enabled,
+        "schedule": {
+            "kind": j.schedule.kind,
+            "atMs": j.schedule.at_ms,
+            "everyMs": j.schedule.every_ms,
+            "expr": j.schedule.expr,
+            "tz": j.schedule.tz,
+        },
+        "payload": {
+            "kind": j.payload.kind,
+            "message": j.payload.message,
+            "deliver": j.payload.deliver,
+            "channel": j.payload.channel,
+            "to": j.payload.to,
+            "model": j.payload.model,
+        },
+        "state": {
+            "nextRunAtMs": j.state.next_run_at_ms,
+            "lastRunAtMs": j.state.last_run_at_ms,
+            "lastStatus": j.state.last_status,
+            "lastError": j.state.last_error,
+            "lastDurationMs": j.state.last_duration_ms,
+            "lastTokens": j.state.last_tokens,
+            "totalTokens": j.state.total_tokens,
+            "runs": j.state.runs,
+        },
+        "createdAtMs": j.created_at_ms,
+        "updatedAtMs": j.updated_at_ms,
+        "deleteAfterRun": j.delete_after_run,
+    }
+
+
 class CronService:
-    """Service for managing and executing scheduled jobs."""
+    """
+    Service for managing and executing scheduled jobs.
+
+    Jobs are persisted as a snapshot (jobs.json) plus an append-only journal
+    (jobs.journal) of changes since the snapshot, so adding a job or
+    recording a run writes one line instead of the whole store. The running
+    service folds the journal into a new snapshot once it grows, and picks up
+    lines appended by other processes (e.g. `nanobot cron add`) on each tick.
+
+    Due jobs come off a min-heap keyed on next_run_at_ms and run concurrently
+    up to max_concurrent. Runs missed while the service was down are caught up
+    once if they are at most misfire_grace_ms late (policy "run_once"), or
+    skipped (policy "skip").
+    """
+    
+    MISFIRE_POLICIES = ("run_once", "skip")
     
     def __init__(
         self,
         store_path: Path,
-        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None
+        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None,
+        max_concurrent: int = 4,
+        misfire_policy: str = "run_once",
+        misfire_grace_ms: int = 3600 * 1000,
     ):
+        if misfire_policy not in self.MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy: {misfire_policy}")
         self.store_path = store_path
+        self.journal_path = store_path.with_suffix(".journal")
         self.on_job = on_job  # Callback to execute job, returns response text
+        self.max_concurrent = max_concurrent
+        self.misfire_policy = misfire_policy
+        self.misfire_grace_ms = misfire_grace_ms
         self._store: CronStore | None = None
+        self._jobs: dict[str, CronJob] = {}
+        self._heap: list[tuple[int, str]] = []  # (next_run_at_ms, job_id); stale entries skipped lazily
+        self._journal_offset = 0
+        self._journal_inode: int | None = None
+        self._journal_lines = 0
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(max_concurrent)
         self._timer_task: asyncio.Task | None = None
         self._running = False
     
     def _load_store(self) -> CronStore:
-        """Load jobs from disk."""
+        """Load jobs from the snapshot and replay the journal."""
         if self._store:
             return self._store
         
+        self._store = CronStore()
         if self.store_path.exists():
             try:
                 data = json.loads(self.store_path.read_text())
-                jobs = []
-                for j in data.get("jobs", []):
-                    jobs.append(CronJob(
-                        id=j["id"],
-                        name=j["name"],
-                        enabled=j.get("enabled", True),
-                        schedule=CronSchedule(
-                            kind=j["schedule"]["kind"],
-                            at_ms=j["schedule"].get("atMs"),
-                            every_ms=j["schedule"].get("everyMs"),
-                            expr=j["schedule"].get("expr"),
-                            tz=j["schedule"].get("tz"),
-                        ),
-                        payload=CronPayload(
-                            kind=j["payload"].get("kind", "agent_turn"),
-                            message=j["payload"].get("message", ""),
-                            deliver=j["payload"].get("deliver", False),
-                            channel=j["payload"].get("channel"),
-                            to=j["payload"].get("to"),
-                        ),
-                        state=CronJobState(
-                            next_run_at_ms=j.get("state", {}).get("nextRunAtMs"),
-                            last_run_at_ms=j.get("state", {}).get("lastRunAtMs"),
-                            last_status=j.get("state", {}).get("lastStatus"),
-                            last_error=j.get("state", {}).get("lastError"),
-                        ),
-                        created_at_ms=j.get("createdAtMs", 0),
-                        updated_at_ms=j.get("updatedAtMs", 0),
-                        delete_after_run=j.get("deleteAfterRun", False),
-                    ))
-                self._store = CronStore(jobs=jobs)
+                self._store.jobs = [_job_from_dict(j) for j in data.get("jobs", [])]
             except Exception as e:
                 logger.warning(f"Failed to load cron store: {e}")
-                self._store = CronStore()
-        else:
-            self._store = CronStore()
-        
+        self._jobs = {j.id: j for j in self._store.jobs}
+        self._sync_journal()
+        self._rebuild_heap()
         return self._store
     
     def _save_store(self) -> None:
-        """Save jobs to disk."""
+        """Write a full snapshot and start a fresh journal."""
         if not self._store:
             return
         
         self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        # Move the journal aside first so lines appended meanwhile land in a new one
+        pending = self.journal_path.with_suffix(".journal.old")
+        if self.journal_path.exists():
+            os.replace(self.journal_path, pending)
+            self._sync_journal(pending)
         
         data = {
             "version": self._store.version,
-            "jobs": [
-                {
-                    "id": j.id,
-                    "name": j.name,
-                    "enabled": j.enabled,
-                    "schedule": {
-                        "kind": j.schedule.kind,
-                        "atMs": j.schedule.at_ms,
-                        "everyMs": j.schedule.every_ms,
-                        "expr": j.schedule.expr,
-                        "tz": j.schedule.tz,
-                    },
-                    "payload": {
-                        "kind": j.payload.kind,
-                        "message": j.payload.message,
-                        "deliver": j.payload.deliver,
-                        "channel": j.payload.channel,
-                        "to": j.payload.to,
-                    },
-                    "state": {
-                        "nextRunAtMs": j.state.next_run_at_ms,
-                        "lastRunAtMs": j.state.last_run_at_ms,
-                        "lastStatus": j.state.last_status,
-                        "lastError": j.state.last_error,
-                    },
-                    "createdAtMs": j.created_at_ms,
-                    "updatedAtMs": j.updated_at_ms,
-                    "deleteAfterRun": j.delete_after_run,
-                }
-                for j in self._store.jobs
-            ]
+            "jobs": [_job_to_dict(j) for j in self._store.jobs],
         }
-        
-        self.store_path.write_text(json.dumps(data, indent=2))
+        tmp = self.store_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        os.replace(tmp, self.store_path)
+        pending.unlink(missing_ok=True)
+        self._journal_offset, self._journal_inode, self._journal_lines = 0, None, 0
+    
+    def _append_journal(self, entry: dict[str, Any]) -> None:
+        """Persist one change as a journal line."""
+        self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        self._sync_journal()
+        with open(self.journal_path, "ab") as f:
+            start = f.tell()
+            f.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+            end = f.tell()
+            inode = os.fstat(f.fileno()).st_ino
+        self._journal_lines += 1
+        if start == self._journal_offset and self._journal_inode in (None, inode):
+            self._journal_offset, self._journal_inode = end, inode
+        if self._running and self._journal_lines > max(100, len(self._jobs)):
+            self._save_store()
+    
+    def _sync_journal(self, path: Path | None = None) -> None:
+        """Apply journal lines written since the last read (by us or another process)."""
+        path = path or self.journal_path
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._journal_inode:
+            self._journal_offset, self._journal_inode = 0, st.st_ino
+        if st.st_size <= self._journal_offset:
+            return
+        with open(path, "rb") as f:
+            f.seek(self._journal_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # Leave a partially written line for later
+        for line in data[:end].splitlines():
+            try:
+                self._apply_entry(json.loads(line))
+                self._journal_lines += 1
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Cron: skipping bad journal line: {e}")
+        self._journal_offset += end
+    
+    def _apply_entry(self, entry: dict[str, Any]) -> None:
+        if entry["op"] == "put":
+            job = _job_from_dict(entry["job"])
+            if job.id in self._inflight:
+                return  # We own the running copy; its result supersedes this line
+            self._put_job(job)
+        elif entry["op"] == "del":
+            self._drop_job(entry["id"])
+    
+    def _put_job(self, job: CronJob) -> None:
+        if old := self._jobs.get(job.id):
+            self._store.jobs[self._store.jobs.index(old)] = job
+        else:
+            self._store.jobs.append(job)
+        self._jobs[job.id] = job
+        self._push(job)
+    
+    def _drop_job(self, job_id: str) -> bool:
+        job = self._jobs.pop(job_id, None)
+        if job:
+            self._store.jobs.remove(job)
+        return job is not None
+    
+    def _job_changed(self, job: CronJob) -> None:
+        """Index and persist a job after its schedule or state changed."""
+        self._push(job)
+        self._append_journal({"op": "put", "job": _job_to_dict(job)})
+    
+    def _push(self, job: CronJob) -> None:
+        if job.enabled and job.state.next_run_at_ms:
+            heapq.heappush(self._heap, (job.state.next_run_at_ms, job.id))
+        if len(self._heap) > 2 * len(self._jobs) + 64:
+            self._rebuild_heap()  # Too many superseded entries
+
+    
+    def _rebuild_heap(self) -> None:
+        self._heap = [
+            (j.state.next_run_at_ms, j.id) for j in self._jobs.values()
+            if j.enabled and j.state.next_run_at_ms
+        ]
+        heapq.heapify(self._heap)
+    
+    def _live(self, entry: tuple[int, str]) -> CronJob | None:
+        """The job a heap entry refers to, if the entry is still current."""
+        at, job_id = entry
+        job = self._jobs.get(job_id)
+        if job and job.enabled and job.state.next_run_at_ms == at:
+            return job
+        return None
     
     async def start(self) -> None:
         """Start the cron service."""
@@ -159,28 +342,47 @@ class CronService:
         if self._timer_task:
             self._timer_task.cancel()
             self._timer_task = None
+        if self._store and self._journal_lines:
+            self._save_store()
     
     def _recompute_next_runs(self) -> None:
-        """Recompute next run times for all enabled jobs."""
+        """Settle next run times at startup, applying the misfire policy to missed runs."""
         if not self._store:
             return
         now = _now_ms()
+        # Jobs sharing an expression and zone share the answer at a fixed "now"
+        memo: dict[tuple[str | None, str | None], int | None] = {}
         for job in self._store.jobs:
-            if job.enabled:
+            if not job.enabled:
+                continue
+            due = job.state.next_run_at_ms
+            if due and due > now:
+                continue  # Still in the future: keep it (an "every" job keeps its phase)
+            if due and self.misfire_policy == "run_once" and now - due <= self.misfire_grace_ms:
+                continue  # Missed while down: runs once now
+            if due:
+                logger.info(f"Cron: skipping missed run of '{job.name}' ({job.id})")
+                job.state.last_status = "skipped"
+            if job.schedule.kind == "cron":
+                key = (job.schedule.expr, job.schedule.tz)
+                if key not in memo:
+                    memo[key] = _compute_next_run(job.schedule, now)
+                job.state.next_run_at_ms = memo[key]
+            else:
                 job.state.next_run_at_ms = _compute_next_run(job.schedule, now)
+        self._rebuild_heap()
     
     def _get_next_wake_ms(self) -> int | None:
         """Get the earliest next run time across all jobs."""
-        if not self._store:
-            return None
-        times = [j.state.next_run_at_ms for j in self._store.jobs 
-                 if j.enabled and j.state.next_run_at_ms]
-        return min(times) if times else None
+        while self._heap and not self._live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
     
     def _arm_timer(self) -> None:
         """Schedule the next timer tick."""
         if self._timer_task:
             self._timer_task.cancel()
+            self._timer_task = None
         
         next_wake = self._get_next_wake_ms()
         if not next_wake or not self._running:
@@ -192,27 +394,34 @@ class CronService:
         async def tick():
             await asyncio.sleep(delay_s)
             if self._running:
+                self._timer_task = None
                 await self._on_timer()
         
         self._timer_task = asyncio.create_task(tick())
     
     async def _on_timer(self) -> None:
-        """Handle timer tick - run due jobs."""
+        """Handle timer tick - start due jobs without waiting for them."""
         if not self._store:
             return
         
+        self._sync_journal()
         now = _now_ms()
-        due_jobs = [
-            j for j in self._store.jobs
-            if j.enabled and j.state.next_run_at_ms and now >= j.state.next_run_at_ms
-        ]
-        
-        for job in due_jobs:
-            await self._execute_job(job)
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            job = self._live(entry)
+            if job and job.id not in self._inflight:
+                self._inflight[job.id] = asyncio.create_task(self._run_due(job))
         
-        self._save_store()
         self._arm_timer()
     
+    async def _run_due(self, job: CronJob) -> None:
+        try:
+            async with self._slots:
+                await self._execute_job(job)
+        finally:
+            self._inflight.pop(job.id, None)
+            self._arm_timer()
+    
     async def _execute_job(self, job: CronJob) -> None:
         """Execute a single job."""
         start_ms = _now_ms()
@@ -233,18 +442,23 @@ class CronService:
             logger.error(f"Cron: job '{job.name}' failed: {e}")
         
         job.state.last_run_at_ms = start_ms
+        job.state.last_duration_ms = _now_ms() - start_ms
+        job.state.runs += 1
         job.updated_at_ms = _now_ms()
         
         # Handle one-shot jobs
         if job.schedule.kind == "at":
             if job.delete_after_run:
-                self._store.jobs = [j for j in self._store.jobs if j.id != job.id]
-            else:
-                job.enabled = False
-                job.state.next_run_at_ms = None
+                if self._drop_job(job.id):
+                    self._append_journal({"op": "del", "id": job.id})
+                return
+            job.enabled = False
+            job.state.next_run_at_ms = None
         else:
             # Compute next run
             job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
+        if job.id in self._jobs:
+            self._job_changed(job)
     
     # ========== Public API ==========
     
@@ -263,8 +477,10 @@ class CronService:
         channel: str | None = None,
         to: str | None = None,
         delete_after_run: bool = False,
+        model: str | None = None,
     ) -> CronJob:
-        """Add a new job."""
+        """Add a new job. Raises ValueError for an invalid schedule."""
+        validate_schedule(schedule)
         store = self._load_store()
         now = _now_ms()
         
@@ -279,6 +495,7 @@ class CronService:
                 deliver=deliver,
                 channel=channel,
                 to=to,
+                model=model,
             ),
             state=CronJobState(next_run_at_ms=_compute_next_run(schedule, now)),
             created_at_ms=now,
@@ -287,7 +504,8 @@ class CronService:
         )
         
         store.jobs.append(job)
-        self._save_store()
+        self._jobs[job.id] = job
+        self._job_changed(job)
         self._arm_timer()
         
         logger.info(f"Cron: added job '{name}' ({job.id})")
@@ -295,13 +513,11 @@ class CronService:
     
     def remove_job(self, job_id: str) -> bool:
         """Remove a job by ID."""
-        store = self._load_store()
-        before = len(store.jobs)
-        store.jobs = [j for j in store.jobs if j.id != job_id]
-        removed = len(store.jobs) < before
+        self._load_store()
+        removed = self._drop_job(job_id)
         
         if removed:
-            self._save_store()
+            self._append_journal({"op": "del", "id": job_id})
             self._arm_timer()
             logger.info(f"Cron: removed job {job_id}")
         
@@ -309,32 +525,28 @@ class CronService:
     
     def enable_job(self, job_id: str, enabled: bool = True) -> CronJob | None:
         """Enable or disable a job."""
-        store = self._load_store()
-        for job in store.jobs:
-            if job.id == job_id:
-                job.enabled = enabled
-                job.updated_at_ms = _now_ms()
-                if enabled:
-                    job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
-                else:
-                    job.state.next_run_at_ms = None
-                self._save_store()
-                self._arm_timer()
-                return job
+        self._load_store()
+        if job := self._jobs.get(job_id):
+            job.enabled = enabled
+            job.updated_at_ms = _now_ms()
+            if enabled:
+                job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
+            else:
+                job.state.next_run_at_ms = None
+            self._job_changed(job)
+            self._arm_timer()
+            return job
         return None
     
     async def run_job(self, job_id: str, force: bool = False) -> bool:
         """Manually run a job."""
-        store = self._load_store()
-        for job in store.jobs:
-            if job.id == job_id:
-                if not force and not job.enabled:
-                    return False
-                await self._execute_job(job)
-                self._save_store()
-                self._arm_timer()
-                return True
-        return False
+        self._load_store()
+        job = self._jobs.get(job_id)
+        if not job or (not force and not job.enabled) or job_id in self._inflight:
+            return False
+        await self._execute_job(job)
+        self._arm_timer()
+        return True
     
     def status(self) -> dict:
         """Get service status."""
@@ -342,5 +554,6 @@ class CronService:
         return {
             "enabled": self._running,
             "jobs": len(store.jobs),
+            "running": len(self._inflight),
             "next_wake_at_ms": self._get_next_wake_ms(),
         }
@@ -27,6 +27,7 @@ class CronPayload:
     deliver: bool = False
     channel: str | None = None  # e.g. "whatsapp"
     to: str | None = None  # e.g. phone number
+    model: str | None = None  # Model override for this job's turns
 
 
 @dataclass
@@ -36,6 +37,10 @@ class CronJobState:
     last_run_at_ms: int | None = None
     last_status: Literal["ok", "error", "skipped"] | None = None
     last_error: str | None = None
+    last_duration_ms: int | None = None
+    last_tokens: int | None = None
+    total_tokens: int = 0
+    runs: int = 0
 
 
 @dataclass
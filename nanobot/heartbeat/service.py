@@ -1,6 +1,8 @@
 """Heartbeat service - periodic agent wake-up to check for tasks."""
 
 import asyncio
+import hashlib
+import time
 from pathlib import Path
 from typing import Any, Callable, Coroutine
 
@@ -41,6 +43,12 @@ class HeartbeatService:
     
     The agent reads HEARTBEAT.md from the workspace and executes any
     tasks listed there. If nothing needs attention, it replies HEARTBEAT_OK.
+    
+    HEARTBEAT.md is watched (a cheap stat every watch_interval_s) and a
+    change in its content triggers a check right away. Periodic checks of
+    an unchanged file that last came back HEARTBEAT_OK back off
+    exponentially up to max_interval_s, so a quiet task list costs no LLM
+    calls between them.
     """
     
     def __init__(
@@ -49,13 +57,23 @@ class HeartbeatService:
         on_heartbeat: Callable[[str], Coroutine[Any, Any, str]] | None = None,
         interval_s: int = DEFAULT_HEARTBEAT_INTERVAL_S,
         enabled: bool = True,
+        max_interval_s: int | None = None,
+        watch_interval_s: float = 5.0,
     ):
         self.workspace = workspace
         self.on_heartbeat = on_heartbeat
         self.interval_s = interval_s
+        self.max_interval_s = max(max_interval_s or interval_s * 8, interval_s)
+        self.watch_interval_s = watch_interval_s
         self.enabled = enabled
         self._running = False
         self._task: asyncio.Task | None = None
+        self._stamp: tuple[int, int] | None = None
+        self._hash: str | None = None  # Content hash at the last check
+        self._last_ok = False
+        self._backoff_s = interval_s
+        self._last_check = 0.0
+        self._next_check = 0.0
     
     @property
     def heartbeat_file(self) -> Path:
@@ -70,6 +88,13 @@ class HeartbeatService:
                 return None
         return None
     
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = self.heartbeat_file.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
     async def start(self) -> None:
         """Start the heartbeat service."""
         if not self.enabled:
@@ -77,8 +102,10 @@ class HeartbeatService:
             return
         
         self._running = True
+        self._stamp = self._file_stamp()
+        self._next_check = time.monotonic() + self.interval_s
         self._task = asyncio.create_task(self._run_loop())
-        logger.info(f"Heartbeat started (every {self.interval_s}s)")
+        logger.info(f"Heartbeat started (every {self.interval_s}s, backing off to {self.max_interval_s}s)")
     
     def stop(self) -> None:
         """Stop the heartbeat service."""
@@ -91,8 +118,14 @@ class HeartbeatService:
         """Main heartbeat loop."""
         while self._running:
             try:
-                await asyncio.sleep(self.interval_s)
-                if self._running:
+                await asyncio.sleep(max(0.0, min(self.watch_interval_s, self._next_check - time.monotonic())))
+                if not self._running:
+                    break
+                stamp = self._file_stamp()
+                if stamp != self._stamp:
+                    self._stamp = stamp
+                    await self._tick()
+                elif time.monotonic() >= self._next_check:
                     await self._tick()
             except asyncio.CancelledError:
                 break
@@ -101,26 +134,44 @@ class HeartbeatService:
     
     async def _tick(self) -> None:
         """Execute a single heartbeat tick."""
+        now = time.monotonic()
+        self._next_check = now + self.interval_s
         content = self._read_heartbeat_file()
         
         # Skip if HEARTBEAT.md is empty or doesn't exist
         if _is_heartbeat_empty(content):
             logger.debug("Heartbeat: no tasks (HEARTBEAT.md empty)")
+            self._hash, self._last_ok, self._backoff_s = None, False, self.interval_s
             return
         
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if digest != self._hash:
+            self._backoff_s = self.interval_s  # New or edited tasks: check now, then at the base interval
+        elif self._last_ok:
+            if now < self._last_check + self._backoff_s:
+                logger.debug("Heartbeat: HEARTBEAT.md unchanged since last OK, skipping")
+                self._next_check = min(self._next_check, self._last_check + self._backoff_s)
+                return
+            self._backoff_s = min(self._backoff_s * 2, self.max_interval_s)
+        
         logger.info("Heartbeat: checking for tasks...")
         
         if self.on_heartbeat:
+            self._last_check = now
             try:
                 response = await self.on_heartbeat(HEARTBEAT_PROMPT)
                 
                 # Check if agent said "nothing to do"
-                if HEARTBEAT_OK_TOKEN.replace("_", "") in response.upper().replace("_", ""):
+                self._hash = digest
+                self._last_ok = HEARTBEAT_OK_TOKEN.replace("_", "") in response.upper().replace("_", "")
+                if self._last_ok:
                     logger.info("Heartbeat: OK (no action needed)")
                 else:
+                    self._backoff_s = self.interval_s
                     logger.info(f"Heartbeat: completed task")
                     
             except Exception as e:
+                self._hash = None  # Retry at the next interval
                 logger.error(f"Heartbeat execution failed: {e}")
     
     async def trigger_now(self) -> str | None:
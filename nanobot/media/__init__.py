@@ -0,0 +1,6 @@
+"""Media handling for attachments."""
+
+from nanobot.media.images import ImagePreprocessor
+from nanobot.media.store import MediaStore
+
+__all__ = ["ImagePreprocessor", "MediaStore"]
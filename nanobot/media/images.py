@@ -0,0 +1,120 @@
+"""Downscale and re-encode images before they are sent to the model."""
+
+import asyncio
+import io
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loguru import logger
+
+from nanobot.media.store import MediaStore
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+    ImageOps = None
+
+_FORMATS = {"jpeg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+
+
+class ImagePreprocessor:
+    """
+    Shrinks images to what a vision model actually looks at.
+
+    Each image is fitted within max_dimension on its long edge (models
+    downsample anything larger anyway, after it has been uploaded and
+    billed), re-encoded as JPEG or WebP at the given quality, with its
+    EXIF orientation applied and all metadata dropped. Results are kept in
+    the media store under the source's content hash and the settings, so
+    an image is processed once however often it is sent. Decoding and
+    resizing run in a small thread pool (Pillow releases the GIL for
+    them), off the event loop.
+
+    Without Pillow installed, or for files it cannot decode (and animated
+    images), the original file is passed through unchanged.
+    """
+
+    def __init__(
+        self,
+        store: MediaStore,
+        max_dimension: int = 1568,
+        format: str = "jpeg",
+        quality: int = 85,
+        max_workers: int = 2,
+    ):
+        if format not in _FORMATS:
+            raise ValueError(f"Unsupported image format {format!r}; use one of {sorted(_FORMATS)}")
+        self.store = store
+        self.max_dimension = max_dimension
+        self.format = format
+        self.quality = quality
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        if max_dimension and not PIL_AVAILABLE:
+            logger.info("Pillow not installed; images are sent at full size (pip install pillow)")
+
+    @property
+    def enabled(self) -> bool:
+        return PIL_AVAILABLE and self.max_dimension > 0
+
+    async def prepare(self, paths: list[str]) -> list[str]:
+        """Map media paths to their prepared versions; non-images are returned as is."""
+        if not self.enabled or not paths:
+            return paths
+        return list(await asyncio.gather(*(self._prepare_one(p) for p in paths)))
+
+    async def _prepare_one(self, path: str) -> str:
+        mime, _ = mimetypes.guess_type(path)
+        if not mime or not mime.startswith("image/") or not Path(path).is_file():
+            return path
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="nanobot-image")
+        loop = asyncio.get_running_loop()
+        pil_format, ext = _FORMATS[self.format]
+        try:
+            key = await loop.run_in_executor(self._executor, self.store.content_key, Path(path))
+            name = f"{key}.{self.max_dimension}q{self.quality}{ext}"
+            if (cached := self.store.lookup(name)) is not None:
+                return str(cached)
+            data = await loop.run_in_executor(
+                self._executor, encode_image, Path(path), self.max_dimension, pil_format, self.quality,
+            )
+            if data is None:
+                return path
+            prepared = self.store.save_as(name, data)
+        except Exception as e:
+            logger.warning(f"Could not preprocess image {path}: {e}")
+            return path
+        logger.debug(f"Prepared image {Path(path).name}: {Path(path).stat().st_size} -> {len(data)} bytes")
+        return str(prepared)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def encode_image(path: Path, max_dimension: int, pil_format: str = "JPEG", quality: int = 85) -> bytes | None:
+    """Fit an image within max_dimension and re-encode it without metadata; None for animations."""
+    with Image.open(path) as img:
+        if getattr(img, "is_animated", False):
+            return None
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        if has_alpha and pil_format == "JPEG":
+            rgba = img.convert("RGBA")
+            img = Image.new("RGB", rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel("A"))  # Flatten transparency onto white
+        elif has_alpha:
+            img = img.convert("RGBA")
+        elif img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        out = io.BytesIO()
+        # Saving without exif=/icc_profile= drops the source's metadata
+        img.save(out, pil_format, quality=quality, optimize=pil_format == "JPEG")
+        return out.getvalue()
@@ -0,0 +1,200 @@
+"""Content-addressed store for downloaded media."""
+
+import asyncio
+import base64
+import hashlib
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterable
+
+from loguru import logger
+
+_CHUNK = 1024 * 1024
+
+
+class MediaStore:
+    """
+    Attachments saved under their content hash.
+
+    Files are named `<sha256 prefix><suffix>`, so the same photo forwarded
+    twice is stored once. Downloads stream into a temp file while being
+    hashed and are renamed into place, so nothing is held in memory. The
+    store is capped at max_bytes; least recently used files are evicted
+    first, with use tracked through the file's access time so it survives
+    restarts (mtime is left alone, as it keys the data URL cache). One
+    store should serve a process; the index is rescanned whenever the
+    directory changes behind its back, so stores in other processes (e.g.
+    gateway workers) count toward the same cap.
+
+    Base64 data URLs are cached (up to cache_bytes) by path, mtime and size,
+    so an image that stays in the conversation is encoded once, not per turn.
+    Encoding runs off the event loop.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 1024 * 1024 * 1024, cache_bytes: int = 64 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.cache_bytes = cache_bytes
+        self._index: OrderedDict[str, tuple[int, int]] | None = None  # name -> (size, atime_ns), oldest first
+        self._total = 0
+        self._root_mtime: int | None = None  # Directory mtime as of our last scan or write
+        self._urls: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._url_bytes = 0
+
+    def temp_path(self, suffix: str = "") -> Path:
+        """A fresh path inside the store for a client that downloads to a file itself; see `adopt`."""
+        tmp = self.root / "tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        return tmp / f"{uuid.uuid4().hex}{suffix}"
+
+    async def save_stream(self, chunks: AsyncIterable[bytes], suffix: str = "") -> Path:
+        """Write a byte stream to disk, hashing as it goes, and return its stored path."""
+        tmp = self.temp_path(suffix)
+        digest = hashlib.sha256()
+        try:
+            with open(tmp, "wb") as f:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return self._commit(tmp, f"{digest.hexdigest()[:32]}{suffix}")
+
+    def save_bytes(self, data: bytes, suffix: str = "") -> Path:
+        """Store bytes already in memory."""
+        return self.save_as(f"{hashlib.sha256(data).hexdigest()[:32]}{suffix}", data)
+
+    def save_as(self, name: str, data: bytes) -> Path:
+        """Store bytes under a caller-chosen name, e.g. a derivative keyed by its source's hash."""
+        tmp = self.temp_path()
+        tmp.write_bytes(data)
+        return self._commit(tmp, name)
+
+    def lookup(self, name: str) -> Path | None:
+        """Path of a stored file (marked as used), or None."""
+        path = self.root / name
+        if not path.is_file():
+            return None
+        self._touch(path)
+        return path
+
+    def content_key(self, path: Path) -> str:
+        """Hash prefix naming a file's content; free for files already in the store."""
+        if path.parent == self.root:
+            return path.name.split(".", 1)[0]
+        return _hash_file(path)[:32]
+
+    async def adopt(self, path: Path, suffix: str | None = None) -> Path:
+        """Move a downloaded file into the store under its hash (hashed off the event loop)."""
+        suffix = path.suffix if suffix is None else suffix
+        digest = await asyncio.to_thread(_hash_file, path)
+        return self._commit(path, f"{digest[:32]}{suffix}")
+
+    def _commit(self, tmp: Path, name: str) -> Path:
+        index = self._load_index()
+        dest = self.root / name
+        if dest.exists():
+            tmp.unlink(missing_ok=True)  # Already stored: keep one copy, count it as used
+        else:
+            os.replace(tmp, dest)
+        self._touch(dest)
+        st = dest.stat()
+        if name in index:
+            self._total -= index[name][0]
+        index[name] = (st.st_size, st.st_atime_ns)
+        index.move_to_end(name)
+        self._total += st.st_size
+        self._evict(keep=name)
+        self._root_mtime = self._dir_mtime()
+        return dest
+
+    def _dir_mtime(self) -> int | None:
+        try:
+            return self.root.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_index(self) -> OrderedDict[str, tuple[int, int]]:
+        if self._index is None or self._dir_mtime() != self._root_mtime:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._root_mtime = self._dir_mtime()
+            entries = []
+            for entry in os.scandir(self.root):
+                if entry.is_file():
+                    st = entry.stat()
+                    entries.append((st.st_atime_ns, entry.name, st.st_size))
+            entries.sort()
+            self._index = OrderedDict((name, (size, used)) for used, name, size in entries)
+            self._total = sum(size for _, _, size in entries)
+        return self._index
+
+    def _evict(self, keep: str) -> None:
+        index = self._index
+        while self._total > self.max_bytes and len(index) > 1:
+            name, (size, used) = next(iter(index.items()))
+            if name == keep:
+                index.move_to_end(name)
+                continue
+            path = self.root / name
+            try:
+                current = path.stat().st_atime_ns
+            except FileNotFoundError:
+                current = None
+            if current is not None and current > used:
+                # Used since indexed (e.g. by another process); give it a fresh position
+                index[name] = (size, current)
+                index.move_to_end(name)
+                continue
+            del index[name]
+            self._total -= size
+            path.unlink(missing_ok=True)
+            logger.debug(f"Evicted media {name} ({size} bytes)")
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            st = path.stat()
+            os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        except OSError:
+            pass
+
+    async def data_url(self, path: Path, mime: str) -> str | None:
+        """The file as a base64 data URL, or None if it is not a readable file."""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        if path.parent == self.root:
+            self._touch(path)  # Counts as use for eviction
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        url = self._urls.get(key)
+        if url is not None:
+            self._urls.move_to_end(key)
+            return url
+        try:
+            url = await asyncio.to_thread(_encode_data_url, path, mime)
+        except OSError:
+            return None
+        if len(url) <= self.cache_bytes:
+            self._urls[key] = url
+            self._url_bytes += len(url)
+            while self._url_bytes > self.cache_bytes:
+                _, old = self._urls.popitem(last=False)
+                self._url_bytes -= len(old)
+        return url
+
+
+def _encode_data_url(path: Path, mime: str) -> str:
+    return f"data:{mime};base64,{base64.b64encode(path.read_bytes()).decode()}"
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
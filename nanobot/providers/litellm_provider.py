@@ -2,7 +2,7 @@
 
 import json
 import os
-from typing import Any
+from typing import Any, Sequence
 
 import litellm
 from litellm import acompletion
@@ -102,7 +102,7 @@ class LiteLLMProvider(LLMProvider):
     async def chat(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None = None,
+        tools: Sequence[dict[str, Any]] | None = None,
         model: str | None = None,
         max_tokens: int = 4096,
         temperature: float = 0.7,
@@ -149,7 +149,8 @@ class LiteLLMProvider(LLMProvider):
             kwargs["extra_headers"] = self.extra_headers
         
         if tools:
-            kwargs["tools"] = tools
+            # Registry definitions carry a list copy built once for clients like LiteLLM
+            kwargs["tools"] = getattr(tools, "schemas", None) or list(tools)
             kwargs["tool_choice"] = "auto"
         
         try:
@@ -0,0 +1,226 @@
+"""Native OpenAI-compatible provider (vLLM, Ollama, custom endpoints) without LiteLLM."""
+
+import json
+from typing import Any, Sequence
+
+import httpx
+
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.registry import find_gateway
+
+
+class OpenAICompatProvider(LLMProvider):
+    """
+    LLM provider that speaks the OpenAI chat-completions wire format directly.
+
+    Used for self-hosted servers and custom endpoints (registry entries with
+    native_openai=True). Requests go over a pooled httpx client and responses
+    are parsed straight into LLMResponse, skipping LiteLLM's routing layer.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_base: str | None = None,
+        default_model: str = "default",
+        extra_headers: dict[str, str] | None = None,
+        provider_name: str | None = None,
+        stream: bool = False,
+        timeout: float = 600.0,
+        max_connections: int = 20,
+    ):
+        super().__init__(api_key, api_base)
+        self.default_model = default_model
+        self.extra_headers = extra_headers or {}
+        self.stream = stream
+        self._spec = find_gateway(provider_name, api_key, api_base)
+
+        base = api_base or (self._spec.default_api_base if self._spec else "")
+        if not base:
+            raise ValueError("OpenAICompatProvider requires an api_base")
+        self._url = base.rstrip("/") + "/chat/completions"
+
+        self._headers = {"Content-Type": "application/json", **self.extra_headers}
+        if api_key:
+            self._headers["Authorization"] = f"Bearer {api_key}"
+
+        self._timeout = httpx.Timeout(timeout, connect=10.0)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self._timeout, limits=self._limits)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    def _resolve_model(self, model: str) -> str:
+        """Strip LiteLLM routing prefixes — the server expects its own model name."""
+        if not self._spec:
+            return model
+        if self._spec.strip_model_prefix:
+            return model.split("/")[-1]
+        prefix = self._spec.litellm_prefix
+        if prefix and model.startswith(f"{prefix}/"):
+            return model[len(prefix) + 1:]
+        return model
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: Sequence[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        """
+        Send a chat completion request to the OpenAI-compatible endpoint.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'.
+            tools: Optional list of tool definitions in OpenAI format.
+            model: Model identifier as served by the endpoint.
+            max_tokens: Maximum tokens in response.
+            temperature: Sampling temperature.
+
+        Returns:
+            LLMResponse with content and/or tool calls.
+        """
+        body: dict[str, Any] = {
+            "model": self._resolve_model(model or self.default_model),
+            "messages": messages,
+            "max_tokens": max(1, max_tokens),
+            "temperature": temperature,
+        }
+        if tools:
+            body["tools"] = tools
+            body["tool_choice"] = "auto"
+
+        try:
+            if self.stream:
+                return await self._chat_stream(body)
+            response = await self._get_client().post(self._url, headers=self._headers, content=self._encode(body))
+            response.raise_for_status()
+            return self._parse_response(response.json())
+        except Exception as e:
+            # Return error as content for graceful handling
+            return LLMResponse(
+                content=f"Error calling LLM: {str(e)}",
+                finish_reason="error",
+            )
+
+    async def _chat_stream(self, body: dict[str, Any]) -> LLMResponse:
+        """Consume a server-sent-events stream and assemble the final response."""
+        body = {**body, "stream": True, "stream_options": {"include_usage": True}}
+        content: list[str] = []
+        reasoning: list[str] = []
+        calls: dict[int, dict[str, Any]] = {}
+        finish_reason = "stop"
+        usage: dict[str, int] = {}
+
+        async with self._get_client().stream(
+            "POST", self._url, headers=self._headers, content=self._encode(body)
+        ) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("usage"):
+                    usage = self._parse_usage(chunk["usage"])
+                for choice in chunk.get("choices") or []:
+                    delta = choice.get("delta") or {}
+                    if delta.get("content"):
+                        content.append(delta["content"])
+                    if delta.get("reasoning_content"):
+                        reasoning.append(delta["reasoning_content"])
+                    for tc in delta.get("tool_calls") or []:
+                        slot = calls.setdefault(tc.get("index", 0), {"id": "", "name": "", "arguments": ""})
+                        fn = tc.get("function") or {}
+                        slot["id"] = tc.get("id") or slot["id"]
+                        slot["name"] += fn.get("name") or ""
+                        slot["arguments"] += fn.get("arguments") or ""
+                    if choice.get("finish_reason"):
+                        finish_reason = choice["finish_reason"]
+
+        return LLMResponse(
+            content="".join(content) or None,
+            tool_calls=[
+                ToolCallRequest(id=c["id"], name=c["name"], arguments=self._parse_arguments(c["arguments"]))
+                for _, c in sorted(calls.items())
+            ],
+            finish_reason=finish_reason,
+            usage=usage,
+            reasoning_content="".join(reasoning) or None,
+        )
+
+    @staticmethod
+    def _encode(body: dict[str, Any]) -> bytes:
+        """Serialize a request body, reusing pre-encoded tool definitions when given."""
+        tools_json = getattr(body.get("tools"), "encoded", None)
+        if tools_json is None:
+            return json.dumps(body, ensure_ascii=False).encode("utf-8")
+        rest = json.dumps({k: v for k, v in body.items() if k != "tools"}, ensure_ascii=False)
+        return f'{rest[:-1]}, "tools": {tools_json}}}'.encode("utf-8")
+
+    def _parse_response(self, data: dict[str, Any]) -> LLMResponse:
+        """Parse a chat-completions JSON body into our standard format."""
+        choice = data["choices"][0]
+        message = choice.get("message") or {}
+
+        tool_calls = [
+            ToolCallRequest(
+                id=tc.get("id", ""),
+                name=tc["function"]["name"],
+                arguments=self._parse_arguments(tc["function"].get("arguments")),
+            )
+            for tc in message.get("tool_calls") or []
+        ]
+
+        return LLMResponse(
+            content=message.get("content"),
+            tool_calls=tool_calls,
+            finish_reason=choice.get("finish_reason") or "stop",
+            usage=self._parse_usage(data.get("usage")),
+            reasoning_content=message.get("reasoning_content"),
+        )
+
+    @staticmethod
+    def _parse_arguments(args: Any) -> dict[str, Any]:
+        """Parse tool-call arguments from a JSON string if needed."""
+        if isinstance(args, dict):
+            return args
+        if not args:
+            return {}
+        try:
+            return json.loads(args)
+        except json.JSONDecodeError:
+            return {"raw": args}
+
+    @staticmethod
+    def _parse_usage(usage: dict[str, Any] | None) -> dict[str, int]:
+        if not usage:
+            return {}
+        return {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+
+    def get_default_model(self) -> str:
+        """Get the default model."""
+        return self.default_model
@@ -48,6 +48,9 @@ class ProviderSpec:
     # gateway behavior
     strip_model_prefix: bool = False         # strip "provider/" before re-prefixing
 
+    # transport: talk OpenAI chat-completions directly instead of via LiteLLM
+    native_openai: bool = False
+
     # per-model param overrides, e.g. (("kimi-k2.5", {"temperature": 1.0}),)
     model_overrides: tuple[tuple[str, dict[str, Any]], ...] = ()
 
@@ -74,6 +77,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         skip_prefixes=("openai/",),
         is_gateway=True,
         strip_model_prefix=True,
+        native_openai=True,                 # plain OpenAI wire format, skip LiteLLM
     ),
 
     # === Gateways (detected by api_key / api_base, not model name) =========
@@ -94,6 +98,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="openrouter",
         default_api_base="https://openrouter.ai/api/v1",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -114,6 +119,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="aihubmix",
         default_api_base="https://aihubmix.com/v1",
         strip_model_prefix=True,            # anthropic/claude-3 → claude-3 → openai/claude-3
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -134,6 +140,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -152,6 +159,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -170,6 +178,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -188,6 +197,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -210,6 +220,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -228,6 +239,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -250,6 +262,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="https://api.moonshot.ai/v1",   # intl; use api.moonshot.cn for China
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(
             ("kimi-k2.5", {"temperature": 1.0}),
         ),
@@ -271,6 +284,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="https://api.minimax.io/v1",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 
@@ -292,6 +306,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",                # user must provide in config
         strip_model_prefix=False,
+        native_openai=True,                 # plain OpenAI wire format, skip LiteLLM
         model_overrides=(),
     ),
 
@@ -313,6 +328,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        native_openai=False,
         model_overrides=(),
     ),
 )
@@ -1,65 +1,282 @@
-"""Voice transcription provider using Groq."""
+"""Voice transcription providers: Groq's hosted Whisper and a local faster-whisper backend."""
 
+import asyncio
+import hashlib
+import importlib.util
+import multiprocessing
 import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING
 
 import httpx
 from loguru import logger
 
+if TYPE_CHECKING:
+    from nanobot.config.schema import TranscriptionConfig
 
-class GroqTranscriptionProvider:
+
+class TranscriptionProvider(ABC):
     """
-    Voice transcription provider using Groq's Whisper API.
-    
-    Groq offers extremely fast transcription with a generous free tier.
+    Abstract base class for transcription backends.
+
+    Results are cached by the sha256 of the audio, so a voice note that is
+    forwarded again (or redelivered) is not transcribed twice.
     """
-    
-    def __init__(self, api_key: str | None = None):
-        self.api_key = api_key or os.environ.get("GROQ_API_KEY")
-        self.api_url = "https://api.groq.com/openai/v1/audio/transcriptions"
-    
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+
     async def transcribe(self, file_path: str | Path) -> str:
         """
-        Transcribe an audio file using Groq.
-        
+        Transcribe an audio file.
+
         Args:
             file_path: Path to the audio file.
-            
+
         Returns:
-            Transcribed text.
+            Transcribed text, or "" if it could not be transcribed.
         """
-        if not self.api_key:
-            logger.warning("Groq API key not configured for transcription")
-            return ""
-        
         path = Path(file_path)
         if not path.exists():
             logger.error(f"Audio file not found: {file_path}")
             return ""
-        
+        key = await asyncio.to_thread(_audio_hash, path)
+        if (text := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            return text
+        text = await self.transcribe_file(path)
+        if text and self.cache_size:
+            self._cache[key] = text
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    @abstractmethod
+    async def transcribe_file(self, path: Path) -> str:
+        """Transcribe one file, uncached."""
+        pass
+
+    async def close(self) -> None:
+        """Release clients or worker processes."""
+        pass
+
+
+class GroqTranscriptionProvider(TranscriptionProvider):
+    """
+    Voice transcription provider using Groq's Whisper API.
+
+    Groq offers extremely fast transcription with a generous free tier.
+    """
+
+    def __init__(self, api_key: str | None = None, cache_size: int = 256):
+        super().__init__(cache_size)
+        self.api_key = api_key or os.environ.get("GROQ_API_KEY")
+        self.api_url = "https://api.groq.com/openai/v1/audio/transcriptions"
+        self._client: httpx.AsyncClient | None = None
+
+    async def transcribe_file(self, path: Path) -> str:
+        if not self.api_key:
+            logger.warning("Groq API key not configured for transcription")
+            return ""
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=60.0)
         try:
-            async with httpx.AsyncClient() as client:
-                with open(path, "rb") as f:
-                    files = {
-                        "file": (path.name, f),
-                        "model": (None, "whisper-large-v3"),
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}",
-                    }
-                    
-                    response = await client.post(
-                        self.api_url,
-                        headers=headers,
-                        files=files,
-                        timeout=60.0
-                    )
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    return data.get("text", "")
-                    
+            with open(path, "rb") as f:
+                files = {
+                    "file": (path.name, f),
+                    "model": (None, "whisper-large-v3"),
+                }
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}",
+                }
+
+                response = await self._client.post(self.api_url, headers=headers, files=files)
+
+                response.raise_for_status()
+                data = response.json()
+                return data.get("text", "")
+
         except Exception as e:
             logger.error(f"Groq transcription error: {e}")
             return ""
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class LocalWhisperTranscriptionProvider(TranscriptionProvider):
+    """
+    Offline transcription with faster-whisper in worker processes.
+
+    Each worker loads the model once. Requests go through a queue: clips
+    up to short_clip_bytes that arrive within batch_window_s of each other
+    are grouped (up to batch_size) and the group is split evenly across the
+    workers, so a burst of voice notes is transcribed in parallel with one
+    round-trip per worker instead of one per clip. Longer clips are sent
+    alone so they don't hold up the short ones. Closing the provider
+    resolves every outstanding request with "".
+    """
+
+    def __init__(
+        self,
+        model: str = "base",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        language: str = "",
+        workers: int = 1,
+        batch_size: int = 8,
+        batch_window_s: float = 0.05,
+        short_clip_bytes: int = 256 * 1024,
+        cache_size: int = 256,
+        executor: Executor | None = None,
+    ):
+        super().__init__(cache_size)
+        self.model = model
+        self.device = device
+        self.compute_type = compute_type
+        self.language = language
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window_s = batch_window_s
+        self.short_clip_bytes = short_clip_bytes
+        self._executor = executor
+        self._queue: asyncio.Queue[tuple[Path, asyncio.Future]] = asyncio.Queue()
+        self._batcher: asyncio.Task | None = None
+        self._batches: set[asyncio.Task] = set()
+        self._pending: set[asyncio.Future] = set()
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model, self.device, self.compute_type),
+            )
+            logger.info(f"Started {self.workers} local transcription worker(s) with model {self.model}")
+        return self._executor
+
+    async def transcribe_file(self, path: Path) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        if path.stat().st_size > self.short_clip_bytes:
+            self._dispatch([(path, future)])
+        else:
+            await self._queue.put((path, future))
+            if self._batcher is None or self._batcher.done():
+                self._batcher = asyncio.create_task(self._collect())
+        return await future
+
+    async def _collect(self) -> None:
+        """Group queued clips into batches and hand each to the pool."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window_s
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[tuple[Path, asyncio.Future]]) -> None:
+        task = asyncio.create_task(self._run_batch(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: list[tuple[Path, asyncio.Future]]) -> None:
+        paths = [path for path, _ in batch]
+        size = -(-len(paths) // max(1, self.workers))
+        chunks = await asyncio.gather(*(self._run(paths[i:i + size]) for i in range(0, len(paths), size)))
+        texts = [text for chunk in chunks for text in chunk]
+        for (_, future), text in zip(batch, texts):
+            if not future.done():
+                future.set_result(text)
+
+    async def _run(self, paths: list[Path]) -> list[str]:
+        loop = asyncio.get_running_loop()
+        if len(paths) > 1:
+            logger.debug(f"Transcribing a batch of {len(paths)} clips")
+        try:
+            return await loop.run_in_executor(self._pool(), _transcribe_batch, [str(p) for p in paths], self.language)
+        except Exception as e:
+            logger.error(f"Local transcription failed: {e}")
+            return [""] * len(paths)
+
+    async def close(self) -> None:
+        # Resolve queued and in-flight requests first, so no caller is left waiting
+        pending = [f for f in self._pending if not f.done()]
+        if pending:
+            logger.warning(f"Transcriber closed with {len(pending)} clip(s) pending; returning no text for them")
+        for future in pending:
+            future.set_result("")
+        self._pending.clear()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        for task in list(self._batches):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def create_transcriber(config: "TranscriptionConfig", groq_api_key: str = "") -> TranscriptionProvider | None:
+    """Build the configured backend; "local" falls back to Groq if faster-whisper is missing."""
+    if config.backend == "local":
+        if importlib.util.find_spec("faster_whisper") is not None:
+            return LocalWhisperTranscriptionProvider(
+                model=config.model,
+                device=config.device,
+                compute_type=config.compute_type,
+                language=config.language,
+                workers=config.workers,
+                batch_size=config.batch_size,
+                batch_window_s=config.batch_window_ms / 1000,
+                short_clip_bytes=config.short_clip_kb * 1024,
+            )
+        logger.warning("faster-whisper not installed (pip install faster-whisper); using Groq for transcription")
+    elif config.backend != "groq":
+        return None
+    if groq_api_key or os.environ.get("GROQ_API_KEY"):
+        return GroqTranscriptionProvider(api_key=groq_api_key)
+    return None
+
+
+def _audio_hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+# Worker-process side of LocalWhisperTranscriptionProvider
+_model = None
+
+
+def _init_worker(model: str, device: str, compute_type: str) -> None:
+    global _model
+    from faster_whisper import WhisperModel
+    _model = WhisperModel(model, device=device, compute_type=compute_type)
+
+
+def _transcribe_batch(paths: list[str], language: str) -> list[str]:
+    """Transcribe clips in order; a clip that fails yields "" without failing the batch."""
+    texts = []
+    for path in paths:
+        try:
+            segments, _ = _model.transcribe(path, language=language or None, beam_size=1, vad_filter=True)
+            texts.append(" ".join(s.text.strip() for s in segments).strip())
+        except Exception as e:
+            logger.error(f"Transcription of {path} failed: {e}")
+            texts.append("")
+    return texts
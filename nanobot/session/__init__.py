@@ -1,5 +1,6 @@
 """Session management module."""
 
 from nanobot.session.manager import SessionManager, Session
+from nanobot.session.sqlite import SQLiteSessionManager
 
-__all__ = ["SessionManager", "Session"]
+__all__ = ["SessionManager", "SQLiteSessionManager", "Session"]
@@ -0,0 +1,132 @@
+"""Append-only catalog of session summaries for fast listing."""
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock; compaction may drop a concurrent append
+    fcntl = None
+
+
+class SessionCatalog:
+    """
+    Summary of every session (key, timestamps, message count, byte size).
+
+    Stored as an append-only log with one JSON entry per save; the latest
+    entry for a key wins. Readers replay only the lines appended since their
+    last read, so other processes' saves show up without rescanning, and the
+    log is compacted once it holds mostly superseded entries. Writers hold
+    an exclusive lock (on a side file, as compaction replaces the log), so
+    no process's append is lost to another's compaction. A deleted session
+    is recorded as a tombstone entry; compaction drops tombstones and
+    entries whose session file has gone.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock_path = path.with_name(path.name + ".lock")
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._offset = 0
+        self._inode: int | None = None
+        self._lines = 0
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the exclusive cross-process writer lock."""
+        if fcntl is None:
+            yield
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def update(self, entry: dict[str, Any]) -> None:
+        """Record the latest summary for one session."""
+        with self._locked():
+            self._refresh()
+            with open(self.path, "ab") as f:
+                start = f.tell()
+                f.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+                end = f.tell()
+                inode = os.fstat(f.fileno()).st_ino
+            self._apply(entry)
+            self._lines += 1
+            if start == self._offset:
+                # Nobody else appended in between: our line is already applied
+                self._offset, self._inode = end, inode
+            if self._lines > 2 * len(self._entries) + 100:
+                self._compact()
+
+    def remove(self, key: str) -> None:
+        """Record that a session was deleted."""
+        self.update({"key": key, "deleted": True})
+
+    def rebuild(self, entries: Iterable[dict[str, Any]]) -> None:
+        """Replace the catalog with the given entries."""
+        with self._locked():
+            self._entries = {e["key"]: e for e in entries}
+            self._compact()
+
+    def entries(self) -> list[dict[str, Any]]:
+        """All current entries (unordered)."""
+        self._refresh()
+        return list(self._entries.values())
+
+    def _refresh(self) -> None:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # Compacted or replaced by another process: replay from the start
+            self._entries, self._offset, self._lines, self._inode = {}, 0, 0, stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Leave a partially written trailing line for the next refresh
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+                self._lines += 1
+            except (json.JSONDecodeError, KeyError):
+                continue
+        self._offset += end
+
+    def _apply(self, entry: dict[str, Any]) -> None:
+        if entry.get("deleted"):
+            self._entries.pop(entry["key"], None)
+        else:
+            self._entries[entry["key"]] = entry
+
+    def _compact(self) -> None:
+        """Rewrite the log with one line per live session; callers hold the lock."""
+        self._entries = {
+            key: e for key, e in self._entries.items() if not e.get("path") or os.path.exists(e["path"])
+        }
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to compact session catalog: {e}")
+            return
+        stat = self.path.stat()
+        self._offset, self._inode, self._lines = stat.st_size, stat.st_ino, len(self._entries)
@@ -8,6 +8,7 @@ from typing import Any
 
 from loguru import logger
 
+from nanobot.session.catalog import SessionCatalog
 from nanobot.utils.helpers import ensure_dir, safe_filename
 
 
@@ -63,6 +64,7 @@ class SessionManager:
         self.workspace = workspace
         self.sessions_dir = ensure_dir(Path.home() / ".nanobot" / "sessions")
         self._cache: dict[str, Session] = {}
+        self._catalog: SessionCatalog | None = None
     
     def _get_session_path(self, key: str) -> Path:
         """Get the file path for a session."""
@@ -96,10 +98,15 @@ class SessionManager:
         if not path.exists():
             return None
 
+        return self._load_path(path, key)
+
+    def _load_path(self, path: Path, key: str) -> Session | None:
+        """Parse a session JSONL file."""
         try:
             messages = []
             metadata = {}
             created_at = None
+            updated_at = None
             last_consolidated = 0
 
             with open(path) as f:
@@ -113,6 +120,7 @@ class SessionManager:
                     if data.get("_type") == "metadata":
                         metadata = data.get("metadata", {})
                         created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
+                        updated_at = datetime.fromisoformat(data["updated_at"]) if data.get("updated_at") else None
                         last_consolidated = data.get("last_consolidated", 0)
                     else:
                         messages.append(data)
@@ -121,6 +129,7 @@ class SessionManager:
                 key=key,
                 messages=messages,
                 created_at=created_at or datetime.now(),
+                updated_at=updated_at or created_at or datetime.now(),
                 metadata=metadata,
                 last_consolidated=last_consolidated
             )
@@ -135,6 +144,7 @@ class SessionManager:
         with open(path, "w") as f:
             metadata_line = {
                 "_type": "metadata",
+                "key": session.key,
                 "created_at": session.created_at.isoformat(),
                 "updated_at": session.updated_at.isoformat(),
                 "metadata": session.metadata,
@@ -143,37 +153,79 @@ class SessionManager:
             f.write(json.dumps(metadata_line) + "\n")
             for msg in session.messages:
                 f.write(json.dumps(msg) + "\n")
+            size = f.tell()
 
         self._cache[session.key] = session
+        self.catalog.update({
+            "key": session.key,
+            "created_at": metadata_line["created_at"],
+            "updated_at": metadata_line["updated_at"],
+            "messages": len(session.messages),
+            "bytes": size,
+            "path": str(path)
+        })
     
     def invalidate(self, key: str) -> None:
         """Remove a session from the in-memory cache."""
         self._cache.pop(key, None)
     
-    def list_sessions(self) -> list[dict[str, Any]]:
+    def list_sessions(
+        self,
+        channel: str | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
         """
-        List all sessions.
+        List sessions, most recently updated first.
+        
+        Served from the session catalog, so no session file is opened.
+        
+        Args:
+            channel: Only include sessions whose key starts with "<channel>:".
+            offset: Number of sessions to skip (for paging).
+            limit: Maximum number of sessions to return.
         
         Returns:
             List of session info dicts.
         """
+        sessions = self.catalog.entries()
+        if channel:
+            prefix = f"{channel}:"
+            sessions = [s for s in sessions if s["key"].startswith(prefix)]
+        sessions.sort(key=lambda x: x.get("updated_at") or "", reverse=True)
+        end = offset + limit if limit is not None else None
+        return [dict(s) for s in sessions[offset:end]]
+
+    @property
+    def catalog(self) -> SessionCatalog:
+        """The session catalog, built from the session files on first use."""
+        if self._catalog is None:
+            self._catalog = SessionCatalog(self.sessions_dir / "catalog.idx")
+            if not self._catalog.exists():
+                self._catalog.rebuild(self._scan_sessions())
+        return self._catalog
+
+    def _scan_sessions(self) -> list[dict[str, Any]]:
+        """Summarize every session file (slow; only used to bootstrap the catalog)."""
         sessions = []
         
         for path in self.sessions_dir.glob("*.jsonl"):
             try:
-                # Read just the metadata line
                 with open(path) as f:
                     first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            sessions.append({
-                                "key": path.stem.replace("_", ":"),
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
+                    count = sum(1 for line in f if line.strip())
+                if first_line:
+                    data = json.loads(first_line)
+                    if data.get("_type") == "metadata":
+                        sessions.append({
+                            "key": data.get("key") or path.stem.replace("_", ":", 1),
+                            "created_at": data.get("created_at"),
+                            "updated_at": data.get("updated_at"),
+                            "messages": count,
+                            "bytes": path.stat().st_size,
+                            "path": str(path)
+                        })
             except Exception:
                 continue
         
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+        return sessions
@@ -0,0 +1,203 @@
+"""SQLite session backend."""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.session.manager import Session, SessionManager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    last_consolidated INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_key, seq)
+) WITHOUT ROWID;
+"""
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+class SQLiteSessionManager(SessionManager):
+    """
+    Manages conversation sessions in a single SQLite database.
+
+    Uses WAL mode so several processes (e.g. gateway workers) can share the
+    file. Messages are append-only rows keyed by (session_key, seq): a save
+    writes only the messages added since the last save, in one transaction,
+    and list_sessions reads the sessions table instead of opening every file.
+    """
+
+    def __init__(self, workspace: Path, db_path: Path | None = None):
+        super().__init__(workspace)
+        self.db_path = db_path or self.sessions_dir / "sessions.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def _load(self, key: str) -> Session | None:
+        """Load a session from the database."""
+        try:
+            row = self._conn.execute(
+                "SELECT created_at, updated_at, metadata, last_consolidated FROM sessions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            created_at, updated_at, metadata, last_consolidated = row
+            messages = [
+                json.loads(data) for (data,) in self._conn.execute(
+                    "SELECT data FROM messages WHERE session_key = ? ORDER BY seq", (key,)
+                )
+            ]
+            return Session(
+                key=key,
+                messages=messages,
+                created_at=datetime.fromisoformat(created_at),
+                updated_at=datetime.fromisoformat(updated_at),
+                metadata=json.loads(metadata),
+                last_consolidated=last_consolidated,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load session {key}: {e}")
+            return None
+
+    def save(self, session: Session) -> None:
+        """Write the session's new messages and header in one transaction."""
+        rows = [_dumps(m) for m in session.messages]
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            start = self._persisted_prefix(session.key, rows)
+            if start == 0:
+                conn.execute("DELETE FROM messages WHERE session_key = ?", (session.key,))
+            conn.executemany(
+                "INSERT INTO messages (session_key, seq, data) VALUES (?, ?, ?)",
+                [(session.key, seq, rows[seq]) for seq in range(start, len(rows))],
+            )
+            conn.execute(
+                "INSERT INTO sessions (key, created_at, updated_at, metadata, last_consolidated, message_count)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET updated_at = excluded.updated_at,"
+                " metadata = excluded.metadata, last_consolidated = excluded.last_consolidated,"
+                " message_count = excluded.message_count",
+                (
+                    session.key,
+                    session.created_at.isoformat(),
+                    session.updated_at.isoformat(),
+                    _dumps(session.metadata),
+                    session.last_consolidated,
+                    len(rows),
+                ),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._cache[session.key] = session
+
+    def _persisted_prefix(self, key: str, rows: list[str]) -> int:
+        """
+        Number of leading messages already stored unchanged.
+
+        Sessions are append-only, so checking the last stored row is enough
+        to tell an append from a rewrite (e.g. after /new cleared the session).
+        """
+        row = self._conn.execute("SELECT message_count FROM sessions WHERE key = ?", (key,)).fetchone()
+        stored = row[0] if row else 0
+        if stored == 0 or stored > len(rows):
+            return 0
+        (last,) = self._conn.execute(
+            "SELECT data FROM messages WHERE session_key = ? AND seq = ?", (key, stored - 1)
+        ).fetchone() or (None,)
+        return stored if last == rows[stored - 1] else 0
+
+    def list_sessions(
+        self,
+        channel: str | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        List sessions, most recently updated first.
+
+        Args:
+            channel: Only include sessions whose key starts with "<channel>:".
+            offset: Number of sessions to skip (for paging).
+            limit: Maximum number of sessions to return.
+
+        Returns:
+            List of session info dicts.
+        """
+        where, params = "", []
+        if channel:
+            # Key range scan on the primary key; ";" sorts right after ":"
+            where, params = "WHERE key >= ? AND key < ?", [f"{channel}:", f"{channel};"]
+        rows = self._conn.execute(
+            f"SELECT key, created_at, updated_at, message_count FROM sessions {where}"
+            " ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+            (*params, -1 if limit is None else limit, offset),
+        )
+        return [
+            {
+                "key": key,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "messages": count,
+                "path": str(self.db_path),
+            }
+            for key, created_at, updated_at, count in rows
+        ]
+
+
+def migrate_jsonl(source: SessionManager, target: SQLiteSessionManager) -> int:
+    """
+    Copy every JSONL session from source's directory into target.
+
+    Keys are read from each file rather than derived from the filename, so
+    chat IDs containing underscores survive the move. Returns the number of
+    sessions migrated.
+    """
+    migrated = 0
+    for path in sorted(source.sessions_dir.glob("*.jsonl")):
+        key = _read_key(path)
+        session = source._load_path(path, key)
+        if session is None:
+            continue
+        target.save(session)
+        migrated += 1
+    return migrated
+
+
+def _read_key(path: Path) -> str:
+    """Recover the session key stored in a JSONL header, falling back to the filename."""
+    try:
+        with open(path) as f:
+            header = json.loads(f.readline() or "{}")
+        if header.get("_type") == "metadata" and header.get("key"):
+            return header["key"]
+    except (OSError, json.JSONDecodeError):
+        pass
+    return path.stem.replace("_", ":", 1)
@@ -0,0 +1,80 @@
+import asyncio
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.channels.manager import ChannelManager
+from nanobot.config.schema import Config
+
+
+class FakeChannel(BaseChannel):
+    name = "fake"
+
+    def __init__(self, bus: MessageBus, delays: dict[str, float] | None = None):
+        super().__init__(None, bus)
+        self.delays = delays or {}
+        self.sent: list[tuple[str, str]] = []
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def send(self, msg: OutboundMessage) -> None:
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.delays.get(msg.chat_id, 0))
+            self.sent.append((msg.chat_id, msg.content))
+        finally:
+            self.inflight -= 1
+
+
+def _make_manager(max_inflight: int = 4) -> tuple[ChannelManager, MessageBus]:
+    config = Config()
+    config.gateway.bus.max_inflight_per_channel = max_inflight
+    bus = MessageBus()
+    return ChannelManager(config, bus), bus
+
+
+async def _publish(bus: MessageBus, channel: str, chat_id: str, content: str) -> None:
+    await bus.publish_outbound(OutboundMessage(channel=channel, chat_id=chat_id, content=content))
+
+
+async def test_slow_channel_does_not_block_other_channels() -> None:
+    manager, bus = _make_manager()
+    slow = FakeChannel(bus, delays={"mail": 0.5})
+    fast = FakeChannel(bus)
+    manager.channels = {"email": slow, "telegram": fast}
+
+    dispatcher = asyncio.create_task(manager._dispatch_outbound())
+    await _publish(bus, "email", "mail", "slow")
+    await _publish(bus, "telegram", "t1", "fast")
+    await asyncio.sleep(0.1)
+
+    assert fast.sent == [("t1", "fast")]
+    assert slow.sent == []
+
+    bus.close_outbound()
+    await asyncio.wait_for(dispatcher, timeout=1)
+    assert slow.sent == [("mail", "slow")]
+
+
+async def test_ordering_preserved_within_chat_and_inflight_bounded() -> None:
+    manager, bus = _make_manager(max_inflight=2)
+    channel = FakeChannel(bus, delays={"a": 0.02, "b": 0.01, "c": 0.01})
+    manager.channels = {"telegram": channel}
+
+    dispatcher = asyncio.create_task(manager._dispatch_outbound())
+    for i in range(3):
+        for chat in ("a", "b", "c"):
+            await _publish(bus, "telegram", chat, f"{chat}{i}")
+    bus.close_outbound()
+    await asyncio.wait_for(dispatcher, timeout=1)
+
+    for chat in ("a", "b", "c"):
+        assert [c for k, c in channel.sent if k == chat] == [f"{chat}{i}" for i in range(3)]
+    assert channel.max_inflight == 2
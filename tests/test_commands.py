@@ -1,3 +1,4 @@
+import asyncio
 import shutil
 from pathlib import Path
 from unittest.mock import patch
@@ -5,7 +6,7 @@ from unittest.mock import patch
 import pytest
 from typer.testing import CliRunner
 
-from nanobot.cli.commands import app
+from nanobot.cli.commands import _wait_for_shutdown, app
 
 runner = CliRunner()
 
@@ -90,3 +91,22 @@ def test_onboard_existing_workspace_safe_create(mock_paths):
     assert "Created workspace" not in result.stdout
     assert "Created AGENTS.md" in result.stdout
     assert (workspace_dir / "AGENTS.md").exists()
+
+
+async def test_gateway_stops_when_a_background_task_dies():
+    async def crash():
+        raise RuntimeError("consumer died")
+
+    async def no_channels():
+        return None
+
+    shutdown = asyncio.Event()
+    agent = asyncio.create_task(crash())
+    channels = asyncio.create_task(no_channels())
+    failure = await asyncio.wait_for(_wait_for_shutdown(shutdown, {agent: "agent", channels: "channels"}), 1)
+    assert "consumer died" in failure
+
+    idle = asyncio.create_task(asyncio.sleep(10))
+    asyncio.get_running_loop().call_later(0.01, shutdown.set)
+    assert await _wait_for_shutdown(shutdown, {idle: "agent"}) is None
+    idle.cancel()
@@ -0,0 +1,121 @@
+import asyncio
+
+from nanobot.agent.consolidation import ConsolidationScheduler
+from nanobot.agent.memory import MemoryStore, merge_memory
+from nanobot.session.manager import Session
+
+
+class Recorder:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: list[tuple[str, bool]] = []
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def __call__(self, session: Session, archive_all: bool) -> None:
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        await asyncio.sleep(self.delay)
+        self.calls.append((session.key, archive_all))
+        self.inflight -= 1
+
+
+async def test_triggers_are_debounced_into_one_job() -> None:
+    run = Recorder()
+    scheduler = ConsolidationScheduler(run, debounce_s=0.05)
+    session = Session(key="telegram:1")
+    for _ in range(5):
+        scheduler.schedule(session)
+        await asyncio.sleep(0.01)
+
+    await asyncio.sleep(0.1)
+    assert run.calls == [("telegram:1", False)]
+
+
+async def test_debounce_is_capped_by_max_delay() -> None:
+    run = Recorder()
+    scheduler = ConsolidationScheduler(run, debounce_s=0.05, max_delay_s=0.12)
+    session = Session(key="telegram:1")
+    for _ in range(10):  # A request every 30ms keeps resetting the 50ms debounce
+        scheduler.schedule(session)
+        await asyncio.sleep(0.03)
+
+    assert run.calls  # Ran once max_delay_s after the first request anyway
+    await scheduler.drain()
+
+
+async def test_one_job_in_flight_per_session_with_single_follow_up() -> None:
+    run = Recorder(delay=0.05)
+    scheduler = ConsolidationScheduler(run, debounce_s=0, max_concurrent=4)
+    session = Session(key="telegram:1")
+    scheduler.schedule(session)
+    await asyncio.sleep(0.01)
+    for _ in range(3):
+        scheduler.schedule(session)  # arrives while the first job runs
+
+    await scheduler.drain()
+    assert run.calls == [("telegram:1", False)] * 2
+    assert run.max_inflight == 1
+
+
+async def test_waits_for_idle_agent() -> None:
+    run = Recorder()
+    idle = asyncio.Event()
+    scheduler = ConsolidationScheduler(run, idle=idle, debounce_s=0)
+    scheduler.schedule(Session(key="telegram:1"))
+    await asyncio.sleep(0.02)
+    assert run.calls == []
+
+    idle.set()
+    await scheduler.drain()
+    assert run.calls == [("telegram:1", False)]
+
+
+async def test_archive_supersedes_pending_job() -> None:
+    run = Recorder()
+    scheduler = ConsolidationScheduler(run, debounce_s=10)
+    scheduler.schedule(Session(key="telegram:1"))
+    scheduler.archive(Session(key="telegram:1"))
+
+    await scheduler.drain()
+    assert run.calls == [("telegram:1", True)]
+
+
+def test_concurrent_memory_updates_are_merged(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    base = "# Memory\n- likes tea\n"
+    store.write_long_term(base)
+
+    # Two sessions consolidate from the same snapshot
+    store.update_long_term(base, base + "- lives in Oslo\n")
+    store.update_long_term(base, "# Memory\n- prefers coffee\n")
+
+    assert store.read_long_term() == "# Memory\n- lives in Oslo\n- prefers coffee\n"
+
+
+def test_merge_memory_keeps_their_additions() -> None:
+    assert merge_memory("a\n", "a\nb\n", "a\nc\n") == "a\nc\nb\n"
+
+
+def test_memory_ops_apply_to_keyed_facts_and_keep_index_in_sync(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    store.write_long_term("# Long-term Memory\n\n- Likes tea\n")
+    legacy_key = next(iter(store.facts()))
+
+    counts = store.apply_ops([
+        {"op": "add", "key": "user.city", "text": "Lives in Oslo"},
+        {"op": "update", "key": legacy_key, "text": "Prefers coffee"},
+        {"op": "delete", "key": "missing"},
+        {"op": "bogus"},
+    ])
+
+    assert counts == {"add": 1, "update": 1, "delete": 0, "skipped": 2}
+    assert store.read_long_term() == (
+        f"# Long-term Memory\n\n- [{legacy_key}] Prefers coffee\n- [user.city] Lives in Oslo\n"
+    )
+    assert store.facts() == {legacy_key: "Prefers coffee", "user.city": "Lives in Oslo"}
+
+    # A concurrent writer's facts survive: ops apply to the latest file
+    MemoryStore(tmp_path).apply_ops([{"op": "add", "key": "user.pet", "text": "Has a cat"}])
+    store.apply_ops([{"op": "delete", "key": "user.city"}])
+    assert set(store.facts()) == {legacy_key, "user.pet"}
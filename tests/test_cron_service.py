@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from nanobot.cron.service import CronService, _compute_next_run, _job_to_dict
+from nanobot.cron.types import CronJob, CronJobState, CronSchedule
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _write_snapshot(path, jobs: list[CronJob]) -> None:
+    path.write_text(json.dumps({"version": 1, "jobs": [_job_to_dict(j) for j in jobs]}))
+
+
+def _due_job(job_id: str, late_ms: int) -> CronJob:
+    return CronJob(
+        id=job_id,
+        name=job_id,
+        schedule=CronSchedule(kind="every", every_ms=3_600_000),
+        state=CronJobState(next_run_at_ms=_now_ms() - late_ms),
+    )
+
+
+def test_changes_are_journaled_and_replayed(tmp_path) -> None:
+    store = tmp_path / "jobs.json"
+    cli = CronService(store)
+    job = cli.add_job("ping", CronSchedule(kind="every", every_ms=60_000), "ping")
+    other = cli.add_job("pong", CronSchedule(kind="every", every_ms=60_000), "pong")
+    cli.enable_job(job.id, enabled=False)
+    cli.remove_job(other.id)
+
+    assert not store.exists()  # No full rewrite per change
+    assert len(cli.journal_path.read_text().splitlines()) == 4
+
+    reloaded = CronService(store).list_jobs(include_disabled=True)
+    assert [(j.id, j.enabled) for j in reloaded] == [(job.id, False)]
+
+
+async def test_start_compacts_journal_and_picks_up_external_adds(tmp_path) -> None:
+    store = tmp_path / "jobs.json"
+    CronService(store).add_job("a", CronSchedule(kind="every", every_ms=60_000), "a")
+
+    service = CronService(store)
+    await service.start()
+    assert not service.journal_path.exists()
+    assert len(json.loads(store.read_text())["jobs"]) == 1
+
+    CronService(store).add_job("b", CronSchedule(kind="every", every_ms=60_000), "b")
+    await service._on_timer()  # Each tick applies lines other processes appended
+    assert {j.name for j in service.list_jobs()} == {"a", "b"}
+    service.stop()
+
+
+async def test_due_jobs_run_concurrently_under_limit(tmp_path) -> None:
+    store = tmp_path / "jobs.json"
+    _write_snapshot(store, [_due_job(f"j{i}", 10) for i in range(4)])
+    running, peak, done = 0, 0, asyncio.Event()
+    finished: list[str] = []
+
+    async def on_job(job: CronJob) -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        finished.append(job.id)
+        if len(finished) == 4:
+            done.set()
+        return "ok"
+
+    service = CronService(store, on_job=on_job, max_concurrent=2)
+    await service.start()
+    await asyncio.wait_for(done.wait(), timeout=1)
+    service.stop()
+
+    assert peak == 2
+    assert all(j.state.next_run_at_ms > _now_ms() for j in service.list_jobs())
+
+
+async def test_misfire_policy_catches_up_recent_and_skips_stale_runs(tmp_path) -> None:
+    store = tmp_path / "jobs.json"
+    _write_snapshot(store, [_due_job("recent", 60_000), _due_job("stale", 7_200_000)])
+    ran: list[str] = []
+
+    async def on_job(job: CronJob) -> None:
+        ran.append(job.id)
+
+    service = CronService(store, on_job=on_job, misfire_grace_ms=3_600_000)
+    await service.start()
+    await asyncio.sleep(0.05)
+    service.stop()
+
+    assert ran == ["recent"]
+    stale = next(j for j in service.list_jobs() if j.id == "stale")
+    assert stale.state.last_status == "skipped"
+    assert stale.state.next_run_at_ms > _now_ms()
+
+
+def test_cron_expression_honors_timezone_across_dst() -> None:
+    schedule = CronSchedule(kind="cron", expr="0 9 * * *", tz="America/New_York")
+    before_dst = int(datetime(2026, 3, 7, 5, 0, tzinfo=timezone.utc).timestamp() * 1000)
+
+    first = _compute_next_run(schedule, before_dst)
+    second = _compute_next_run(schedule, first)
+
+    # 09:00 EST is 14:00 UTC; after the switch 09:00 EDT is 13:00 UTC
+    assert datetime.fromtimestamp(first / 1000, timezone.utc).hour == 14
+    assert datetime.fromtimestamp(second / 1000, timezone.utc).hour == 13
+
+
+def test_invalid_schedule_rejected(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.json")
+    with pytest.raises(ValueError):
+        service.add_job("x", CronSchedule(kind="cron", expr="0 9 * * *", tz="Mars/Olympus"), "x")
+    with pytest.raises(ValueError):
+        service.add_job("x", CronSchedule(kind="cron", expr="not cron"), "x")
+
+
+@pytest.mark.skipif(not os.environ.get("NANOBOT_BENCH"), reason="benchmark; set NANOBOT_BENCH=1")
+def test_benchmark_recompute_next_runs(tmp_path) -> None:
+    from croniter import croniter
+
+    zones = ["UTC", "Europe/Berlin", "America/New_York", "Asia/Tokyo", None]
+    jobs = [
+        CronJob(
+            id=f"j{i}",
+            name=f"j{i}",
+            # Realistic mix: many reminders share a handful of schedules
+            schedule=CronSchedule(kind="cron", expr=f"{i % 4 * 15} {i % 12 + 8} * * *", tz=zones[i % len(zones)]),
+        )
+        for i in range(5000)
+    ]
+    _write_snapshot(tmp_path / "jobs.json", jobs)
+    service = CronService(tmp_path / "jobs.json")
+    service._load_store()
+
+    start = time.perf_counter()
+    service._recompute_next_runs()
+    cached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for job in jobs:
+        croniter(job.schedule.expr, time.time()).get_next()
+    uncached = time.perf_counter() - start
+
+    print(f"\nrecompute 5000 cron jobs: cached {cached * 1000:.1f}ms, fresh croniter per job {uncached * 1000:.1f}ms")
+    assert all(j.state.next_run_at_ms for j in service.list_jobs())
+
+
+def test_misfire_policy_validated_by_config() -> None:
+    from pydantic import ValidationError
+
+    from nanobot.config.schema import CronConfig
+
+    assert CronConfig(misfire_policy="skip").misfire_policy == "skip"
+    with pytest.raises(ValidationError):
+        CronConfig(misfire_policy="catch_up")
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.tools import shell_session
+from nanobot.agent.tools.base import current_origin, current_session_key
+from nanobot.agent.tools.jobs import JobKillTool, JobManager, JobOutputTool, JobStatusTool
+from nanobot.agent.tools.shell import ExecTool
+from nanobot.agent.tools.shell_session import OutputBuffer
+
+
+async def test_persistent_shell_keeps_cwd_and_env_per_session(tmp_path) -> None:
+    (tmp_path / "sub").mkdir()
+    tool = ExecTool(working_dir=str(tmp_path), persistent=True)
+    try:
+        current_session_key.set("telegram:1")
+        await tool.execute("cd sub && export GREETING=hi")
+        assert (await tool.execute("pwd")).strip() == str(tmp_path / "sub")
+        assert (await tool.execute("echo $GREETING")).strip() == "hi"
+
+        current_session_key.set("telegram:2")
+        assert (await tool.execute("pwd")).strip() == str(tmp_path)
+        assert len(tool.shells) == 2
+    finally:
+        await tool.aclose()
+
+
+async def test_persistent_shell_working_dir_applies_to_one_call(tmp_path) -> None:
+    (tmp_path / "sub").mkdir()
+    tool = ExecTool(working_dir=str(tmp_path), persistent=True)
+    try:
+        current_session_key.set("telegram:1")
+        assert (await tool.execute("pwd  # comment", working_dir=str(tmp_path / "sub"))).strip() == str(tmp_path / "sub")
+        assert (await tool.execute("pwd")).strip() == str(tmp_path)
+    finally:
+        await tool.aclose()
+
+
+async def test_persistent_shell_reports_status_and_recovers_from_exit(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), persistent=True)
+    try:
+        result = await tool.execute("printf out; echo err >&2; false")
+        assert result == "out\nSTDERR:\nerr\n\n\nExit code: 1"
+        assert "Exit code: 3" in await tool.execute("exit 3")
+        assert (await tool.execute("echo back")).strip() == "back"
+    finally:
+        await tool.aclose()
+
+
+async def test_persistent_shell_timeout_returns_partial_output(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), persistent=True, timeout=1)
+    try:
+        result = await tool.execute("echo started; sleep 5")
+        assert "timed out" in result and "started" in result
+        assert (await tool.execute("echo fresh")).strip() == "fresh"
+    finally:
+        await tool.aclose()
+
+
+async def test_restricted_shell_cannot_stay_outside_workspace(tmp_path) -> None:
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    tool = ExecTool(working_dir=str(workspace), persistent=True, restrict_to_workspace=True)
+    try:
+        assert "working directory reset" in await tool.execute("cd ..")
+        assert (await tool.execute("pwd")).strip() == str(workspace)
+    finally:
+        await tool.aclose()
+
+
+async def test_restricted_shell_home_is_the_workspace(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(shell_session, "_bwrap_ok", False)
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    tool = ExecTool(working_dir=str(workspace), persistent=True, restrict_to_workspace=True)
+    try:
+        assert (await tool.execute("cd; pwd")).strip() == str(workspace)
+        assert (await tool.execute("echo ~")).strip() == str(workspace)
+    finally:
+        await tool.aclose()
+
+
+@pytest.mark.skipif(not shutil.which("bwrap"), reason="bubblewrap not installed")
+async def test_restricted_shell_cannot_read_or_write_outside_workspace(tmp_path) -> None:
+    if not await shell_session.bwrap_available():
+        pytest.skip("bubblewrap cannot create sandboxes here")
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    secret = Path.home() / ".nanobot-test-secret"
+    secret.write_text("key")
+    tool = ExecTool(working_dir=str(workspace), persistent=True, restrict_to_workspace=True)
+    try:
+        assert "key" not in await tool.execute(f"cat $(printf %s {secret})")
+        assert "Exit code" in await tool.execute(f"touch $(printf %s {tmp_path})/escaped")
+        assert not (tmp_path / "escaped").exists()
+        assert "Exit code" not in await tool.execute("touch inside")
+        assert (workspace / "inside").exists()
+    finally:
+        await tool.aclose()
+        secret.unlink()
+
+
+async def test_idle_shells_are_reaped(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), persistent=True, idle_timeout=0)
+    await tool.execute("true")
+    await asyncio.sleep(1.1)
+    assert len(tool.shells) == 0
+    await tool.aclose()
+
+
+def test_output_buffer_keeps_head_and_tail() -> None:
+    buf = OutputBuffer(head=4, tail=4)
+    for chunk in (b"ab", b"cdef", b"ghij", b"kl"):
+        buf.write(chunk)
+    assert buf.total == 12 and buf.dropped == 4
+    assert buf.text() == "abcd\n... (4 bytes omitted, 12 total) ...\nijkl"
+
+
+async def test_huge_output_is_bounded(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), max_output=1000)
+    result = await tool.execute("seq 1 200000")
+    assert result.startswith("1\n2\n") and result.rstrip().endswith("200000")
+    assert "bytes omitted" in result and len(result) < 1200
+
+
+async def test_timeout_returns_partial_output_and_kills_group(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), timeout=1)
+    marker = tmp_path / "survived"
+    result = await tool.execute(f"echo started; (sleep 2; touch {marker}) & sleep 5")
+    assert "timed out" in result and "started" in result
+    await asyncio.sleep(1.5)
+    assert not marker.exists()  # The backgrounded child was killed with the group
+
+
+async def test_background_job_spools_output_and_notifies_origin(tmp_path) -> None:
+    announced = asyncio.Queue()
+    jobs = JobManager(tmp_path / "jobs", bus_publish=announced.put)
+    tool = ExecTool(working_dir=str(tmp_path), timeout=1, jobs=jobs)
+    current_session_key.set("telegram:1")
+    current_origin.set(("telegram", "1"))
+
+    started = await tool.execute("echo building; sleep 1.5; echo built", background=True)
+    job_id = started.split()[3].rstrip(".")
+    assert "running" in await JobStatusTool(jobs).execute(job_id=job_id)
+
+    msg = await asyncio.wait_for(announced.get(), timeout=5)  # Outlives the 1s exec timeout
+    assert msg.channel == "system" and msg.chat_id == "telegram:1"
+    assert f"job {job_id} done" in msg.content and "built" in msg.content
+    output = await JobOutputTool(jobs).execute(job_id=job_id, offset=0)
+    assert "[next offset: 15]" in output and "building\nbuilt" in output
+
+    current_session_key.set("telegram:2")
+    current_origin.set(("telegram", "2"))
+    assert (await JobStatusTool(jobs).execute(job_id=job_id)).startswith("Error")
+
+
+async def test_background_job_can_be_killed(tmp_path) -> None:
+    announced = asyncio.Queue()
+    jobs = JobManager(tmp_path / "jobs", bus_publish=announced.put)
+    job = await jobs.start("sleep 30", str(tmp_path), "telegram:1", ("telegram", "1"))
+    current_session_key.set("telegram:1")
+
+    assert await JobKillTool(jobs).execute(job_id=job.id) == f"Killed job {job.id}"
+    await asyncio.sleep(0.1)
+    assert job.status == "killed" and announced.empty()
+
+
+async def test_parent_chat_sees_jobs_started_by_its_subagents(tmp_path) -> None:
+    jobs = JobManager(tmp_path / "jobs")
+    job = await jobs.start("sleep 30", str(tmp_path), "subagent:ab12", ("telegram", "1"))
+
+    current_session_key.set("telegram:1")
+    current_origin.set(("telegram", "1"))
+    assert job.id in await JobStatusTool(jobs).execute()
+    assert await JobKillTool(jobs).execute(job_id=job.id) == f"Killed job {job.id}"
+
+    current_session_key.set("telegram:2")
+    current_origin.set(("telegram", "2"))
+    assert (await JobStatusTool(jobs).execute(job_id=job.id)).startswith("Error")
+
+
+def test_guard_sees_symlinks_created_after_earlier_checks(tmp_path) -> None:
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    link = workspace / "link"
+    tool = ExecTool(working_dir=str(workspace), restrict_to_workspace=True)
+
+    link.mkdir()
+    assert tool._guard_command(f"cat {link}/id_rsa", str(workspace)) is None
+    link.rmdir()
+    link.symlink_to(tmp_path)
+    assert "outside working dir" in tool._guard_command(f"cat {link}/id_rsa", str(workspace))
+
+
+def _reference_guard(tool: ExecTool, command: str, cwd: str) -> str | None:
+    """The previous per-pattern guard, kept as the reference for the compiled one."""
+    cmd = command.strip()
+    lower = cmd.lower()
+    for pattern in tool.deny_patterns:
+        if re.search(pattern, lower):
+            return "Error: Command blocked by safety guard (dangerous pattern detected)"
+    if tool.allow_patterns and not any(re.search(p, lower) for p in tool.allow_patterns):
+        return "Error: Command blocked by safety guard (not in allowlist)"
+    if tool.restrict_to_workspace:
+        if "..\\" in cmd or "../" in cmd:
+            return "Error: Command blocked by safety guard (path traversal detected)"
+        cwd_path = Path(cwd).resolve()
+        win_paths = re.findall(r"[A-Za-z]:\\[^\\\"']+", cmd)
+        posix_paths = re.findall(r"(?:^|[\s|>])(/[^\s\"'>]+)", cmd)
+        for raw in win_paths + posix_paths:
+            try:
+                p = Path(raw.strip()).resolve()
+            except Exception:
+                continue
+            if p.is_absolute() and cwd_path not in p.parents and p != cwd_path:
+                return "Error: Command blocked by safety guard (path outside working dir)"
+    return None
+
+
+def _corpus(ws: str) -> list[str]:
+    return [
+        "ls -la", "git status", "git diff --stat HEAD~1", "python -m pytest -q tests/", "cat README.md",
+        f"cat {ws}/notes/todo.md", f"grep -rn TODO {ws}/src | head -20", "npm run build > build.log",
+        ".venv/bin/python -m pip list", f"find {ws} -name '*.py' | wc -l", "echo hello > out.txt",
+        "rm -rf build/", "rm -f old.log", "dd if=/dev/zero of=x bs=1M count=1", "sudo shutdown -h now",
+        "cat /etc/passwd", "ls ../", "tail -n 50 /var/log/syslog", r"type C:\Windows\system.ini",
+        f"cp {ws}/a.txt {ws}/b.txt", "curl -s https://example.com/api | jq .", "make -j8 && make test",
+    ]
+
+
+@pytest.mark.parametrize("restrict", [False, True])
+def test_compiled_guard_matches_reference(tmp_path, restrict) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), restrict_to_workspace=restrict)
+    allow = ExecTool(working_dir=str(tmp_path), allow_patterns=[r"^git\b", r"^ls\b"])
+    for command in _corpus(str(tmp_path)):
+        assert tool._guard_command(command, str(tmp_path)) == _reference_guard(tool, command, str(tmp_path)), command
+        assert allow._guard_command(command, str(tmp_path)) == _reference_guard(allow, command, str(tmp_path)), command
+
+
+@pytest.mark.skipif(not os.environ.get("NANOBOT_BENCH"), reason="benchmark; set NANOBOT_BENCH=1")
+def test_benchmark_guard(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), restrict_to_workspace=True)
+    corpus = _corpus(str(tmp_path)) * 500
+    cwd = str(tmp_path)
+
+    start = time.perf_counter()
+    for command in corpus:
+        tool._guard_command(command, cwd)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for command in corpus:
+        _reference_guard(tool, command, cwd)
+    reference = time.perf_counter() - start
+
+    print(f"\nguard x{len(corpus)}: compiled+cached {compiled * 1000:.0f}ms, per-pattern {reference * 1000:.0f}ms")
@@ -0,0 +1,68 @@
+import asyncio
+
+from nanobot.heartbeat.service import HeartbeatService
+
+
+class Agent:
+    def __init__(self, reply: str = "HEARTBEAT_OK"):
+        self.reply = reply
+        self.calls = 0
+
+    async def __call__(self, prompt: str) -> str:
+        self.calls += 1
+        return self.reply
+
+
+def _service(tmp_path, agent, **kwargs) -> HeartbeatService:
+    (tmp_path / "HEARTBEAT.md").write_text("- [ ] Check the inbox\n")
+    return HeartbeatService(tmp_path, on_heartbeat=agent, interval_s=60, max_interval_s=240, **kwargs)
+
+
+async def test_unchanged_ok_backs_off(tmp_path, monkeypatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr("nanobot.heartbeat.service.time.monotonic", lambda: clock[0])
+    agent = Agent()
+    service = _service(tmp_path, agent)
+
+    for _ in range(9):  # one tick per base interval
+        await service._tick()
+        clock[0] += 60
+
+    # Checks at t=0, 60, 180, 420 (gaps of 60, 120, 240 capped at max_interval_s)
+    assert agent.calls == 4
+
+
+async def test_edit_triggers_check_and_resets_backoff(tmp_path, monkeypatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr("nanobot.heartbeat.service.time.monotonic", lambda: clock[0])
+    agent = Agent()
+    service = _service(tmp_path, agent)
+    await service._tick()
+    clock[0] += 10
+    await service._tick()
+    assert agent.calls == 1
+
+    (tmp_path / "HEARTBEAT.md").write_text("- [ ] Check the inbox\n- [ ] Water the plants\n")
+    await service._tick()
+    assert agent.calls == 2
+
+
+async def test_unfinished_work_keeps_base_interval(tmp_path) -> None:
+    agent = Agent(reply="Sent the report.")
+    service = _service(tmp_path, agent)
+    await service._tick()
+    await service._tick()
+    assert agent.calls == 2
+
+
+async def test_file_watch_wakes_loop(tmp_path) -> None:
+    agent = Agent()
+    service = _service(tmp_path, agent, watch_interval_s=0.01)
+    await service.start()
+    await asyncio.sleep(0.03)
+    assert agent.calls == 0  # Base interval not reached and file untouched
+
+    (tmp_path / "HEARTBEAT.md").write_text("- [ ] Renew the domain\n")
+    await asyncio.sleep(0.05)
+    service.stop()
+    assert agent.calls == 1
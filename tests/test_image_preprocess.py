@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import pytest
+
+from nanobot.media import images
+from nanobot.media.images import ImagePreprocessor
+from nanobot.media.store import MediaStore
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _photo(store: MediaStore, size=(4000, 3000), orientation: int | None = None) -> str:
+    img = Image.new("RGB", size, (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    path = store.temp_path(".jpg")
+    img.save(path, "JPEG", exif=exif.tobytes())
+    return str(store.save_bytes(path.read_bytes(), ".jpg"))
+
+
+async def test_large_photo_downscaled_and_stripped(tmp_path) -> None:
+    store = MediaStore(tmp_path / "media")
+    prep = ImagePreprocessor(store, max_dimension=1024)
+    source = _photo(store, orientation=6)  # Rotated 90 degrees
+
+    [out] = await prep.prepare([source])
+
+    assert out != source and Path(out).parent == store.root
+    with Image.open(out) as img:
+        assert img.size == (768, 1024)  # Orientation applied, then fitted
+        assert not img.getexif()
+    prep.close()
+
+
+async def test_results_cached_by_content_and_settings(tmp_path, monkeypatch) -> None:
+    store = MediaStore(tmp_path / "media")
+    prep = ImagePreprocessor(store, max_dimension=512, format="webp")
+    source = _photo(store)
+    first = await prep.prepare([source])
+
+    calls = 0
+    original = images.encode_image
+
+    def counting(*args):
+        nonlocal calls
+        calls += 1
+        return original(*args)
+
+    monkeypatch.setattr(images, "encode_image", counting)
+    assert await prep.prepare([source]) == first and calls == 0
+    assert first[0].endswith(".512q85.webp")
+
+    other = ImagePreprocessor(store, max_dimension=256)
+    await other.prepare([source])
+    assert calls == 1
+    prep.close()
+    other.close()
+
+
+async def test_non_images_and_undecodable_files_pass_through(tmp_path) -> None:
+    store = MediaStore(tmp_path / "media")
+    prep = ImagePreprocessor(store)
+    doc = tmp_path / "notes.pdf"
+    doc.write_bytes(b"%PDF")
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not a png")
+
+    assert await prep.prepare([str(doc), str(broken)]) == [str(doc), str(broken)]
+    prep.close()
+
+
+async def test_without_pillow_originals_are_sent(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(images, "PIL_AVAILABLE", False)
+    store = MediaStore(tmp_path / "media")
+    source = _photo(store)
+
+    assert await ImagePreprocessor(store).prepare([source]) == [source]
+
+
+def test_image_format_is_validated_in_config() -> None:
+    from pydantic import ValidationError
+
+    from nanobot.config.schema import MediaConfig
+
+    assert MediaConfig(image_format="webp").image_format == "webp"
+    with pytest.raises(ValidationError):
+        MediaConfig(image_format="png")
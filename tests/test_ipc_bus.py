@@ -0,0 +1,108 @@
+import asyncio
+
+from nanobot.agent.tools.cron import RemoteCronTool, serve_cron_call
+from nanobot.bus import ipc
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.ipc import IPCBusServer, IPCWorkerLink, shard_for
+from nanobot.bus.queue import MessageBus
+from nanobot.cron.service import CronService
+
+
+def _msg(chat_id: str, content: str = "hi", channel: str = "telegram") -> InboundMessage:
+    return InboundMessage(channel=channel, sender_id="u1", chat_id=chat_id, content=content)
+
+
+def test_shard_is_stable_and_follows_system_origin() -> None:
+    user = _msg("42")
+    system = _msg("telegram:42", channel="system")
+    assert shard_for(user, 4) == shard_for(_msg("42", content="other"), 4)
+    assert shard_for(system, 4) == shard_for(user, 4)
+
+
+async def _echo_agent(bus: MessageBus, index: int) -> None:
+    async for msg in bus.inbound_messages():
+        await bus.publish_outbound(OutboundMessage(
+            channel=msg.channel, chat_id=msg.chat_id, content=f"w{index}:{msg.content}",
+        ))
+
+
+async def test_front_routes_by_session_and_drains_on_close(tmp_path) -> None:
+    workers = 2
+    front_bus = MessageBus()
+    server = IPCBusServer(front_bus, tmp_path / "bus.sock", workers)
+    await server.start()
+
+    worker_buses = [MessageBus() for _ in range(workers)]
+    links = [
+        asyncio.create_task(IPCWorkerLink(bus, tmp_path / "bus.sock", i).run())
+        for i, bus in enumerate(worker_buses)
+    ]
+    agents = [asyncio.create_task(_echo_agent(bus, i)) for i, bus in enumerate(worker_buses)]
+
+    chats = [str(i) for i in range(8)]
+    for chat in chats:
+        await front_bus.publish_inbound(_msg(chat))
+
+    replies = {}
+    for _ in chats:
+        out = await asyncio.wait_for(front_bus.consume_outbound(), timeout=2)
+        replies[out.chat_id] = out.content
+
+    for chat in chats:
+        assert replies[chat] == f"w{shard_for(_msg(chat), workers)}:hi"
+
+    # Graceful shutdown: front closes intake, workers drain and say bye
+    front_bus.close_inbound()
+    await asyncio.wait_for(asyncio.gather(*agents), timeout=2)
+    for bus in worker_buses:
+        bus.close_outbound()
+    await asyncio.wait_for(asyncio.gather(*links), timeout=2)
+    await server.wait_closed(timeout=2)
+    assert not (tmp_path / "bus.sock").exists()
+
+
+async def test_cron_calls_from_other_workers_run_on_worker_zero(tmp_path) -> None:
+    server = IPCBusServer(MessageBus(), tmp_path / "bus.sock", 2)
+    await server.start()
+    cron = CronService(tmp_path / "jobs.json")
+    owner, other = (IPCWorkerLink(MessageBus(), tmp_path / "bus.sock", i) for i in range(2))
+    owner.serve("cron", lambda params, channel, chat_id: serve_cron_call(cron, params, channel, chat_id))
+    links = [asyncio.create_task(link.run()) for link in (owner, other)]
+    while len(server._writers) < 2:
+        await asyncio.sleep(0.01)
+
+    tool = RemoteCronTool(other.call)
+    tool.set_context("telegram", "42")
+    result = await asyncio.wait_for(tool.execute(action="add", message="stretch", every_seconds=600), 2)
+
+    assert result.startswith("Created job")
+    [job] = cron.list_jobs()
+    assert (job.payload.channel, job.payload.to) == ("telegram", "42")
+    assert "stretch" in await tool.execute(action="list")
+
+    for task in links:
+        task.cancel()
+    await server.wait_closed(timeout=0.1)
+
+
+async def test_message_whose_send_fails_is_resent_on_reconnect(tmp_path, monkeypatch) -> None:
+    server = IPCBusServer(MessageBus(), tmp_path / "bus.sock", 1)
+    await server._queues[0].put(_msg("1", "first"))
+    await server._queues[0].put(_msg("1", "second"))
+
+    async def broken(writer, obj):
+        raise ConnectionResetError("worker died")
+
+    monkeypatch.setattr(ipc, "_send_frame", broken)
+    await server._feed_worker(0, None)
+
+    sent = []
+
+    async def recording(writer, obj):
+        sent.append(obj["msg"]["content"] if obj["t"] == "in" else obj["t"])
+
+    monkeypatch.setattr(ipc, "_send_frame", recording)
+    await server._queues[0].put(None)
+    await server._feed_worker(0, None)  # The next connection
+
+    assert sent == ["first", "second", "close"]
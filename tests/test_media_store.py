@@ -0,0 +1,87 @@
+import os
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.media.store import MediaStore
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def test_streamed_downloads_are_deduplicated_by_content(tmp_path) -> None:
+    store = MediaStore(tmp_path / "media")
+
+    first = await store.save_stream(_chunks(b"abc", b"def"), ".jpg")
+    second = await store.save_stream(_chunks(b"abcdef"), ".jpg")
+
+    assert first == second and first.read_bytes() == b"abcdef"
+    assert [p.name for p in store.root.iterdir() if p.is_file()] == [first.name]
+    assert not list((store.root / "tmp").iterdir())
+
+
+async def test_adopt_moves_downloaded_file_into_store(tmp_path) -> None:
+    store = MediaStore(tmp_path / "media")
+    tmp = store.temp_path(".ogg")
+    tmp.write_bytes(b"voice")
+
+    path = await store.adopt(tmp)
+
+    assert not tmp.exists() and path.parent == store.root
+    assert path.suffix == ".ogg" and path.read_bytes() == b"voice"
+
+
+def test_least_recently_used_files_evicted_over_cap(tmp_path) -> None:
+    store = MediaStore(tmp_path / "media", max_bytes=250)
+    a = store.save_bytes(b"a" * 100, ".bin")
+    b = store.save_bytes(b"b" * 100, ".bin")
+    os.utime(a, ns=(os.stat(b).st_atime_ns + 1_000_000, os.stat(a).st_mtime_ns))  # a used after b
+
+    c = store.save_bytes(b"c" * 100, ".bin")
+
+    assert a.exists() and c.exists() and not b.exists()
+
+
+def test_cap_covers_files_written_by_another_store(tmp_path) -> None:
+    root = tmp_path / "media"
+    channels, worker = MediaStore(root, max_bytes=250), MediaStore(root, max_bytes=250)
+    first = channels.save_bytes(b"a" * 100, ".bin")
+    old = worker.save_bytes(b"w" * 100, ".bin")  # Not in the channels store's index yet
+    os.utime(old, ns=(os.stat(first).st_atime_ns - 1_000_000, os.stat(old).st_mtime_ns))  # old used least recently
+
+    channels.save_bytes(b"b" * 100, ".bin")
+
+    assert not old.exists() and first.exists()
+
+
+def test_existing_files_are_indexed_on_first_save(tmp_path) -> None:
+    root = tmp_path / "media"
+    root.mkdir()
+    (root / "old.bin").write_bytes(b"x" * 200)
+
+    store = MediaStore(root, max_bytes=250)
+    new = store.save_bytes(b"y" * 100, ".bin")
+
+    assert new.exists() and not (root / "old.bin").exists()
+
+
+async def test_data_urls_are_encoded_once(tmp_path, monkeypatch) -> None:
+    store = MediaStore(tmp_path / "media")
+    image = store.save_bytes(b"\x89PNG fake", ".png")
+    reads = 0
+    original = type(image).read_bytes
+
+    def counting_read(self):
+        nonlocal reads
+        reads += 1
+        return original(self)
+
+    monkeypatch.setattr(type(image), "read_bytes", counting_read)
+    context = ContextBuilder(tmp_path / "ws", media=store)
+
+    for _ in range(3):
+        content = await context._build_user_content("look", [str(image)])
+
+    assert reads == 1
+    assert content[0]["image_url"]["url"].startswith("data:image/png;base64,")
+    assert await context._build_user_content("look", [str(tmp_path / "missing.png")]) == "look"
@@ -0,0 +1,101 @@
+import asyncio
+import fcntl
+import json
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.memory import MemoryNamespaces
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.session.manager import Session
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, reply: str):
+        super().__init__()
+        self.reply = reply
+        self.prompts: list[list[dict]] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.prompts.append(messages)
+        return LLMResponse(content=self.reply)
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+def test_turn_loads_shared_plus_own_namespace_only(tmp_path) -> None:
+    memories = MemoryNamespaces(tmp_path, scope="user")
+    memories.shared.write_long_term("- [team] Works at Acme\n")
+    memories.store(memories.namespace_for(None, "telegram:alice")).write_long_term("- [tea] Likes tea\n")
+    memories.store(memories.namespace_for(None, "telegram:bob")).write_long_term("- [coffee] Likes coffee\n")
+
+    context = memories.get_memory_context(user_key="telegram:alice")
+    assert "Works at Acme" in context
+    assert "Likes tea" in context
+    assert "Likes coffee" not in context
+    assert (tmp_path / "memory" / "users" / "telegram_alice" / "MEMORY.md").exists()
+
+
+def test_global_scope_ignores_keys(tmp_path) -> None:
+    memories = MemoryNamespaces(tmp_path)
+    memories.shared.write_long_term("fact\n")
+    assert memories.namespace_for("telegram:1", "telegram:alice") is None
+    assert memories.get_memory_context("telegram:1", "telegram:alice") == "## Long-term Memory\nfact\n"
+
+
+def test_unknown_scope_rejected(tmp_path) -> None:
+    from pydantic import ValidationError
+
+    from nanobot.config.schema import AgentDefaults
+
+    with pytest.raises(ValueError):
+        MemoryNamespaces(tmp_path, scope="team")
+    with pytest.raises(ValidationError):  # Caught at config load, before the agent starts
+        AgentDefaults(memory_scope="team")
+
+
+async def test_consolidation_routes_ops_by_scope(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    provider = ScriptedProvider(json.dumps({
+        "history_entry": "[2026-01-01 10:00] Talked about drinks.",
+        "memory_ops": [
+            {"op": "add", "key": "drink", "text": "Likes tea"},
+            {"op": "add", "key": "office", "text": "Office is in Oslo", "scope": "shared"},
+        ],
+    }))
+    agent = AgentLoop(MessageBus(), provider, tmp_path / "ws", memory_window=4, memory_scope="session")
+
+    session = Session(key="telegram:42", metadata={"user": "telegram:alice"})
+    for i in range(6):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"msg {i}")
+    await agent._consolidate_memory(session)
+
+    memories = agent.context.memories
+    assert memories.shared.facts() == {"office": "Office is in Oslo"}
+    assert memories.store("sessions/telegram_42").facts() == {"drink": "Likes tea"}
+    assert session.last_consolidated == 4
+
+
+async def test_consolidation_waits_for_memory_lock_off_the_event_loop(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    provider = ScriptedProvider(json.dumps({
+        "history_entry": "[2026-01-01 10:00] Talked about drinks.",
+        "memory_ops": [{"op": "add", "key": "drink", "text": "Likes tea"}],
+    }))
+    agent = AgentLoop(MessageBus(), provider, tmp_path / "ws", memory_window=4)
+    session = Session(key="telegram:42")
+    for i in range(6):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"msg {i}")
+    shared = agent.context.memories.shared
+
+    with open(shared.lock_file, "a") as held:  # Another process holding the lock
+        fcntl.flock(held, fcntl.LOCK_EX)
+        task = asyncio.create_task(agent._consolidate_memory(session))
+        await asyncio.wait_for(asyncio.sleep(0.05), timeout=1)  # The loop keeps running
+        assert not task.done()
+        fcntl.flock(held, fcntl.LOCK_UN)
+
+    await asyncio.wait_for(task, timeout=5)
+    assert shared.facts() == {"drink": "Likes tea"}
@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.queue import BusClosedError, MessageBus
+
+
+def _msg(
+    content: str, chat_id: str = "c1", channel: str = "telegram", sender: str = "u1", **metadata
+) -> InboundMessage:
+    return InboundMessage(channel=channel, sender_id=sender, chat_id=chat_id, content=content, metadata=metadata)
+
+
+async def test_system_messages_jump_ahead_of_user_chatter() -> None:
+    bus = MessageBus()
+    await bus.publish_inbound(_msg("group", chat_id="g1", is_group=True))
+    await bus.publish_inbound(_msg("dm"))
+    await bus.publish_inbound(_msg("done", channel="system", chat_id="telegram:c1"))
+
+    order = [(await bus.consume_inbound()).content for _ in range(3)]
+    assert order == ["done", "dm", "group"]
+
+
+async def test_session_quota_drops_oldest() -> None:
+    bus = MessageBus(per_session_limit=2)
+    for i in range(4):
+        assert await bus.publish_inbound(_msg(f"m{i}"))
+
+    assert bus.inbound_size == 2
+    assert [(await bus.consume_inbound()).content for _ in range(2)] == ["m2", "m3"]
+    assert bus.metrics()["inbound"]["dropped"] == 2
+
+
+async def test_channel_quota_reject_policy() -> None:
+    bus = MessageBus(per_channel_limit=2, overflow_policy="reject")
+    assert await bus.publish_inbound(_msg("a", chat_id="c1"))
+    assert await bus.publish_inbound(_msg("b", chat_id="c2"))
+    assert not await bus.publish_inbound(_msg("c", chat_id="c3"))
+    # Other channels are unaffected by a flood in one
+    assert await bus.publish_inbound(_msg("d", channel="discord"))
+    assert bus.pressure("telegram") == 1.0
+    assert bus.metrics()["inbound"]["rejected"] == 1
+
+
+async def test_reject_policy_back_pressures_publisher_until_global_room() -> None:
+    bus = MessageBus(max_inbound=1, overflow_policy="reject", publish_timeout=1.0)
+    assert await bus.publish_inbound(_msg("first"))
+
+    waiting = asyncio.create_task(bus.publish_inbound(_msg("second")))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()  # The channel waits instead of losing the message
+
+    assert (await bus.consume_inbound()).content == "first"
+    assert await waiting
+    assert (await bus.consume_inbound()).content == "second"
+    assert bus.metrics()["inbound"]["dropped"] == bus.metrics()["inbound"]["rejected"] == 0
+
+    bus = MessageBus(max_inbound=1, overflow_policy="reject", publish_timeout=0.01)
+    await bus.publish_inbound(_msg("first"))
+    assert not await bus.publish_inbound(_msg("second"))  # Gives up after the timeout
+
+
+async def test_reject_policy_refuses_a_flooding_chat_without_waiting() -> None:
+    bus = MessageBus(per_session_limit=1, overflow_policy="reject", publish_timeout=60.0)
+    assert await bus.publish_inbound(_msg("first"))
+
+    # The channel's task is not held up, so other chats keep flowing
+    assert not await asyncio.wait_for(bus.publish_inbound(_msg("flood")), timeout=0.5)
+    assert await asyncio.wait_for(bus.publish_inbound(_msg("other", chat_id="c2")), timeout=0.5)
+
+
+def test_overflow_policy_validated_by_config() -> None:
+    from pydantic import ValidationError
+
+    from nanobot.config.schema import BusConfig
+
+    assert BusConfig().overflow_policy == "reject"
+    with pytest.raises(ValidationError):
+        BusConfig(overflow_policy="drop-oldest")
+
+
+async def test_coalesce_merges_into_pending_message() -> None:
+    bus = MessageBus(per_session_limit=1, overflow_policy="coalesce")
+    await bus.publish_inbound(_msg("first"))
+    await bus.publish_inbound(_msg("second"))
+
+    assert bus.inbound_size == 1
+    assert (await bus.consume_inbound()).content == "first\nsecond"
+
+
+async def test_coalesce_keeps_senders_apart() -> None:
+    bus = MessageBus(per_session_limit=1, overflow_policy="coalesce")
+    await bus.publish_inbound(_msg("alice says", chat_id="g1", sender="alice", is_group=True))
+    await bus.publish_inbound(_msg("bob says", chat_id="g1", sender="bob", is_group=True))
+
+    msg = await bus.consume_inbound()
+    assert (msg.sender_id, msg.content) == ("bob", "bob says")  # Alice's was dropped, not relabelled
+
+
+async def test_global_overflow_never_evicts_more_urgent_work() -> None:
+    bus = MessageBus(max_inbound=1)
+    await bus.publish_inbound(_msg("announce", channel="system", chat_id="telegram:c1"))
+    assert not await bus.publish_inbound(_msg("hello"))
+
+    bus = MessageBus(max_inbound=1)
+    await bus.publish_inbound(_msg("group", chat_id="g1", is_group=True))
+    assert await bus.publish_inbound(_msg("dm"))
+    assert (await bus.consume_inbound()).content == "dm"
+
+
+async def test_metrics_report_depth_and_latency() -> None:
+    bus = MessageBus()
+    await bus.publish_inbound(_msg("x"))
+    await bus.publish_outbound(OutboundMessage(channel="telegram", chat_id="c1", content="y"))
+
+    metrics = bus.metrics()
+    assert metrics["inbound"]["total"] == 1
+    assert metrics["outbound"]["total"] == 1
+
+    await bus.consume_inbound()
+    await bus.consume_outbound()
+    assert bus.metrics()["inbound"]["wait_ms_max"] >= 0
+
+
+async def test_close_drains_queued_messages_then_ends_iteration() -> None:
+    bus = MessageBus()
+    await bus.publish_inbound(_msg("a"))
+    await bus.publish_inbound(_msg("b"))
+    bus.close_inbound()
+
+    assert not await bus.publish_inbound(_msg("late"))
+    assert [m.content async for m in bus.inbound_messages()] == ["a", "b"]
+
+
+async def test_close_wakes_idle_consumer_immediately() -> None:
+    bus = MessageBus()
+    consumer = asyncio.create_task(bus.consume_outbound())
+    await asyncio.sleep(0)
+    bus.close_outbound()
+
+    with pytest.raises(BusClosedError):
+        await asyncio.wait_for(consumer, timeout=0.1)
+
+
+async def test_bounded_outbound_blocks_publisher_until_consumed() -> None:
+    bus = MessageBus(max_outbound=1)
+    await bus.publish_outbound(OutboundMessage(channel="telegram", chat_id="c1", content="1"))
+    publisher = asyncio.create_task(
+        bus.publish_outbound(OutboundMessage(channel="telegram", chat_id="c1", content="2"))
+    )
+    await asyncio.sleep(0)
+    assert not publisher.done()
+
+    assert (await bus.consume_outbound()).content == "1"
+    await asyncio.wait_for(publisher, timeout=0.1)
+    assert (await bus.consume_outbound()).content == "2"
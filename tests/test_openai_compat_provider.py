@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import pytest
+
+from nanobot.providers.openai_compat_provider import OpenAICompatProvider
+
+
+def _make_provider(handler, **kwargs) -> OpenAICompatProvider:
+    provider = OpenAICompatProvider(
+        api_key="dummy",
+        api_base="http://localhost:8000/v1",
+        default_model="hosted_vllm/meta-llama/Llama-3.1-8B-Instruct",
+        provider_name="vllm",
+        **kwargs,
+    )
+    provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return provider
+
+
+def _completion(message: dict, finish_reason: str = "stop") -> dict:
+    return {
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+
+
+async def test_chat_parses_content_and_strips_prefix() -> None:
+    seen: dict = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["url"] = str(request.url)
+        seen["auth"] = request.headers.get("authorization")
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(200, json=_completion({"role": "assistant", "content": "hi"}))
+
+    provider = _make_provider(handler)
+    response = await provider.chat([{"role": "user", "content": "hello"}], max_tokens=0)
+
+    assert response.content == "hi"
+    assert response.usage["total_tokens"] == 15
+    assert seen["url"] == "http://localhost:8000/v1/chat/completions"
+    assert seen["auth"] == "Bearer dummy"
+    assert seen["body"]["model"] == "meta-llama/Llama-3.1-8B-Instruct"
+    assert seen["body"]["max_tokens"] == 1
+    assert "tools" not in seen["body"]
+
+
+async def test_chat_parses_tool_calls() -> None:
+    message = {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {"id": "c1", "type": "function", "function": {"name": "exec", "arguments": '{"command": "ls"}'}},
+            {"id": "c2", "type": "function", "function": {"name": "exec", "arguments": "not json"}},
+        ],
+    }
+    provider = _make_provider(lambda _r: httpx.Response(200, json=_completion(message, "tool_calls")))
+    response = await provider.chat([{"role": "user", "content": "x"}], tools=[{"type": "function"}])
+
+    assert response.finish_reason == "tool_calls"
+    assert [tc.arguments for tc in response.tool_calls] == [{"command": "ls"}, {"raw": "not json"}]
+
+
+async def test_pre_encoded_tool_definitions_are_spliced_into_body() -> None:
+    from nanobot.agent.tools.registry import ToolDefinitions
+
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(200, json=_completion({"role": "assistant", "content": "ok"}))
+
+    tools = ToolDefinitions([{"type": "function", "function": {"name": "exec", "description": "Run ünïcode"}}])
+    await _make_provider(handler).chat([{"role": "user", "content": "x"}], tools=tools)
+
+    assert seen["body"]["tools"] == list(tools)
+    assert seen["body"]["tool_choice"] == "auto"
+
+
+async def test_litellm_gets_the_cached_list_copy_of_tool_definitions(monkeypatch) -> None:
+    from nanobot.agent.tools.registry import ToolDefinitions
+    from nanobot.providers import litellm_provider
+
+    passed = []
+
+    async def mutating_completion(**kwargs):
+        passed.append(kwargs["tools"])
+        kwargs["tools"][0]["function"]["name"] = "rewritten"
+        raise RuntimeError("stop")
+
+    monkeypatch.setattr(litellm_provider, "acompletion", mutating_completion)
+    tools = ToolDefinitions([{"type": "function", "function": {"name": "exec"}}])
+    provider = litellm_provider.LiteLLMProvider(api_key="dummy", default_model="openai/m")
+    await provider.chat([{"role": "user", "content": "x"}], tools=tools)
+
+    assert passed[0] is tools.schemas  # Built once, not re-parsed per call
+    assert tools[0]["function"]["name"] == "exec" and '"exec"' in tools.encoded
+
+
+async def test_chat_returns_error_response_on_http_error() -> None:
+    provider = _make_provider(lambda _r: httpx.Response(500, text="boom"))
+    response = await provider.chat([{"role": "user", "content": "x"}])
+
+    assert response.finish_reason == "error"
+    assert response.content.startswith("Error calling LLM")
+
+
+async def test_chat_stream_assembles_deltas() -> None:
+    chunks = [
+        {"choices": [{"index": 0, "delta": {"content": "Hel"}}]},
+        {"choices": [{"index": 0, "delta": {"content": "lo"}}]},
+        {"choices": [{"index": 0, "delta": {"tool_calls": [
+            {"index": 0, "id": "c1", "function": {"name": "read_file", "arguments": '{"pa'}},
+        ]}}]},
+        {"choices": [{"index": 0, "delta": {"tool_calls": [
+            {"index": 0, "function": {"arguments": 'th": "a.txt"}'}},
+        ]}, "finish_reason": "tool_calls"}]},
+        {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7}},
+    ]
+    body = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    provider = _make_provider(handler, stream=True)
+    response = await provider.chat([{"role": "user", "content": "x"}])
+
+    assert response.content == "Hello"
+    assert response.finish_reason == "tool_calls"
+    assert response.tool_calls[0].name == "read_file"
+    assert response.tool_calls[0].arguments == {"path": "a.txt"}
+    assert response.usage["total_tokens"] == 7
+
+
+@pytest.mark.skipif(not os.environ.get("NANOBOT_BENCH"), reason="benchmark; set NANOBOT_BENCH=1")
+async def test_benchmark_native_vs_litellm_overhead() -> None:
+    """Per-call overhead against a local stub server (no network, no model)."""
+    from nanobot.providers.litellm_provider import LiteLLMProvider
+
+    payload = json.dumps({
+        "id": "x", "object": "chat.completion", "created": 0, "model": "m",
+        **_completion({"role": "assistant", "content": "ok"}),
+    }).encode()
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                writer.close()
+                return
+            length = next(
+                int(line.split(b":")[1]) for line in head.split(b"\r\n")
+                if line.lower().startswith(b"content-length")
+            )
+            await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    base = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/v1"
+    messages = [{"role": "user", "content": "hello"}]
+    n = 200
+
+    native = OpenAICompatProvider(api_key="dummy", api_base=base, default_model="m", provider_name="vllm")
+    lite = LiteLLMProvider(api_key="dummy", api_base=base, default_model="m", provider_name="vllm")
+    try:
+        results = {}
+        for label, provider in (("native", native), ("litellm", lite)):
+            await provider.chat(messages)  # warm up connection pool / imports
+            start = time.perf_counter()
+            for _ in range(n):
+                assert (await provider.chat(messages)).content == "ok"
+            results[label] = (time.perf_counter() - start) / n * 1e6
+        print(f"\nper-call overhead: native {results['native']:.0f}us, litellm {results['litellm']:.0f}us")
+    finally:
+        await native.aclose()
+        server.close()
@@ -0,0 +1,67 @@
+import asyncio
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import ScheduledConfig
+from nanobot.providers.base import LLMProvider, LLMResponse
+
+
+class RecordingProvider(LLMProvider):
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.calls: list[dict] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.calls.append({"messages": messages, "tools": tools, "model": model})
+        await asyncio.sleep(self.delay)
+        return LLMResponse(content="done", usage={"prompt_tokens": 100, "completion_tokens": 5, "total_tokens": 105})
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+def _agent(tmp_path, monkeypatch, provider, **scheduled) -> AgentLoop:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    workspace = tmp_path / "ws"
+    (workspace / "skills" / "demo").mkdir(parents=True)
+    (workspace / "skills" / "demo" / "SKILL.md").write_text("---\ndescription: demo skill\n---\nDo demo things.\n")
+    (workspace / "AGENTS.md").write_text("Long agent instructions.\n")
+    return AgentLoop(MessageBus(), provider, workspace, model="chat-model", scheduled_config=ScheduledConfig(**scheduled))
+
+
+async def test_scheduled_turn_uses_light_prompt_and_own_tools(tmp_path, monkeypatch) -> None:
+    provider = RecordingProvider()
+    agent = _agent(tmp_path, monkeypatch, provider, model="cheap-model")
+
+    response, usage = await agent.process_scheduled("check the weather", session_key="cron:abc")
+
+    call = provider.calls[0]
+    system = call["messages"][0]["content"]
+    assert "demo skill" not in system and "Long agent instructions" not in system
+    assert call["model"] == "cheap-model"
+    tool_names = {t["function"]["name"] for t in call["tools"]}
+    assert "message" in tool_names and not {"spawn", "cron"} & tool_names
+
+    assert response == "done"
+    assert usage["llm_calls"] == 1 and usage["total_tokens"] == 105
+    assert len(agent.sessions.get_or_create("cron:abc").messages) == 2
+
+
+async def test_job_model_overrides_lane_model(tmp_path, monkeypatch) -> None:
+    provider = RecordingProvider()
+    agent = _agent(tmp_path, monkeypatch, provider, model="cheap-model")
+
+    await agent.process_scheduled("ping", session_key="heartbeat", model="job-model")
+    assert provider.calls[0]["model"] == "job-model"
+
+
+async def test_scheduled_turns_bounded_and_do_not_block_foreground(tmp_path, monkeypatch) -> None:
+    provider = RecordingProvider(delay=0.05)
+    agent = _agent(tmp_path, monkeypatch, provider, max_concurrent=1)
+
+    turns = [asyncio.create_task(agent.process_scheduled("x", session_key=f"cron:{i}")) for i in range(2)]
+    await asyncio.sleep(0.01)
+    assert len(provider.calls) == 1  # The second scheduled turn waits for a slot
+    assert agent._idle.is_set()  # Scheduled work does not count as a foreground turn
+    await asyncio.gather(*turns)
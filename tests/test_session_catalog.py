@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from nanobot.session.manager import Session, SessionManager
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def _save(manager: SessionManager, key: str, minutes: int, messages: int = 1) -> None:
+    session = Session(key=key, updated_at=datetime(2026, 1, 1) + timedelta(minutes=minutes))
+    session.messages = [{"role": "user", "content": str(i)} for i in range(messages)]
+    manager.save(session)
+
+
+def test_catalog_tracks_saves_with_paging_and_channel_filter(home) -> None:
+    manager = SessionManager(home / "ws")
+    _save(manager, "telegram:1", 1)
+    _save(manager, "discord:1", 2)
+    _save(manager, "telegram:2", 3, messages=3)
+    _save(manager, "telegram:1", 4, messages=2)  # updated again
+
+    keys = [s["key"] for s in manager.list_sessions()]
+    assert keys == ["telegram:1", "telegram:2", "discord:1"]
+
+    page = manager.list_sessions(channel="telegram", offset=1, limit=1)
+    assert [(s["key"], s["messages"]) for s in page] == [("telegram:2", 3)]
+    assert page[0]["bytes"] > 0
+
+
+def test_catalog_bootstraps_from_existing_files_and_sees_other_writers(home) -> None:
+    writer = SessionManager(home / "ws")
+    _save(writer, "cli:direct", 1)
+    (writer.sessions_dir / "catalog.idx").unlink()
+
+    reader = SessionManager(home / "ws")
+    assert [s["key"] for s in reader.list_sessions()] == ["cli:direct"]
+
+    # Saves from another manager (e.g. another worker process) show up incrementally
+    _save(writer, "slack:C1", 2)
+    assert [s["key"] for s in reader.list_sessions()] == ["slack:C1", "cli:direct"]
+
+
+def test_deleted_sessions_leave_the_catalog(home) -> None:
+    writer = SessionManager(home / "ws")
+    reader = SessionManager(home / "ws")
+    _save(writer, "telegram:1", 1)
+    _save(writer, "telegram:2", 2)
+    assert len(reader.list_sessions()) == 2
+
+    writer._get_session_path("telegram:1").unlink()
+    writer.catalog.remove("telegram:1")
+
+    assert [s["key"] for s in reader.list_sessions()] == ["telegram:2"]
+    assert [s["key"] for s in writer.list_sessions()] == ["telegram:2"]
+
+
+def test_compaction_drops_sessions_whose_files_are_gone(home) -> None:
+    manager = SessionManager(home / "ws")
+    _save(manager, "telegram:1", 1)
+    _save(manager, "telegram:2", 2)
+    manager._get_session_path("telegram:1").unlink()
+
+    manager.catalog.rebuild(manager.catalog.entries())
+
+    assert [s["key"] for s in SessionManager(home / "ws").list_sessions()] == ["telegram:2"]
+
+
+def test_bootstrap_scan_keeps_underscores_in_chat_ids(home) -> None:
+    manager = SessionManager(home / "ws")
+    _save(manager, "slack:C_1", 1)
+    # A header without a stored key falls back to the filename
+    (manager.sessions_dir / "discord_D_2.jsonl").write_text('{"_type": "metadata"}\n')
+    manager.catalog.path.unlink()
+
+    keys = {s["key"] for s in SessionManager(home / "ws").list_sessions()}
+    assert keys == {"slack:C_1", "discord:D_2"}
@@ -0,0 +1,107 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from nanobot.session.manager import Session, SessionManager
+from nanobot.session.sqlite import SQLiteSessionManager, migrate_jsonl
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def test_save_appends_and_reloads(home) -> None:
+    store = SQLiteSessionManager(home / "ws")
+    session = store.get_or_create("telegram:1")
+    session.add_message("user", "hi")
+    session.add_message("assistant", "hello")
+    store.save(session)
+    session.add_message("user", "again")
+    session.last_consolidated = 1
+    store.save(session)
+
+    reloaded = SQLiteSessionManager(home / "ws", db_path=store.db_path)._load("telegram:1")
+    assert [m["content"] for m in reloaded.messages] == ["hi", "hello", "again"]
+    assert reloaded.last_consolidated == 1
+
+
+def test_clear_rewrites_messages(home) -> None:
+    store = SQLiteSessionManager(home / "ws")
+    session = store.get_or_create("cli:direct")
+    session.add_message("user", "old")
+    store.save(session)
+
+    session.clear()
+    session.add_message("user", "new")
+    store.save(session)
+
+    assert [m["content"] for m in store._load("cli:direct").messages] == ["new"]
+
+
+def test_list_sessions_most_recent_first(home) -> None:
+    store = SQLiteSessionManager(home / "ws")
+    now = datetime.now()
+    for i, key in enumerate(["a:1", "b:2", "c:3"]):
+        store.save(Session(key=key, updated_at=now + timedelta(seconds=i)))
+
+    assert [s["key"] for s in store.list_sessions()] == ["c:3", "b:2", "a:1"]
+
+
+def test_migrate_from_jsonl_keeps_keys(home) -> None:
+    jsonl = SessionManager(home / "ws")
+    session = Session(key="slack:C1_thread_2")
+    session.add_message("user", "hi")
+    jsonl.save(session)
+
+    store = SQLiteSessionManager(home / "ws")
+    assert migrate_jsonl(jsonl, store) == 1
+    assert store._load("slack:C1_thread_2").messages[0]["content"] == "hi"
+
+
+@pytest.mark.skipif(not os.environ.get("NANOBOT_BENCH"), reason="benchmark; set NANOBOT_BENCH=1")
+def test_benchmark_10k_sessions(home) -> None:
+    n = 10_000
+    jsonl = SessionManager(home / "ws")
+    store = SQLiteSessionManager(home / "ws")
+    for i in range(n):
+        session = Session(key=f"telegram:{i}")
+        for j in range(10):
+            session.add_message("user" if j % 2 == 0 else "assistant", f"message {j}")
+        jsonl.save(session)
+        store.save(session)
+
+    def timed(fn) -> float:
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    session = store.get_or_create("telegram:42")
+    jsonl_session = jsonl.get_or_create("telegram:42")
+
+    def append_turn(manager, s) -> None:
+        s.add_message("user", "one more")
+        s.add_message("assistant", "sure")
+        manager.save(s)
+
+    results = {
+        "list jsonl": timed(jsonl.list_sessions),
+        "list sqlite": timed(store.list_sessions),
+        "turn jsonl": timed(lambda: append_turn(jsonl, jsonl_session)),
+        "turn sqlite": timed(lambda: append_turn(store, session)),
+    }
+    print("\n" + "\n".join(f"{k}: {v * 1000:.2f}ms" for k, v in results.items()))
+    assert len(store.list_sessions()) == n
+
+
+def test_backend_validated_by_config() -> None:
+    from pydantic import ValidationError
+
+    from nanobot.config.schema import SessionsConfig
+
+    assert SessionsConfig(backend="sqlite").backend == "sqlite"
+    with pytest.raises(ValidationError):
+        SessionsConfig(backend="sqllite")
@@ -0,0 +1,95 @@
+import asyncio
+
+from nanobot.agent.subagent import SubagentManager
+from nanobot.agent.tools.spawn import SubagentsTool
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class SlowProvider(LLMProvider):
+    """Calls one tool, then answers; each call takes `delay` seconds."""
+
+    def __init__(self, delay: float = 0.05):
+        super().__init__()
+        self.delay = delay
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.inflight -= 1
+        usage = {"total_tokens": 10}
+        if messages[-1]["role"] == "user":
+            return LLMResponse(content=None, usage=usage, tool_calls=[
+                ToolCallRequest(id="t1", name="list_dir", arguments={"path": "."}),
+            ])
+        return LLMResponse(content="done", usage=usage)
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+def _manager(tmp_path, provider, bus=None, **kwargs) -> SubagentManager:
+    return SubagentManager(provider, tmp_path, bus or MessageBus(), **kwargs)
+
+
+async def test_pool_bounds_concurrency_and_accounts_usage(tmp_path) -> None:
+    provider = SlowProvider()
+    bus = MessageBus()
+    manager = _manager(tmp_path, provider, bus, max_concurrent=2, max_per_origin=10)
+    for i in range(4):
+        await manager.spawn(f"task {i}", origin_chat_id=str(i))
+    await asyncio.sleep(0.01)
+    assert [r.status for r in manager.status()].count("queued") == 2
+
+    for _ in range(4):
+        await asyncio.wait_for(bus.consume_inbound(), timeout=2)
+    assert provider.max_inflight == 2
+    finished = manager.status()
+    assert [r.status for r in finished] == ["ok"] * 4
+    assert all(r.iterations == 2 and r.tool_calls == 1 and r.usage["total_tokens"] == 20 for r in finished)
+
+
+async def test_per_origin_quota(tmp_path) -> None:
+    manager = _manager(tmp_path, SlowProvider(), max_per_origin=2)
+    assert "started" in await manager.spawn("a", origin_chat_id="c1")
+    assert "started" in await manager.spawn("b", origin_chat_id="c1")
+    assert (await manager.spawn("c", origin_chat_id="c1")).startswith("Error")
+    assert "started" in await manager.spawn("d", origin_chat_id="c2")
+    assert manager.cancel_origin("cli", "c1") == 2
+    manager.cancel_origin("cli", "c2")
+
+
+async def test_tool_cancels_only_own_subagents(tmp_path) -> None:
+    bus = MessageBus()
+    manager = _manager(tmp_path, SlowProvider(delay=1), bus)
+    await manager.spawn("mine", origin_chat_id="c1")
+    await manager.spawn("theirs", origin_chat_id="c2")
+    mine, theirs = (r.id for r in manager.status())
+    tool = SubagentsTool(manager)
+    tool.set_context("cli", "c1")
+
+    assert (await tool.execute(action="cancel", task_id=theirs)).startswith("Error")
+    assert await tool.execute(action="cancel", task_id=mine) == f"Cancelled subagent {mine}"
+    await asyncio.sleep(0.01)
+    assert "cancelled" in await tool.execute(action="list")
+    assert manager.get_running_count() == 1
+    assert bus.inbound_size == 0  # Cancelled runs are not announced
+    manager.cancel(theirs)
+
+
+async def test_subagents_share_main_loop_tools(tmp_path, monkeypatch) -> None:
+    from nanobot.agent.loop import AgentLoop
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    agent = AgentLoop(MessageBus(), SlowProvider(delay=0), tmp_path / "ws")
+    manager = agent.subagents
+
+    assert manager.tools.get("exec") is agent.tools.get("exec")
+    assert agent._scheduled_tools("cli", "x").get("read_file") is agent.tools.get("read_file")
+    assert not {"message", "spawn", "subagents"} & set(manager.tools.tool_names)
+    assert str(tmp_path / "ws") in manager._build_subagent_prompt()
@@ -1,5 +1,10 @@
+import json
+import os
+import time
 from typing import Any
 
+import pytest
+
 from nanobot.agent.tools.base import Tool
 from nanobot.agent.tools.registry import ToolRegistry
 
@@ -81,8 +86,101 @@ def test_validate_params_ignores_unknown_fields() -> None:
     assert errors == []
 
 
+class CoercingTool(SampleTool):
+    coerce_params = True
+
+
+def _interpret(val: Any, schema: dict[str, Any], path: str = "") -> list[str]:
+    """The previous schema interpreter, kept as the reference for the compiled validators."""
+    types = {"string": str, "integer": int, "number": (int, float), "boolean": bool, "array": list, "object": dict}
+    t, label = schema.get("type"), path or "parameter"
+    if t in types and not isinstance(val, types[t]):
+        return [f"{label} should be {t}"]
+    errors = []
+    if "enum" in schema and val not in schema["enum"]:
+        errors.append(f"{label} must be one of {schema['enum']}")
+    if t in ("integer", "number"):
+        if "minimum" in schema and val < schema["minimum"]:
+            errors.append(f"{label} must be >= {schema['minimum']}")
+        if "maximum" in schema and val > schema["maximum"]:
+            errors.append(f"{label} must be <= {schema['maximum']}")
+    if t == "string":
+        if "minLength" in schema and len(val) < schema["minLength"]:
+            errors.append(f"{label} must be at least {schema['minLength']} chars")
+        if "maxLength" in schema and len(val) > schema["maxLength"]:
+            errors.append(f"{label} must be at most {schema['maxLength']} chars")
+    if t == "object":
+        props = schema.get("properties", {})
+        for k in schema.get("required", []):
+            if k not in val:
+                errors.append(f"missing required {path + '.' + k if path else k}")
+        for k, v in val.items():
+            if k in props:
+                errors.extend(_interpret(v, props[k], path + '.' + k if path else k))
+    if t == "array" and "items" in schema:
+        for i, item in enumerate(val):
+            errors.extend(_interpret(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
+    return errors
+
+
+CASES = [
+    {"query": "hi", "count": 2},
+    {"query": "h", "count": 11, "mode": "slow"},
+    {"count": "2", "meta": {"flags": [1, "ok", None]}},
+    {"query": 5, "count": 2.5, "meta": {"tag": 1, "flags": "x"}},
+    {"query": "hello", "count": 3, "meta": {"tag": "t", "flags": ["a", "b"]}, "extra": 1},
+]
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_compiled_validator_matches_interpreter(params) -> None:
+    assert SampleTool().validate_params(params) == _interpret(params, SampleTool().parameters)
+
+
+def test_opt_in_coercion_converts_model_strings() -> None:
+    params = {"query": "hi", "count": "5", "meta": {"tag": "t", "flags": ["a"]}}
+    coerced, errors = CoercingTool().prepare_params(params)
+    assert errors == [] and coerced["count"] == 5
+    assert params["count"] == "5"  # The caller's dict is left alone
+    assert CoercingTool().validate_params({"query": "hi", "count": "five"}) == ["count should be integer"]
+    assert CoercingTool().validate_params({"query": "hi", "count": "50"}) == ["count must be <= 10"]
+
+
+@pytest.mark.skipif(not os.environ.get("NANOBOT_BENCH"), reason="benchmark; set NANOBOT_BENCH=1")
+def test_benchmark_compiled_vs_interpreted() -> None:
+    tool, schema = SampleTool(), SampleTool().parameters
+    params = {"query": "hello", "count": 3, "mode": "fast", "meta": {"tag": "t", "flags": ["a", "b", "c"]}}
+    n = 50_000
+    tool.validate_params(params)  # Compile outside the timed loop
+
+    start = time.perf_counter()
+    for _ in range(n):
+        tool.validate_params(params)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n):
+        _interpret(params, schema)
+    interpreted = time.perf_counter() - start
+
+    print(f"\nvalidate x{n}: compiled {compiled * 1000:.0f}ms, interpreted {interpreted * 1000:.0f}ms")
+
+
 async def test_registry_returns_validation_error() -> None:
     reg = ToolRegistry()
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+def test_registry_caches_definitions_until_changed() -> None:
+    reg = ToolRegistry()
+    reg.register(SampleTool())
+    defs = reg.get_definitions()
+    assert reg.get_definitions() is defs
+    assert json.loads(defs.encoded) == [SampleTool().to_schema()]
+
+    reg.unregister("missing")
+    assert reg.get_definitions() is defs
+    reg.unregister("sample")
+    assert reg.get_definitions() == () and reg.get_definitions().encoded == "[]"
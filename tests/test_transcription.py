@@ -0,0 +1,140 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from nanobot.config.schema import TranscriptionConfig
+from nanobot.providers import transcription
+from nanobot.providers.transcription import (
+    GroqTranscriptionProvider,
+    LocalWhisperTranscriptionProvider,
+    TranscriptionProvider,
+    create_transcriber,
+)
+
+
+class CountingProvider(TranscriptionProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def transcribe_file(self, path: Path) -> str:
+        self.calls += 1
+        return f"text of {path.name}"
+
+
+async def test_results_cached_by_audio_hash(tmp_path) -> None:
+    a, b = tmp_path / "a.ogg", tmp_path / "b.ogg"
+    a.write_bytes(b"same audio")
+    b.write_bytes(b"same audio")
+    provider = CountingProvider()
+
+    assert await provider.transcribe(a) == "text of a.ogg"
+    assert await provider.transcribe(b) == "text of a.ogg"  # Same content, no second run
+    assert provider.calls == 1
+    assert await provider.transcribe(tmp_path / "missing.ogg") == ""
+
+
+async def test_short_clips_batched_long_clips_sent_alone(tmp_path, monkeypatch) -> None:
+    batches: list[list[str]] = []
+    lock = threading.Lock()
+
+    def fake_batch(paths: list[str], language: str) -> list[str]:
+        with lock:
+            batches.append([Path(p).name for p in paths])
+        return [Path(p).stem.upper() for p in paths]
+
+    monkeypatch.setattr(transcription, "_transcribe_batch", fake_batch)
+    executor = ThreadPoolExecutor(2)
+    provider = LocalWhisperTranscriptionProvider(
+        executor=executor, batch_size=3, batch_window_s=0.05, short_clip_bytes=100,
+    )
+    clips = []
+    for i in range(4):
+        clip = tmp_path / f"v{i}.ogg"
+        clip.write_bytes(f"clip {i}".encode())
+        clips.append(clip)
+    long_clip = tmp_path / "long.ogg"
+    long_clip.write_bytes(b"x" * 500)
+
+    texts = await asyncio.gather(*(provider.transcribe(c) for c in [*clips, long_clip]))
+    await provider.close()
+
+    assert texts == ["V0", "V1", "V2", "V3", "LONG"]
+    assert sorted(map(len, batches)) == [1, 1, 3]
+    assert ["long.ogg"] in batches
+
+
+async def test_batch_split_across_workers(tmp_path, monkeypatch) -> None:
+    batches: list[list[str]] = []
+    lock = threading.Lock()
+
+    def fake_batch(paths: list[str], language: str) -> list[str]:
+        with lock:
+            batches.append([Path(p).name for p in paths])
+        return [Path(p).stem.upper() for p in paths]
+
+    monkeypatch.setattr(transcription, "_transcribe_batch", fake_batch)
+    executor = ThreadPoolExecutor(2)
+    provider = LocalWhisperTranscriptionProvider(
+        executor=executor, workers=2, batch_size=5, batch_window_s=0.05, short_clip_bytes=100,
+    )
+    clips = []
+    for i in range(5):
+        clip = tmp_path / f"v{i}.ogg"
+        clip.write_bytes(f"clip {i}".encode())
+        clips.append(clip)
+
+    texts = await asyncio.gather(*(provider.transcribe(c) for c in clips))
+    await provider.close()
+
+    assert texts == ["V0", "V1", "V2", "V3", "V4"]
+    assert sorted(map(len, batches)) == [2, 3]
+
+
+def test_backend_selection(monkeypatch) -> None:
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    assert create_transcriber(TranscriptionConfig(), groq_api_key="") is None
+    assert isinstance(create_transcriber(TranscriptionConfig(), groq_api_key="k"), GroqTranscriptionProvider)
+    assert create_transcriber(TranscriptionConfig(backend="none"), groq_api_key="k") is None
+
+    monkeypatch.setattr(transcription.importlib.util, "find_spec", lambda name: object())
+    local = create_transcriber(TranscriptionConfig(backend="local", batch_window_ms=20), groq_api_key="k")
+    assert isinstance(local, LocalWhisperTranscriptionProvider) and local.batch_window_s == 0.02
+
+    monkeypatch.setattr(transcription.importlib.util, "find_spec", lambda name: None)
+    fallback = create_transcriber(TranscriptionConfig(backend="local"), groq_api_key="k")
+    assert isinstance(fallback, GroqTranscriptionProvider)
+
+    with pytest.raises(ValidationError):
+        TranscriptionConfig(backend="whisper")
+
+
+async def test_close_resolves_queued_and_in_flight_clips(tmp_path, monkeypatch) -> None:
+    release = threading.Event()
+
+    def stuck_batch(paths: list[str], language: str) -> list[str]:
+        release.wait(5)
+        return ["late"] * len(paths)
+
+    monkeypatch.setattr(transcription, "_transcribe_batch", stuck_batch)
+    executor = ThreadPoolExecutor(1)
+    provider = LocalWhisperTranscriptionProvider(
+        executor=executor, batch_size=1, batch_window_s=0.01, short_clip_bytes=100,
+    )
+    clips = []
+    for i, size in enumerate((10, 10, 500)):  # Two batched clips (one queued behind the other), one long
+        clip = tmp_path / f"v{i}.ogg"
+        clip.write_bytes(bytes([i]) * size)
+        clips.append(clip)
+
+    calls = [asyncio.create_task(provider.transcribe(c)) for c in clips]
+    await asyncio.sleep(0.2)
+    await provider.close()
+
+    assert await asyncio.wait_for(asyncio.gather(*calls), timeout=1) == ["", "", ""]
+    release.set()
+    executor.shutdown()